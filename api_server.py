@@ -8,10 +8,11 @@ Fornece endpoints para a interface HTML se conectar aos dados reais
 import json
 import asyncio
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 
 # Importar módulos do MCP
@@ -19,6 +20,8 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from modules.tasks.tools import TasksTools
+from modules.tasks.index import snippet
+from modules.tasks.records import from_timestamp
 from config.settings import settings
 from core.connection_monitor import get_connection_monitor
 
@@ -43,6 +46,23 @@ CORS(app)  # Permitir CORS para desenvolvimento
 # Instâncias dos módulos
 tasks_module = None
 connection_monitor = None
+_refresh_lock = threading.Lock()
+# Cada conexão SSE de lembretes ocupa uma thread do servidor enquanto durar
+_reminder_streams = threading.BoundedSemaphore(max(1, settings.TASKS_REMINDER_STREAMS))
+
+@app.before_request
+def refresh_tasks():
+    """Traz mudanças feitas pelo servidor MCP antes de cada requisição da API.
+
+    Só relê o banco quando o arquivo mudou (ou aplica as linhas novas do
+    journal); caso contrário responde direto da memória. As leituras das
+    rotas usam ``tasks_module.view()``, que não disputa lock com escritas
+    de outras threads.
+    """
+    if tasks_module and request.path.startswith('/api/'):
+        with _refresh_lock:
+            if asyncio.run(tasks_module.refresh()):
+                logger.info("🔄 Dados de tarefas atualizados a partir do disco")
 
 @app.route('/')
 def index():
@@ -85,9 +105,10 @@ def get_status():
         completed_count = 0
         
         if tasks_module:
-            task_count = len([t for t in tasks_module.tasks if not t['completed']])
-            completed_count = len([t for t in tasks_module.tasks if t['completed']])
-            note_count = len(tasks_module.notes)
+            stats = tasks_module.view().get_task_stats()
+            task_count = stats['pending']
+            completed_count = stats['completed']
+            note_count = stats['notes']
         
         status_data = {
             'status': 'running',
@@ -126,34 +147,27 @@ def get_tasks():
             logger.warning("⚠️ Módulo de tarefas não inicializado")
             return jsonify({'error': 'Tasks module not initialized'}), 500
         
-        # ✨ FORÇA RELOAD DOS DADOS DO ARQUIVO ANTES DE CADA REQUISIÇÃO
-        asyncio.run(tasks_module.load_data())
-        
         status = request.args.get('status', 'all')
         limit = int(request.args.get('limit', 50))
+        cursor = request.args.get('cursor')
         
-        filtered_tasks = tasks_module.tasks
-        
-        if status == 'pending':
-            filtered_tasks = [t for t in tasks_module.tasks if not t['completed']]
-        elif status == 'completed':
-            filtered_tasks = [t for t in tasks_module.tasks if t['completed']]
-        
-        # Ordenar por prioridade e data
-        priority_order = {'high': 0, 'medium': 1, 'low': 2}
-        filtered_tasks = sorted(
-            filtered_tasks,
-            key=lambda x: (x['completed'], priority_order.get(x['priority'], 1))
-        )
+        # Página e contagens da mesma versão publicada dos dados
+        view = tasks_module.view()
+        try:
+            page = view.select_tasks(status, limit, cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        stats = view.get_task_stats()
         
-        logger.info(f"📋 Listando {len(filtered_tasks)} tarefas (filtro: {status})")
+        logger.info(f"📋 Listando {page.total} tarefas (filtro: {status})")
         
         return jsonify({
-            'tasks': filtered_tasks[:limit],
-            'total': len(tasks_module.tasks),
-            'filtered': len(filtered_tasks),
-            'pending': len([t for t in tasks_module.tasks if not t['completed']]),
-            'completed': len([t for t in tasks_module.tasks if t['completed']])
+            'tasks': [t.to_dict() for t in page.items],
+            'total': stats['total'],
+            'filtered': page.total,
+            'pending': stats['pending'],
+            'completed': stats['completed'],
+            'next_cursor': page.next_cursor
         })
         
     except Exception as e:
@@ -172,19 +186,25 @@ def create_task():
         
         logger.info(f"➕ Criando tarefa: '{title}' (prioridade: {data.get('priority', 'medium')})")
         
-        result = asyncio.run(tasks_module.create_task(
-            title=title,
-            description=data.get('description', ''),
-            priority=data.get('priority', 'medium'),
-            due_date=data.get('due_date', '')
-        ))
-        
-        logger.info(f"✅ Tarefa criada: #{tasks_module.tasks[-1]['id']} - {title}")
+        try:
+            # O registro devolvido traz o id gravado, mesmo com criações concorrentes
+            task = asyncio.run(tasks_module.add_task(
+                title=title,
+                description=data.get('description', ''),
+                priority=data.get('priority', 'medium'),
+                due_date=data.get('due_date', ''),
+                recurrence=data.get('recurrence', '')
+            ))
+        except ValueError as e:
+            logger.warning(f"⚠️ Tarefa rejeitada: {e}")
+            return jsonify({'error': str(e)}), 400
+        
+        logger.info(f"✅ Tarefa criada: #{task['id']} - {title}")
         
         return jsonify({
             'success': True,
-            'message': result,
-            'task': tasks_module.tasks[-1] if tasks_module.tasks else None
+            'message': f"Tarefa #{task['id']} '{task['title']}' criada com sucesso",
+            'task': task.to_dict()
         })
         
     except Exception as e:
@@ -199,7 +219,7 @@ def complete_task(task_id):
             return jsonify({'error': 'Tasks module not initialized'}), 500
         
         # Encontrar título da tarefa para log
-        task = next((t for t in tasks_module.tasks if t['id'] == task_id), None)
+        task = tasks_module.get_task(task_id)
         task_title = task['title'] if task else f"#{task_id}"
         
         logger.info(f"✓ Completando tarefa: {task_title}")
@@ -224,7 +244,7 @@ def delete_task(task_id):
             return jsonify({'error': 'Tasks module not initialized'}), 500
         
         # Encontrar título da tarefa para log
-        task = next((t for t in tasks_module.tasks if t['id'] == task_id), None)
+        task = tasks_module.get_task(task_id)
         task_title = task['title'] if task else f"#{task_id}"
         
         logger.info(f"🗑️ Deletando tarefa: {task_title}")
@@ -241,6 +261,253 @@ def delete_task(task_id):
         logger.error(f"❌ Erro ao deletar tarefa #{task_id}: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tasks/due')
+def get_due_tasks():
+    """Tarefas pendentes que vencem nas próximas horas"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        within_hours = float(request.args.get('within_hours', 24))
+        limit = int(request.args.get('limit', 50))
+        
+        page = tasks_module.view().select_due_tasks(within_hours, limit)
+        
+        logger.info(f"⏰ {page.total} tarefas vencem nas próximas {within_hours:g}h")
+        
+        return jsonify({
+            'tasks': [t.to_dict() for t in page.items],
+            'total': page.total,
+            'within_hours': within_hours
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar tarefas por prazo: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/overdue')
+def get_overdue_tasks():
+    """Tarefas pendentes com prazo vencido"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        limit = int(request.args.get('limit', 50))
+        
+        page = tasks_module.view().select_overdue_tasks(limit)
+        
+        logger.info(f"⚠️ {page.total} tarefas atrasadas")
+        
+        return jsonify({
+            'tasks': [t.to_dict() for t in page.items],
+            'total': page.total
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar tarefas atrasadas: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/agenda')
+def get_agenda():
+    """Pendentes que vencem nos próximos dias, com as ocorrências das recorrentes"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        days = float(request.args.get('days', 7))
+        limit = int(request.args.get('limit', 50))
+        
+        page = tasks_module.view().select_agenda(days, limit)
+        
+        logger.info(f"🗓️ {page.total} itens na agenda dos próximos {days:g} dias")
+        
+        return jsonify({
+            'tasks': [t.to_dict() for t in page.items],
+            'total': page.total,
+            'days': days
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erro ao montar agenda: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/query')
+def query_tasks():
+    """Tarefas filtradas e ordenadas pela linguagem de consulta (parâmetro q)"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        query = request.args.get('q', '')
+        limit = int(request.args.get('limit', 50))
+        cursor = request.args.get('cursor')
+        
+        page = tasks_module.view().select_query(query, limit, cursor)
+        
+        logger.info(f"🧮 Consulta '{query}': {page.total} tarefas")
+        
+        return jsonify({
+            'tasks': [t.to_dict() for t in page.items],
+            'total': page.total,
+            'query': query,
+            'next_cursor': page.next_cursor
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erro ao consultar tarefas: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/reminders')
+def get_reminders():
+    """Lembretes de prazo já disparados (após o número de sequência ``after``)"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        after = int(request.args.get('after', 0))
+        reminders = tasks_module.reminders
+        
+        return jsonify({
+            'reminders': reminders.events_after(after),
+            'scheduled': len(reminders),
+            'next_due': from_timestamp(reminders.next_due())
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar lembretes: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/reminders/stream')
+def stream_reminders():
+    """Lembretes de prazo em tempo real (Server-Sent Events, evento 'reminder')
+
+    A conexão fica aberta e só recebe dados quando um lembrete dispara, em
+    vez de o navegador consultar a lista de tarefas para achar os vencidos.
+    Reconexões retomam de ``Last-Event-ID``. O stream termina quando o
+    agendador é encerrado (``cleanup``).
+
+    Cada conexão prende uma thread do servidor; acima de
+    TASKS_REMINDER_STREAMS conexões simultâneas a resposta é 503.
+    """
+    if not tasks_module:
+        return jsonify({'error': 'Tasks module not initialized'}), 500
+    
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    reminders = tasks_module.reminders
+    if reminders.closed:
+        return jsonify({'error': 'Reminders stopped'}), 503
+    if not _reminder_streams.acquire(blocking=False):
+        return jsonify({'error': 'Too many reminder streams'}), 503
+    
+    def events():
+        seq = after
+        while True:
+            batch = reminders.wait(seq, timeout=15)
+            for event in batch:
+                seq = event['seq']
+                yield f"id: {seq}\nevent: reminder\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if reminders.closed:
+                return  # wait() não bloqueia mais: encerra em vez de girar
+            if not batch:
+                yield ": keep-alive\n\n"
+    
+    logger.info("⏰ Cliente inscrito nos lembretes de prazo")
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(_reminder_streams.release)
+    return response
+
+@app.route('/api/tasks/batch', methods=['POST'])
+def create_tasks_batch():
+    """Cria várias tarefas com uma única gravação"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        data = request.get_json() or {}
+        items = data.get('tasks', [])
+        
+        logger.info(f"➕ Criando {len(items)} tarefas em lote")
+        
+        try:
+            created = asyncio.run(tasks_module.bulk_create_tasks(items))
+        except ValueError as e:
+            logger.warning(f"⚠️ Lote de tarefas rejeitado: {e}")
+            return jsonify({'error': str(e)}), 400
+        
+        logger.info(f"✅ {len(created)} tarefas criadas em lote")
+        
+        return jsonify({
+            'success': True,
+            'tasks': [t.to_dict() for t in created],
+            'count': len(created)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao criar tarefas em lote: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/batch/complete', methods=['POST'])
+def complete_tasks_batch():
+    """Marca várias tarefas como concluídas"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        ids = (request.get_json() or {}).get('ids', [])
+        
+        logger.info(f"✓ Completando {len(ids)} tarefas em lote")
+        completed, missing = asyncio.run(tasks_module.bulk_complete_tasks(ids))
+        
+        logger.info(f"✅ {len(completed)} tarefas concluídas em lote")
+        
+        return jsonify({
+            'success': True,
+            'completed': [t['id'] for t in completed],
+            'missing': missing
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao completar tarefas em lote: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/batch', methods=['DELETE'])
+def delete_tasks_batch():
+    """Deleta várias tarefas"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        ids = (request.get_json() or {}).get('ids', [])
+        
+        logger.info(f"🗑️ Deletando {len(ids)} tarefas em lote")
+        deleted, missing = asyncio.run(tasks_module.bulk_delete_tasks(ids))
+        
+        logger.info(f"✅ {len(deleted)} tarefas deletadas em lote")
+        
+        return jsonify({
+            'success': True,
+            'deleted': [t['id'] for t in deleted],
+            'missing': missing
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao deletar tarefas em lote: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/notes')
 def get_notes():
     """Lista todas as notas"""
@@ -249,25 +516,50 @@ def get_notes():
             return jsonify({'error': 'Tasks module not initialized'}), 500
         
         limit = int(request.args.get('limit', 20))
+        cursor = request.args.get('cursor')
+        tag = request.args.get('tag')
         
-        # Ordenar por data
-        sorted_notes = sorted(
-            tasks_module.notes,
-            key=lambda x: x['created_at'],
-            reverse=True
-        )
+        # Mais recentes primeiro, paginado por cursor (opcionalmente por tag)
+        try:
+            if tag:
+                page = tasks_module.view().select_notes_by_tag(tag, limit, cursor)
+            else:
+                page = tasks_module.view().select_notes(limit, cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        logger.info(f"📝 Listando {len(sorted_notes)} notas")
+        logger.info(f"📝 Listando {len(page.items)} de {page.total} notas")
         
         return jsonify({
-            'notes': sorted_notes[:limit],
-            'total': len(tasks_module.notes)
+            'notes': [n.to_dict() for n in page.items],
+            'total': page.total,
+            'next_cursor': page.next_cursor
         })
         
     except Exception as e:
         logger.error(f"❌ Erro ao listar notas: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tags')
+def get_tags():
+    """Lista as tags das notas com contagens"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        counts = tasks_module.view().get_tag_counts()
+        
+        logger.info(f"🏷️ Listando {len(counts)} tags")
+        
+        return jsonify({
+            'tags': [{'tag': tag, 'count': count} for tag, count in counts],
+            'total': len(counts)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar tags: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/notes', methods=['POST'])
 def create_note():
     """Cria uma nova nota"""
@@ -280,24 +572,58 @@ def create_note():
         
         logger.info(f"➕ Criando nota: '{title}'")
         
-        result = asyncio.run(tasks_module.create_note(
-            title=title,
-            content=data.get('content', ''),
-            tags=data.get('tags', '')
-        ))
+        try:
+            # O registro devolvido traz o id gravado, mesmo com criações concorrentes
+            note = asyncio.run(tasks_module.add_note(
+                title=title,
+                content=data.get('content', ''),
+                tags=data.get('tags', '')
+            ))
+        except ValueError as e:
+            logger.warning(f"⚠️ Nota rejeitada: {e}")
+            return jsonify({'error': str(e)}), 400
         
-        logger.info(f"✅ Nota criada: {title}")
+        logger.info(f"✅ Nota criada: #{note['id']} - {title}")
         
         return jsonify({
             'success': True,
-            'message': result,
-            'note': tasks_module.notes[-1] if tasks_module.notes else None
+            'message': f"Nota #{note['id']} '{note['title']}' criada com sucesso",
+            'note': note.to_dict()
         })
         
     except Exception as e:
         logger.error(f"❌ Erro ao criar nota: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/notes/batch', methods=['POST'])
+def create_notes_batch():
+    """Cria várias notas com uma única gravação"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        items = (request.get_json() or {}).get('notes', [])
+        
+        logger.info(f"➕ Criando {len(items)} notas em lote")
+        
+        try:
+            created = asyncio.run(tasks_module.bulk_create_notes(items))
+        except ValueError as e:
+            logger.warning(f"⚠️ Lote de notas rejeitado: {e}")
+            return jsonify({'error': str(e)}), 400
+        
+        logger.info(f"✅ {len(created)} notas criadas em lote")
+        
+        return jsonify({
+            'success': True,
+            'notes': [n.to_dict() for n in created],
+            'count': len(created)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao criar notas em lote: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/logs')
 def get_logs():
     """Retorna logs do servidor com filtros avançados"""
@@ -346,16 +672,12 @@ def search_tasks():
         
         logger.info(f"🔍 Buscando tarefas: '{query}'")
         
-        matches = []
-        for task in tasks_module.tasks:
-            if (query in task['title'].lower() or 
-                query in task['description'].lower()):
-                matches.append(task)
+        matches = tasks_module.view().find_tasks(query)
         
         logger.info(f"✅ Encontradas {len(matches)} tarefas para '{query}'")
         
         return jsonify({
-            'tasks': matches,
+            'tasks': [t.to_dict() for t in matches],
             'query': query,
             'count': len(matches)
         })
@@ -364,6 +686,38 @@ def search_tasks():
         logger.error(f"❌ Erro ao buscar tarefas: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search/notes')
+def search_notes():
+    """Busca notas por texto (ranking BM25)"""
+    try:
+        if not tasks_module:
+            return jsonify({'error': 'Tasks module not initialized'}), 500
+        
+        query = request.args.get('q', '')
+        limit = int(request.args.get('limit', 10))
+        
+        if not query:
+            return jsonify({'notes': [], 'count': 0})
+        
+        logger.info(f"🔍 Buscando notas: '{query}'")
+        
+        matches = tasks_module.view().find_notes(query, limit)
+        
+        logger.info(f"✅ Encontradas {len(matches)} notas para '{query}'")
+        
+        return jsonify({
+            'notes': [
+                {**note.to_dict(), 'score': round(score, 4), 'snippet': snippet(note['content'], query)}
+                for note, score in matches
+            ],
+            'query': query,
+            'count': len(matches)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao buscar notas: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/connections')
 def get_connections():
     """Retorna informações sobre clientes MCP conectados"""
@@ -409,13 +763,14 @@ def get_metrics():
             return jsonify({'error': 'Tasks module not initialized'}), 500
         
         # Calcular métricas
-        total_tasks = len(tasks_module.tasks)
-        pending_tasks = len([t for t in tasks_module.tasks if not t['completed']])
-        completed_tasks = len([t for t in tasks_module.tasks if t['completed']])
+        stats = tasks_module.view().get_task_stats()
+        total_tasks = stats['total']
+        pending_tasks = stats['pending']
+        completed_tasks = stats['completed']
         
-        high_priority = len([t for t in tasks_module.tasks if t['priority'] == 'high' and not t['completed']])
-        medium_priority = len([t for t in tasks_module.tasks if t['priority'] == 'medium' and not t['completed']])
-        low_priority = len([t for t in tasks_module.tasks if t['priority'] == 'low' and not t['completed']])
+        high_priority = stats['priority']['high']
+        medium_priority = stats['priority']['medium']
+        low_priority = stats['priority']['low']
         
         # Taxa de conclusão
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
@@ -438,7 +793,7 @@ def get_metrics():
                 'low': low_priority
             },
             'notes': {
-                'total': len(tasks_module.notes)
+                'total': stats['notes']
             },
             'connections': connection_stats,
             'timestamp': datetime.now().isoformat()
@@ -470,8 +825,9 @@ def initialize_modules():
             client_name="Web Dashboard"
         )
         
-        task_count = len(tasks_module.tasks)
-        note_count = len(tasks_module.notes)
+        stats = tasks_module.get_task_stats()
+        task_count = stats['total']
+        note_count = stats['notes']
         
         logger.info(f"✅ Módulo de tarefas inicializado")
         logger.info(f"✅ Monitor de conexões inicializado")
@@ -505,10 +861,22 @@ def main():
     print("  POST /api/tasks           - Criar tarefa")
     print("  POST /api/tasks/:id/complete - Completar tarefa")
     print("  DELETE /api/tasks/:id     - Deletar tarefa")
+    print("  POST /api/tasks/batch     - Criar tarefas em lote")
+    print("  POST /api/tasks/batch/complete - Completar tarefas em lote")
+    print("  DELETE /api/tasks/batch   - Deletar tarefas em lote")
+    print("  GET  /api/tasks/due       - Tarefas que vencem em breve")
+    print("  GET  /api/tasks/overdue   - Tarefas atrasadas")
+    print("  GET  /api/tasks/agenda    - Agenda com ocorrências das recorrentes")
+    print("  GET  /api/tasks/query     - Consultar tarefas (q=priority:high sort:-created)")
+    print("  GET  /api/tasks/reminders - Lembretes de prazo disparados")
+    print("  GET  /api/tasks/reminders/stream - Lembretes em tempo real (SSE)")
     print("  GET  /api/notes           - Listar notas")
     print("  POST /api/notes           - Criar nota")
+    print("  POST /api/notes/batch     - Criar notas em lote")
+    print("  GET  /api/tags            - Tags das notas com contagens")
     print("  GET  /api/logs            - Logs do servidor")
     print("  GET  /api/search/tasks    - Buscar tarefas")
+    print("  GET  /api/search/notes    - Buscar notas")
     print("  GET  /api/metrics         - Métricas do sistema")
     print("  GET  /api/connections     - Clientes MCP conectados")
     print()
@@ -517,12 +885,16 @@ def main():
     print("="*60)
     
     # Iniciar servidor
-    app.run(
-        host='0.0.0.0',
-        port=5000,
-        debug=False,
-        threaded=True
-    )
+    try:
+        app.run(
+            host='0.0.0.0',
+            port=5000,
+            debug=False,
+            threaded=True
+        )
+    finally:
+        # Gravar mutações pendentes antes de sair
+        asyncio.run(tasks_module.cleanup())
 
 if __name__ == '__main__':
     main()
@@ -16,6 +16,7 @@ document.addEventListener('DOMContentLoaded', () => {
     setupForms();
     setupFilters();
     setupSearch();
+    setupReminders();
     
     loadStatus();
     loadTasks();
@@ -54,6 +55,21 @@ function setupTabs() {
     });
 }
 
+// ========== LEMBRETES ==========
+
+function setupReminders() {
+    // O servidor avisa quando um prazo vence; nada é consultado enquanto isso
+    const source = new EventSource(`${API_URL}/tasks/reminders/stream`);
+    
+    source.addEventListener('reminder', (e) => {
+        const reminder = JSON.parse(e.data);
+        showToast(`⏰ Tarefa #${reminder.task_id} ${escapeHtml(reminder.title)} venceu`, 'warning');
+        loadTasks();
+    });
+    
+    source.onerror = () => console.warn('⚠️ Conexão de lembretes interrompida, reconectando...');
+}
+
 // ========== STATUS ==========
 
 async function loadStatus() {
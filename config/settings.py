@@ -33,6 +33,13 @@ class Settings(BaseSettings):
 
     # Tarefas
     TASKS_DB_PATH: str = "./data/tasks.json"
+    TASKS_STORAGE: str = "json"  # json, journal, sqlite
+    TASKS_DB_FORMAT: str = "json"  # json, binary (formato do snapshot)
+    TASKS_JOURNAL_COMPACT_OPS: int = 500
+    TASKS_WRITE_BEHIND_MS: int = 0  # 0 = grava a cada mutação
+    TASKS_WRITE_BEHIND_MAX_OPS: int = 100
+    TASKS_ARCHIVE_DAYS: int = 90  # 0 = não arquivar concluídas
+    TASKS_REMINDER_STREAMS: int = 32  # conexões SSE de lembretes simultâneas (uma thread cada)
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -62,6 +69,26 @@ class Settings(BaseSettings):
             return 'INFO'
         return v.upper()
 
+    @field_validator('TASKS_STORAGE', mode='before')
+    @classmethod
+    def validate_tasks_storage(cls, v):
+        """Validate tasks storage backend."""
+        valid_backends = ['json', 'journal', 'sqlite']
+        if v.lower() not in valid_backends:
+            print(f"Backend de tarefas invalido: {v}. Usando json.")
+            return 'json'
+        return v.lower()
+
+    @field_validator('TASKS_DB_FORMAT', mode='before')
+    @classmethod
+    def validate_tasks_db_format(cls, v):
+        """Validate tasks snapshot format."""
+        valid_formats = ['json', 'binary']
+        if v.lower() not in valid_formats:
+            print(f"Formato do banco de tarefas invalido: {v}. Usando json.")
+            return 'json'
+        return v.lower()
+
     def get_allowed_directories(self) -> List[str]:
         """Retorna lista de diretórios permitidos válidos."""
         if not self.ALLOWED_DIRECTORIES:
@@ -33,6 +33,10 @@ class MCPPersonalServer:
         
         # Variável para armazenar ID do cliente atual
         self.current_client_id = "claude-desktop"
+        
+        # Sessão MCP (e seu loop) da última chamada de ferramenta, para
+        # notificações que nascem fora de uma requisição (lembretes)
+        self._session = None
 
     async def initialize(self):
         """Inicializa o servidor e todos os módulos."""
@@ -44,6 +48,10 @@ class MCPPersonalServer:
         # Registrar ferramentas no MCP
         await self.register_tools()
 
+        # Lembretes de prazo viram notificações para o cliente
+        if "tasks" in self.modules:
+            self.modules["tasks"].reminders.subscribe(self._notify_reminder)
+
         self.logger.info(f"Servidor inicializado com {len(self.registry.tools)} ferramentas")
 
     async def load_modules(self):
@@ -87,6 +95,10 @@ class MCPPersonalServer:
                         tool_name=name
                     )
                     self.logger.info(f"Ferramenta '{name}' chamada por {self.current_client_id} com: {kwargs}")
+                    try:
+                        self._session = (self.mcp.get_context().session, asyncio.get_running_loop())
+                    except (LookupError, ValueError, AttributeError):
+                        pass  # chamada fora de uma requisição MCP
                     # Executar ferramenta original com os parâmetros corretos
                     return await func(**kwargs)
                 
@@ -103,6 +115,26 @@ class MCPPersonalServer:
             decorated_tool = self.mcp.tool()(wrapped_func)
             self.logger.debug(f"Ferramenta registrada: {tool_name}")
 
+    def _notify_reminder(self, event: Dict[str, Any]):
+        """
+        Envia um lembrete de prazo ao cliente MCP (notifications/message).
+
+        Roda na thread dos lembretes; a mensagem é agendada no loop da
+        sessão. Antes da primeira chamada de ferramenta não há sessão, e o
+        lembrete fica só no log e em ``list_reminders``.
+        """
+        if self._session is None:
+            return
+        session, loop = self._session
+        text = f"⏰ Tarefa #{event['task_id']} '{event['title']}' venceu ({event['due_date']})"
+        try:
+            asyncio.run_coroutine_threadsafe(
+                session.send_log_message(level="warning", data=text, logger="tasks.reminders"),
+                loop
+            )
+        except RuntimeError as e:
+            self.logger.warning(f"Lembrete não enviado ao cliente: {e}")
+
     def run_sync(self):
         """Executa o servidor MCP de forma síncrona."""
         try:
@@ -119,6 +151,16 @@ class MCPPersonalServer:
         except Exception as e:
             self.logger.error(f"Erro ao executar servidor: {e}")
             raise
+        finally:
+            asyncio.run(self.shutdown())
+
+    async def shutdown(self):
+        """Encerra os módulos, gravando dados pendentes."""
+        for name, module in self.modules.items():
+            try:
+                await module.cleanup()
+            except Exception as e:
+                self.logger.error(f"Erro ao encerrar modulo {name}: {e}")
 
     def get_status(self) -> Dict[str, Any]:
         """Retorna o status do servidor."""
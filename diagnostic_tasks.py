@@ -17,14 +17,16 @@ Solução:
 3. Adicionar polling mais frequente ou webhook
 """
 
-import json
 import asyncio
+import contextlib
 from pathlib import Path
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from modules.tasks.tools import TasksTools
+from modules.tasks import codec
+from modules.tasks.storage import FileLock, create_storage
 from config.settings import settings
 
 
@@ -42,8 +44,8 @@ async def diagnostico():
     
     if json_path.exists():
         print(f"   Tamanho: {json_path.stat().st_size} bytes")
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = codec.load_file(json_path)
+        print(f"   Formato: {codec.detect(json_path.read_bytes()[:len(codec.MAGIC)])}")
         print(f"   Tarefas no arquivo: {len(data.get('tasks', []))}")
         print(f"   Notas no arquivo: {len(data.get('notes', []))}")
         print(f"   Última atualização: {data.get('last_updated', 'N/A')}")
@@ -79,16 +81,14 @@ async def diagnostico():
     print()
     
     # 5. Verificar se foi salvo no arquivo
+    # A gravação é atômica (temporário + fsync + rename), então basta
+    # aguardar o lote pendente em vez de reler o arquivo inteiro
     print("💾 Verificando salvamento no arquivo...")
-    await asyncio.sleep(0.5)  # Pequeno delay
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    print(f"   Tarefas no arquivo agora: {len(data.get('tasks', []))}")
-    
-    # Mostrar última tarefa salva
-    if data.get('tasks'):
-        last_task = data['tasks'][-1]
-        print(f"   Última tarefa: #{last_task['id']} - {last_task['title']}")
+    await tasks_module.flush()
+    stat = json_path.stat() if json_path.exists() else None
+    print(f"   Gravação confirmada: {stat.st_size if stat else 0} bytes")
+    backup_path = getattr(tasks_module.storage, 'backup_path', None)
+    print(f"   Backup anterior: {bool(backup_path and backup_path.exists())}")
     print()
     
     # 6. Teste de reload
@@ -129,26 +129,34 @@ async def corrigir():
     print("="*70)
     print()
     
-    # 1. Carregar do arquivo
+    # 1. Carregar pelo backend configurado: ele reaplica o journal e abre a
+    # geração do arquivo de conteúdo a que content_ref se refere (e o seq)
     json_path = Path(settings.TASKS_DB_PATH)
-    if not json_path.exists():
-        print("❌ Arquivo tasks.json não encontrado!")
-        return
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"📂 Arquivo: {json_path}")
-    print(f"   Tarefas: {len(data.get('tasks', []))}")
-    print(f"   Notas: {len(data.get('notes', []))}")
-    print()
-    
-    # 2. Forçar atualização do timestamp
-    from datetime import datetime
-    data['last_updated'] = datetime.now().isoformat()
-    
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    storage = create_storage(
+        settings.TASKS_STORAGE,
+        json_path,
+        compact_every=settings.TASKS_JOURNAL_COMPACT_OPS,
+        fmt=settings.TASKS_DB_FORMAT
+    )
+    # Leitura e regravação sob o mesmo lock de arquivo: nenhum outro
+    # processo grava entre as duas
+    lock = storage.lock if isinstance(storage.lock, FileLock) else contextlib.nullcontext()
+    try:
+        with lock:
+            data = storage.load()
+            if data is None:
+                print("❌ Banco de tarefas não encontrado!")
+                return
+            
+            print(f"📂 Arquivo: {json_path}")
+            print(f"   Tarefas: {len(data.get('tasks', []))}")
+            print(f"   Notas: {len(data.get('notes', []))}")
+            print()
+            
+            # 2. Forçar atualização do timestamp (gravação atômica, seq seguinte)
+            storage.write_snapshot(data)
+    finally:
+        storage.close()
     
     print("✅ Arquivo atualizado com timestamp atual")
     print("✅ Reinicie o API Server para aplicar mudanças")
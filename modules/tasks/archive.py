@@ -0,0 +1,162 @@
+"""
+🗄️ Arquivo de tarefas concluídas antigas (camada fria).
+
+Tarefas concluídas há mais de ``TASKS_ARCHIVE_DAYS`` dias saem do banco
+principal e vão para segmentos imutáveis, um por mês de conclusão e por
+rodada de arquivamento, no diretório ``<banco>.archive/``. Um manifesto
+pequeno guarda as contagens de cada segmento, para que estatísticas e
+paginação não precisem abrir os segmentos; eles só são lidos quando uma
+consulta chega às tarefas concluídas.
+
+Segmentos nunca são regravados: uma tarefa arquivada deletada vira uma
+marca (``removed``) no manifesto, que desconta as contagens do segmento.
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules.tasks import codec
+from modules.tasks.index import PRIORITY_RANK
+from modules.tasks.storage import atomic_write, file_signature
+
+
+class ArchiveStore:
+    """Segmentos de tarefas arquivadas e seu manifesto."""
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, db_path: Path, fmt: str = 'json'):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = Path(db_path).with_name(Path(db_path).name + '.archive')
+        self.manifest_path = self.directory / self.MANIFEST
+        self.fmt = fmt
+        self.segments: List[Dict[str, Any]] = []
+        self._signature = None
+
+    def refresh(self) -> bool:
+        """
+        Relê o manifesto do disco.
+
+        Returns:
+            True se a lista de segmentos mudou desde a última leitura
+        """
+        signature = file_signature(self.manifest_path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        segments = []
+        if signature is not None:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    segments = json.load(f).get('segments', [])
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Manifesto do arquivo ilegível: {e}")
+                return False
+
+        changed = segments != self.segments
+        self.segments = segments
+        return changed
+
+    def count(self, rank: Optional[int] = None) -> int:
+        """Número de tarefas arquivadas (opcionalmente de uma prioridade)."""
+        if rank is None:
+            return sum(seg['count'] for seg in self.segments)
+        return sum(seg['by_rank'][rank] for seg in self.segments)
+
+    def write(self, tasks: List[Dict[str, Any]]) -> List[str]:
+        """
+        Grava tarefas concluídas em novos segmentos, agrupadas por mês.
+
+        Os segmentos são gravados antes do manifesto; se o processo cair no
+        meio, o segmento órfão é ignorado e as tarefas seguem no banco.
+
+        Args:
+            tasks: Tarefas no formato JSON, todas com ``completed_at``
+
+        Returns:
+            Nomes dos segmentos criados
+        """
+        if not tasks:
+            return []
+
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for task in tasks:
+            by_month.setdefault(task['completed_at'][:7], []).append(task)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.refresh()  # não perder segmentos criados por outro processo
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        created = []
+        for month, items in sorted(by_month.items()):
+            name = f"{month}.{stamp}.seg"
+            atomic_write(self.directory / name, codec.dumps({'tasks': items, 'notes': []}, self.fmt))
+
+            by_rank = [0] * len(PRIORITY_RANK)
+            for task in items:
+                by_rank[PRIORITY_RANK.get(task.get('priority'), 1)] += 1
+            created.append({'file': name, 'month': month, 'count': len(items), 'by_rank': by_rank})
+
+        self._write_manifest(self.segments + created)
+        return [seg['file'] for seg in created]
+
+    def remove(self, tasks: List[Dict[str, Any]]) -> int:
+        """
+        Marca tarefas arquivadas como removidas no manifesto.
+
+        Só os segmentos do mês de conclusão de cada tarefa são lidos. Como
+        ``write``, deve ser chamado sob o lock do banco.
+
+        Args:
+            tasks: Tarefas arquivadas no formato JSON, com ``completed_at``
+
+        Returns:
+            Número de tarefas removidas
+        """
+        self.refresh()  # não perder segmentos criados por outro processo
+        ids = {task['id'] for task in tasks}
+        months = {task['completed_at'][:7] for task in tasks}
+
+        removed = 0
+        segments = []
+        for seg in self.segments:
+            gone = set(seg.get('removed', ()))
+            hits = [task for task in self._read(seg) if task['id'] in ids and task['id'] not in gone] \
+                if seg['month'] in months else []
+            if hits:
+                by_rank = list(seg['by_rank'])
+                for task in hits:
+                    by_rank[PRIORITY_RANK.get(task.get('priority'), 1)] -= 1
+                seg = dict(seg, count=seg['count'] - len(hits), by_rank=by_rank,
+                           removed=sorted(gone | {task['id'] for task in hits}))
+                removed += len(hits)
+            segments.append(seg)
+
+        if removed:
+            self._write_manifest(segments)
+        return removed
+
+    def _write_manifest(self, segments: List[Dict[str, Any]]):
+        atomic_write(self.manifest_path,
+                     json.dumps({'segments': segments}, indent=2, ensure_ascii=False))
+        self.segments = segments
+        self._signature = file_signature(self.manifest_path)
+
+    def _read(self, seg: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Tarefas gravadas no segmento, inclusive as marcadas como removidas."""
+        try:
+            return codec.load_file(self.directory / seg['file'])['tasks']
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Segmento {seg['file']} ilegível: {e}")
+            return []
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Lê todas as tarefas arquivadas, dos segmentos listados no manifesto."""
+        tasks = []
+        for seg in self.segments:
+            gone = set(seg.get('removed', ()))
+            tasks.extend(task for task in self._read(seg) if task['id'] not in gone)
+        return tasks
@@ -0,0 +1,110 @@
+"""
+📦 Formatos de arquivo do banco de tarefas.
+
+``json`` é o snapshot legível (indentado). ``binary`` é uma sequência de
+seções com prefixo de tamanho, depois de um cabeçalho fixo:
+
+    MAGIC (8 bytes) | versão (u16)
+    tipo (1 byte) | tamanho (u32) | payload   ... repetido
+
+A seção ``H`` carrega os metadados (próximos ids, última atualização),
+``T`` a lista de tarefas e ``N`` a de notas, em JSON compacto: sem a
+indentação, a serialização usa o codificador em C e o arquivo encolhe.
+O formato é detectado pelos primeiros bytes do arquivo, então a leitura
+aceita qualquer um dos dois.
+"""
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict
+
+FORMATS = ('json', 'binary')
+
+MAGIC = b'TASKSDB\x00'
+FORMAT_VERSION = 1
+
+_VERSION = struct.Struct('<H')
+_SECTION = struct.Struct('<cI')
+_HEADER_SIZE = len(MAGIC) + _VERSION.size
+
+
+def _compact(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(data: Dict[str, Any], fmt: str = 'json') -> bytes:
+    """
+    Serializa um snapshot no formato pedido.
+
+    Args:
+        data: Snapshot no formato do banco (tasks, notes, next_*_id, ...)
+        fmt: 'json' ou 'binary'
+
+    Returns:
+        Conteúdo completo do arquivo
+    """
+    if fmt != 'binary':
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+    meta = {k: v for k, v in data.items() if k not in ('tasks', 'notes')}
+    parts = [MAGIC, _VERSION.pack(FORMAT_VERSION)]
+    for kind, value in ((b'H', meta), (b'T', data.get('tasks', [])), (b'N', data.get('notes', []))):
+        payload = _compact(value)
+        parts.append(_SECTION.pack(kind, len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def detect(raw: bytes) -> str:
+    """Retorna o formato ('json' ou 'binary') de um conteúdo lido do disco."""
+    return 'binary' if raw.startswith(MAGIC) else 'json'
+
+
+def loads(raw: bytes) -> Dict[str, Any]:
+    """
+    Lê um snapshot em qualquer dos formatos.
+
+    Raises:
+        ValueError: Se o conteúdo estiver truncado, corrompido ou em versão desconhecida
+    """
+    if detect(raw) == 'json':
+        data = json.loads(raw.decode('utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError("Snapshot não é um objeto JSON")
+        return data
+
+    if len(raw) < _HEADER_SIZE:
+        raise ValueError("Cabeçalho binário truncado")
+    version, = _VERSION.unpack_from(raw, len(MAGIC))
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Versão do formato binário não suportada: {version}")
+
+    data: Dict[str, Any] = {'tasks': [], 'notes': []}
+    view = memoryview(raw)
+    pos, end = _HEADER_SIZE, len(raw)
+    while pos < end:
+        if pos + _SECTION.size > end:
+            raise ValueError(f"Seção truncada no byte {pos}")
+        kind, size = _SECTION.unpack_from(raw, pos)
+        pos += _SECTION.size
+        if pos + size > end:
+            raise ValueError(f"Seção truncada no byte {pos}")
+        value = json.loads(view[pos:pos + size].tobytes())
+        pos += size
+
+        if kind == b'T':
+            data['tasks'].extend(value)
+        elif kind == b'N':
+            data['notes'].extend(value)
+        elif kind == b'H':
+            data.update(value)
+        else:
+            raise ValueError(f"Tipo de seção desconhecido: {kind!r}")
+    return data
+
+
+def load_file(path: Path) -> Dict[str, Any]:
+    """Lê um snapshot do disco, detectando o formato."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
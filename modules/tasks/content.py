@@ -0,0 +1,204 @@
+"""
+📚 Corpos das notas fora do snapshot.
+
+O conteúdo das notas fica num arquivo append-only ao lado do banco
+(``<banco>.notes``); o snapshot e o journal guardam só ``content_ref``
+(offset e tamanho em bytes). Na leitura o arquivo é mapeado em memória
+(``mmap``) e cada corpo é decodificado quando alguém pede, então o tempo
+de carga e a memória residente crescem com o número de notas, não com o
+tamanho delas.
+
+Corpos de notas apagadas continuam no arquivo até a compactação, que
+reescreve só os vivos numa nova geração (``<banco>.notes.1``, ``.2``, ...).
+A geração anterior é mantida, porque o ``.bak`` do snapshot ainda aponta
+para ela.
+"""
+
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ContentFile:
+    """Uma geração do arquivo de conteúdo, mapeada sob demanda."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def _mapped(self, end: int) -> mmap.mmap:
+        """Mapa cobrindo até ``end``, remapeando se o arquivo cresceu."""
+        current = self._map
+        if current is not None and len(current) >= end:
+            return current
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                with open(self.path, 'rb') as f:
+                    # O mapa anterior não é fechado: outra thread pode estar lendo dele
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._map) < end:
+                raise ValueError(f"Referência além do fim de {self.path.name}: {end}")
+            return self._map
+
+    def raw(self, offset: int, length: int) -> bytes:
+        """Bytes de um corpo, sem decodificar."""
+        if length <= 0:
+            return b''
+        return self._mapped(offset + length)[offset:offset + length]
+
+    def read(self, offset: int, length: int, limit: Optional[int] = None) -> str:
+        """
+        Lê um corpo do arquivo.
+
+        Args:
+            offset: Posição em bytes
+            length: Tamanho em bytes
+            limit: Se informado, lê só o suficiente para esse número de caracteres
+
+        Returns:
+            Texto do corpo (ou o seu começo, com ``limit``)
+        """
+        if length <= 0:
+            return ""
+        if limit is not None and limit * 4 < length:
+            # UTF-8 tem até 4 bytes por caractere; um corte no meio de um é descartado
+            raw = self._mapped(offset + length)[offset:offset + limit * 4]
+            return raw.decode('utf-8', errors='ignore')[:limit]
+        return self.raw(offset, length).decode('utf-8')
+
+
+class ContentStore:
+    """
+    Arquivo de conteúdo das notas de um banco.
+
+    As gravações acontecem sob o lock do backend; ``sync`` deve ser chamado
+    antes de gravar o snapshot ou o journal que referencia os corpos novos.
+    """
+
+    COMPACT_MIN_BYTES = 1 << 20
+
+    def __init__(self, db_path: Path):
+        db_path = Path(db_path)
+        self.directory = db_path.parent
+        self.prefix = db_path.name + '.notes'
+        self.name = self.prefix
+        self.current = ContentFile(self.directory / self.name)
+        self._append = None
+        # id -> (texto, referência) dos corpos já gravados nesta geração,
+        # para que cada snapshot não volte a anexar as notas criadas em memória
+        self._known: Dict[int, Tuple[str, List[int]]] = {}
+
+    @property
+    def path(self) -> Path:
+        return self.directory / self.name
+
+    def open(self, name: Optional[str]):
+        """Passa a usar a geração indicada no snapshot (a inicial, se nenhuma)."""
+        name = name or self.prefix
+        if name == self.name:
+            return
+        self._close_append()
+        self.name = name
+        self.current = ContentFile(self.path)
+        self._known.clear()
+
+    def size(self) -> int:
+        """Tamanho atual do arquivo em bytes."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def put(self, note_id: int, text: str) -> List[int]:
+        """
+        Anexa o corpo de uma nota (se ainda não estiver no arquivo).
+
+        Returns:
+            Referência [offset, tamanho] em bytes
+        """
+        known = self._known.get(note_id)
+        if known is not None and known[0] == text:
+            return known[1]
+
+        raw = text.encode('utf-8')
+        if self._append is None:
+            self._append = open(self.path, 'ab')
+        offset = self._append.seek(0, os.SEEK_END)
+        self._append.write(raw)
+        ref = [offset, len(raw)]
+        self._known[note_id] = (text, ref)
+        return ref
+
+    def sync(self):
+        """Torna persistentes os corpos anexados."""
+        if self._append is not None:
+            self._append.flush()
+            os.fsync(self._append.fileno())
+
+    def externalize(self, note: Dict[str, Any]) -> Dict[str, Any]:
+        """Troca ``content`` por ``content_ref`` numa nota no formato JSON."""
+        if 'content' not in note:
+            return note
+        note = dict(note)
+        note['content_ref'] = self.put(note['id'], note.pop('content'))
+        return note
+
+    def resolve(self, note: Dict[str, Any]) -> Dict[str, Any]:
+        """Troca ``content_ref`` pelo texto (para exportar a outro backend)."""
+        if 'content_ref' not in note:
+            return note
+        note = dict(note)
+        note['content'] = self.current.read(*note.pop('content_ref'))
+        return note
+
+    def needs_compaction(self, notes: List[Dict[str, Any]]) -> bool:
+        """Indica se os corpos mortos passam do tamanho dos vivos (e de 1 MiB)."""
+        live = sum(n['content_ref'][1] for n in notes if 'content_ref' in n)
+        return self.size() - live > max(live, self.COMPACT_MIN_BYTES)
+
+    def compact(self, notes: List[Dict[str, Any]]):
+        """
+        Copia os corpos vivos para uma nova geração e atualiza as referências.
+
+        As notas são alteradas no lugar; o snapshot que as contém precisa ser
+        gravado em seguida (com ``content_file`` apontando para a geração nova).
+        """
+        source = self.current
+        generation = int(self.name.rsplit('.', 1)[1]) + 1 if self.name != self.prefix else 1
+        name = f"{self.prefix}.{generation}"
+        with open(self.directory / name, 'wb') as f:
+            for note in notes:
+                if 'content_ref' not in note:
+                    continue
+                offset, length = note['content_ref']
+                start = f.tell()
+                f.write(source.raw(offset, length))
+                note['content_ref'] = [start, length]
+            f.flush()
+            os.fsync(f.fileno())
+
+        previous = self.name
+        self.open(name)
+        self._remove_generations(keep=(previous, name))
+
+    def _remove_generations(self, keep: Tuple[str, ...]):
+        """Apaga gerações que nem o snapshot nem o backup referenciam."""
+        for path in self.directory.glob(self.prefix + '*'):
+            if path.name in keep or not (path.name == self.prefix or path.suffix[1:].isdigit()):
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                pass  # ainda mapeado no Windows; sai na próxima compactação
+
+    def _close_append(self):
+        if self._append is not None:
+            self._append.close()
+            self._append = None
+
+    def close(self):
+        """Fecha o arquivo de gravação."""
+        self._close_append()
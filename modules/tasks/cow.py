@@ -0,0 +1,367 @@
+"""
+🧊 Estruturas com cópia sob escrita, para publicar versões sem copiar tudo.
+
+Mapas e listas ordenadas guardam o conteúdo em blocos. ``copy()`` duplica só
+a tabela de blocos (O(n / tamanho do bloco)) e os blocos passam a ser
+compartilhados com a cópia; a primeira escrita seguinte num bloco copia
+apenas aquele bloco. Quem tem a cópia nunca vê as escritas posteriores.
+
+Cada bloco, e cada estrutura guardada como valor de outra, leva a época em
+que foi criado. ``copy()`` avança a época: o que existia antes dela só é
+alterado depois de copiado. As escritas numa mesma estrutura precisam ser
+serializadas (no módulo de tarefas, pelo lock de escrita).
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import ItemsView, KeysView, MutableMapping, MutableSet, ValuesView
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+_epoch = 0
+_epoch_lock = threading.Lock()
+
+# Chaves inteiras: blocos de 2 ** _CHUNK_BITS ids consecutivos; demais: _SLOTS blocos pelo hash
+_CHUNK_BITS = 8
+_SLOTS = 1024
+
+
+def publish():
+    """Avança a época: blocos existentes passam a ser copiados antes de alterados."""
+    global _epoch
+    with _epoch_lock:
+        _epoch += 1
+
+
+class CowMap(MutableMapping):
+    """
+    Dicionário em blocos, com cópia O(blocos).
+
+    Chaves inteiras (ids) ficam em blocos de ids consecutivos, e a iteração
+    segue a ordem dos ids; as demais são distribuídas pelo hash.
+    """
+
+    __slots__ = ('epoch', '_chunks', '_len')
+
+    def __init__(self, items: Iterable[Tuple[Hashable, Any]] = ()):
+        self.epoch = _epoch
+        self._chunks: Dict[int, Tuple[int, Dict[Hashable, Any]]] = {}  # bloco -> (época, itens)
+        self._len = 0
+        for key, value in items:
+            self[key] = value
+
+    def _writable(self, slot: int) -> Dict[Hashable, Any]:
+        """Bloco pronto para alteração (copiado se for de uma época anterior)."""
+        chunk = self._chunks.get(slot)
+        if chunk is not None and chunk[0] == _epoch:
+            return chunk[1]
+        items = dict(chunk[1]) if chunk is not None else {}
+        self._chunks[slot] = (_epoch, items)
+        return items
+
+    def _blocks(self) -> Iterator[Dict[Hashable, Any]]:
+        for slot in sorted(self._chunks):
+            yield self._chunks[slot][1]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for items in self._blocks():
+            yield from items
+
+    def __contains__(self, key: Hashable) -> bool:
+        chunk = self._chunks.get(key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS)
+        return chunk is not None and key in chunk[1]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        chunk = self._chunks.get(key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS)
+        if chunk is None or key not in chunk[1]:
+            raise KeyError(key)
+        return chunk[1][key]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        chunk = self._chunks.get(key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS)
+        return default if chunk is None else chunk[1].get(key, default)
+
+    def __setitem__(self, key: Hashable, value: Any):
+        slot = key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS
+        chunk = self._chunks.get(slot)
+        if chunk is not None and chunk[0] == _epoch:
+            items = chunk[1]
+        else:
+            items = self._writable(slot)
+        if key not in items:
+            self._len += 1
+        items[key] = value
+
+    def __delitem__(self, key: Hashable):
+        self.pop(key)
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        slot = key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS
+        chunk = self._chunks.get(slot)
+        if chunk is None or key not in chunk[1]:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        items = chunk[1] if chunk[0] == _epoch else self._writable(slot)
+        value = items.pop(key)
+        self._len -= 1
+        if not items:
+            del self._chunks[slot]
+        return value
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        return _Values(self)
+
+    def items(self) -> ItemsView:
+        return _Items(self)
+
+    def clear(self):
+        self._chunks = {}
+        self._len = 0
+
+    def copy(self) -> 'CowMap':
+        """Cópia que compartilha os blocos (nenhuma das duas vê as escritas da outra)."""
+        clone = self._share()
+        publish()
+        return clone
+
+    def _share(self) -> 'CowMap':
+        clone = CowMap.__new__(CowMap)
+        clone.epoch = _epoch
+        clone._chunks = dict(self._chunks)
+        clone._len = self._len
+        return clone
+
+    def writable(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Estrutura aninhada guardada na chave, pronta para alteração.
+
+        Args:
+            key: Chave do valor
+            factory: Cria o valor (CowMap, CowSortedList...) se a chave não existe
+
+        Returns:
+            O valor, copiado antes se ainda é compartilhado com uma cópia
+        """
+        chunk = self._chunks.get(key >> _CHUNK_BITS if type(key) is int else hash(key) % _SLOTS)
+        value = chunk[1].get(key) if chunk is not None else None
+        if value is not None and value.epoch == _epoch:
+            return value
+        value = value._share() if value is not None else factory()
+        self[key] = value
+        return value
+
+    def __repr__(self) -> str:
+        return f"CowMap({dict(self.items())!r})"
+
+
+class _Values(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Any]:
+        for items in self._mapping._blocks():
+            yield from items.values()
+
+
+class _Items(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Any]]:
+        for items in self._mapping._blocks():
+            yield from items.items()
+
+
+class CowSet(MutableSet):
+    """Conjunto com cópia O(blocos), sobre um ``CowMap``."""
+
+    __slots__ = ('_map',)
+
+    def __init__(self, values: Iterable[Hashable] = ()):
+        self._map = CowMap((value, None) for value in values)
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._map)
+
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self._map
+
+    def add(self, value: Hashable):
+        if value not in self._map:
+            self._map[value] = None
+
+    def discard(self, value: Hashable):
+        if value in self._map:
+            del self._map[value]
+
+    def clear(self):
+        self._map.clear()
+
+    def copy(self) -> 'CowSet':
+        """Cópia que compartilha os blocos."""
+        clone = CowSet.__new__(CowSet)
+        clone._map = self._map.copy()
+        return clone
+
+
+class CowSortedList:
+    """
+    Lista ordenada em blocos de até ``2 * LOAD`` valores, com cópia O(blocos).
+
+    Inclusão e remoção custam O(bloco); posições são contadas somando o
+    tamanho dos blocos anteriores.
+    """
+
+    __slots__ = ('epoch', '_lists', '_maxes', '_len')
+
+    LOAD = 256
+
+    def __init__(self, values: Iterable[Any] = ()):
+        self.epoch = _epoch
+        self._lists: List[Tuple[int, List[Any]]] = []  # (época, valores ordenados)
+        self._maxes: List[Any] = []                    # maior valor de cada bloco
+        self._len = 0
+        for value in sorted(values):
+            self.add(value)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, values in self._lists:
+            yield from values
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        pos, offset = self._locate(index)
+        return self._lists[pos][1][offset]
+
+    def __contains__(self, value: Any) -> bool:
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        values = self._lists[pos][1]
+        return values[bisect_left(values, value)] == value
+
+    def _writable(self, pos: int) -> List[Any]:
+        """Bloco pronto para alteração (copiado se for de uma época anterior)."""
+        stamp, values = self._lists[pos]
+        if stamp != _epoch:
+            values = list(values)
+            self._lists[pos] = (_epoch, values)
+        return values
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Bloco e posição dentro dele de uma posição global (fim: após o último)."""
+        for pos, (_, values) in enumerate(self._lists):
+            if index < len(values):
+                return pos, index
+            index -= len(values)
+        return len(self._lists), 0
+
+    def add(self, value: Any):
+        """Inclui o valor na posição ordenada."""
+        if not self._lists:
+            self._lists.append((_epoch, [value]))
+            self._maxes.append(value)
+            self._len = 1
+            return
+
+        pos = min(bisect_left(self._maxes, value), len(self._maxes) - 1)
+        values = self._writable(pos)
+        if values[-1] < value:
+            values.append(value)  # caso comum: maior que todos do bloco
+        else:
+            insort(values, value)
+        self._maxes[pos] = values[-1]
+        self._len += 1
+
+        if len(values) > 2 * self.LOAD:
+            self._lists[pos:pos + 1] = [(_epoch, values[:self.LOAD]), (_epoch, values[self.LOAD:])]
+            self._maxes[pos:pos + 1] = [values[self.LOAD - 1], values[-1]]
+
+    def discard(self, value: Any):
+        """Remove o valor, se presente."""
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return
+        offset = bisect_left(self._lists[pos][1], value)
+        if self._lists[pos][1][offset] != value:
+            return
+
+        values = self._writable(pos)
+        del values[offset]
+        self._len -= 1
+        if values:
+            self._maxes[pos] = values[-1]
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+
+    def clear(self):
+        self._lists = []
+        self._maxes = []
+        self._len = 0
+
+    def copy(self) -> 'CowSortedList':
+        """Cópia que compartilha os blocos (nenhuma das duas vê as escritas da outra)."""
+        clone = self._share()
+        publish()
+        return clone
+
+    def _share(self) -> 'CowSortedList':
+        clone = CowSortedList.__new__(CowSortedList)
+        clone.epoch = _epoch
+        clone._lists = list(self._lists)
+        clone._maxes = list(self._maxes)
+        clone._len = self._len
+        return clone
+
+    def _bisect(self, value: Any, find: Callable) -> int:
+        pos = find(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        before = sum(len(values) for _, values in self._lists[:pos])
+        return before + find(self._lists[pos][1], value)
+
+    def bisect_left(self, value: Any) -> int:
+        """Posição onde o valor entraria, antes de valores iguais."""
+        return self._bisect(value, bisect_left)
+
+    def bisect_right(self, value: Any) -> int:
+        """Posição onde o valor entraria, depois de valores iguais."""
+        return self._bisect(value, bisect_right)
+
+    def iter_from(self, index: int = 0) -> Iterator[Any]:
+        """Percorre os valores em ordem crescente a partir da posição."""
+        pos, offset = self._locate(index)
+        for _, values in self._lists[pos:]:
+            for i in range(offset, len(values)):
+                yield values[i]
+            offset = 0
+
+    def iter_before(self, index: Optional[int] = None) -> Iterator[Any]:
+        """Percorre os valores em ordem decrescente, começando antes da posição."""
+        if index is None or index >= self._len:
+            pos, offset = len(self._lists) - 1, len(self._lists[-1][1]) if self._lists else 0
+        else:
+            pos, offset = self._locate(index)
+        for p in range(pos, -1, -1):
+            values = self._lists[p][1]
+            for i in range(offset - 1, -1, -1):
+                yield values[i]
+            if p:
+                offset = len(self._lists[p - 1][1])
+
+    def __repr__(self) -> str:
+        return f"CowSortedList({list(self)!r})"
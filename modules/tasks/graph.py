@@ -0,0 +1,213 @@
+"""
+🕸️ Dependências entre tarefas.
+
+Duas relações formam o grafo: "bloqueada por" (``blocked_by``) e
+subtarefa (``parent_id``). Nas duas, uma tarefa espera outra: a bloqueada
+espera a bloqueadora, e a tarefa-mãe espera cada subtarefa.
+
+O grafo guarda, para cada tarefa, quantas das tarefas que ela espera
+ainda estão abertas. A contagem é refeita só para os vizinhos de quem
+mudou, então saber o que está pronto não exige ordenação topológica.
+
+Os mapas têm cópia sob escrita e os conjuntos de vizinhos são imutáveis
+(substituídos a cada mudança), então ``copy()`` não percorre o grafo.
+"""
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from modules.tasks.cow import CowMap
+
+IsOpen = Callable[[int], bool]
+
+
+class DependencyGraph:
+    """Relações de espera entre tarefas, com contagem incremental de bloqueios."""
+
+    def __init__(self, is_open: IsOpen):
+        self.is_open = is_open
+        self.blocked_by: CowMap = CowMap()  # tarefa -> bloqueadoras explícitas (frozenset)
+        self.blocks: CowMap = CowMap()      # bloqueadora -> tarefas bloqueadas (frozenset)
+        self.parent: CowMap = CowMap()      # subtarefa -> mãe
+        self.children: CowMap = CowMap()    # mãe -> subtarefas (frozenset)
+        self.waiting: CowMap = CowMap()     # tarefa -> esperas ainda abertas (só > 0)
+
+    def copy(self, is_open: IsOpen) -> 'DependencyGraph':
+        """Cópia independente, consultando outro conjunto de tarefas."""
+        clone = DependencyGraph(is_open)
+        clone.blocked_by = self.blocked_by.copy()
+        clone.blocks = self.blocks.copy()
+        clone.parent = self.parent.copy()
+        clone.children = self.children.copy()
+        clone.waiting = self.waiting.copy()
+        return clone
+
+    def clear(self):
+        """Esvazia o grafo."""
+        self.blocked_by.clear()
+        self.blocks.clear()
+        self.parent.clear()
+        self.children.clear()
+        self.waiting.clear()
+
+    def waits_for(self, task_id: int) -> FrozenSet[int]:
+        """Tarefas que precisam terminar antes desta (bloqueadoras e subtarefas)."""
+        return self.blocked_by.get(task_id, frozenset()) | self.children.get(task_id, frozenset())
+
+    def waited_by(self, task_id: int) -> Set[int]:
+        """Tarefas que esperam esta (bloqueadas por ela e a mãe)."""
+        waiting = set(self.blocks.get(task_id, ()))
+        if task_id in self.parent:
+            waiting.add(self.parent[task_id])
+        return waiting
+
+    def is_blocked(self, task_id: int) -> bool:
+        """Indica se a tarefa ainda espera alguma tarefa aberta."""
+        return task_id in self.waiting
+
+    def recount(self, task_id: int):
+        """Refaz a contagem de esperas abertas de uma tarefa."""
+        count = sum(1 for other in self.waits_for(task_id) if self.is_open(other))
+        if count:
+            self.waiting[task_id] = count
+        else:
+            self.waiting.pop(task_id, None)
+
+    def set_relations(self, task_id: int, blocked_by: Iterable[int],
+                      parent_id: Optional[int]) -> Set[int]:
+        """
+        Substitui as relações de uma tarefa (a partir do registro dela).
+
+        Returns:
+            Tarefas cuja contagem mudou (a própria e a mãe, antiga ou nova)
+        """
+        changed = {task_id}
+        for blocker in self.blocked_by.pop(task_id, ()):
+            self._unlink(self.blocks, blocker, task_id)
+        blocked_by = frozenset(blocked_by) - {task_id}
+        if blocked_by:
+            self.blocked_by[task_id] = blocked_by
+            for blocker in blocked_by:
+                self._link(self.blocks, blocker, task_id)
+
+        old_parent = self.parent.pop(task_id, None)
+        if old_parent is not None:
+            self._unlink(self.children, old_parent, task_id)
+            changed.add(old_parent)
+        if parent_id is not None and parent_id != task_id:
+            self.parent[task_id] = parent_id
+            self._link(self.children, parent_id, task_id)
+            changed.add(parent_id)
+
+        for other in changed:
+            self.recount(other)
+        return changed
+
+    def remove(self, task_id: int) -> Set[int]:
+        """
+        Tira do grafo as relações que partem da tarefa (que deixou de existir).
+
+        Quem esperava por ela continua com a aresta, que deixa de contar por
+        a tarefa não estar mais aberta.
+
+        Returns:
+            Tarefas cuja contagem mudou
+        """
+        changed = self.set_relations(task_id, (), None) - {task_id}
+        self.waiting.pop(task_id, None)
+        return changed | self.status_changed(task_id)
+
+    def status_changed(self, task_id: int) -> Set[int]:
+        """
+        Atualiza quem espera a tarefa, depois que ela foi concluída ou reaberta.
+
+        Returns:
+            Tarefas cuja contagem foi refeita
+        """
+        waiting = self.waited_by(task_id)
+        for other in waiting:
+            self.recount(other)
+        return waiting
+
+    def _open_waits(self, task_id: int) -> List[int]:
+        return sorted(other for other in self.waits_for(task_id) if self.is_open(other))
+
+    def _link(self, index: CowMap, key: int, value: int):
+        index[key] = index.get(key, frozenset()) | {value}
+
+    def _unlink(self, index: CowMap, key: int, value: int):
+        values = index.get(key)
+        if values is not None:
+            values = values - {value}
+            if values:
+                index[key] = values
+            else:
+                del index[key]
+
+    def find_path(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Caminho de esperas de ``start`` até ``goal`` (start espera ... espera goal).
+
+        Returns:
+            Ids do caminho, ou None se ``start`` não depende de ``goal``
+        """
+        previous: Dict[int, int] = {start: start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node == goal:
+                path = [node]
+                while node != start:
+                    node = previous[node]
+                    path.append(node)
+                return path[::-1]
+            for other in self.waits_for(node):
+                if other not in previous:
+                    previous[other] = node
+                    stack.append(other)
+        return None
+
+    def critical_path(self, target: Optional[int] = None) -> List[int]:
+        """
+        Maior cadeia de tarefas abertas que precisam ser feitas em sequência.
+
+        Args:
+            target: Se informado, a maior cadeia que termina nesta tarefa
+
+        Returns:
+            Ids na ordem de execução (a primeira não espera ninguém aberto)
+        """
+        # id -> (tamanho da maior cadeia que termina nele, próxima tarefa voltando na cadeia)
+        best: Dict[int, Tuple[int, Optional[int]]] = {}
+        if target is not None:
+            starts = [target] if self.is_open(target) else []
+        else:
+            nodes = set(self.blocked_by) | set(self.blocks) | set(self.parent) | set(self.children)
+            starts = sorted(node for node in nodes if self.is_open(node))
+
+        for start in starts:
+            if start in best:
+                continue
+            # DFS iterativa; quem está no caminho atual é ignorado (ciclo vindo de fora)
+            in_path = {start}
+            stack = [(start, iter(self._open_waits(start)))]
+            while stack:
+                node, pending = stack[-1]
+                for other in pending:
+                    if other not in best and other not in in_path:
+                        in_path.add(other)
+                        stack.append((other, iter(self._open_waits(other))))
+                        break
+                else:
+                    stack.pop()
+                    in_path.discard(node)
+                    before = [other for other in self._open_waits(node) if other in best]
+                    longest = max(before, key=lambda other: (best[other][0], -other), default=None)
+                    best[node] = (best[longest][0] + 1, longest) if longest is not None else (1, None)
+
+        if not starts:
+            return []
+        end = max(starts, key=lambda node: (best[node][0], -node))
+        path = [end]
+        while best[path[-1]][1] is not None:
+            path.append(best[path[-1]][1])
+        return path[::-1]
@@ -0,0 +1,481 @@
+"""
+🔎 Índices em memória do módulo de tarefas.
+
+Os índices guardam tudo em estruturas com cópia sob escrita (``cow``):
+``copy()`` custa O(blocos) e as escritas seguintes copiam só o que mudam.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from itertools import islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from modules.tasks.cow import CowMap, CowSortedList
+
+_TOKEN_RE = re.compile(r'\w+')
+
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+
+def fold(text: str) -> str:
+    """
+    Normaliza texto para comparação: minúsculas e sem acentos.
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto normalizado ("Reunião" -> "reuniao")
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide o texto normalizado em palavras."""
+    return _TOKEN_RE.findall(fold(text))
+
+
+class TextIndex:
+    """
+    Índice invertido termo -> documentos, atualizado incrementalmente.
+
+    Cada campo indexado tem um peso; a relevância de um documento é a soma,
+    por termo da consulta, do peso dos campos onde o termo aparece vezes o
+    IDF do termo. Termos da consulta casam por prefixo, com bônus para a
+    palavra exata.
+    """
+
+    PREFIX_FACTOR = 0.5
+
+    def __init__(self):
+        self.postings: CowMap = CowMap()   # termo -> CowMap doc -> peso
+        self.doc_terms: CowMap = CowMap()  # doc -> {termo: peso}, substituído a cada reindexação
+        self.terms = CowSortedList()       # vocabulário ordenado, para busca por prefixo
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: int, fields: Iterable[Tuple[str, float]]):
+        """
+        Indexa (ou reindexa) um documento.
+
+        Args:
+            doc_id: Identificador do documento
+            fields: Pares (texto, peso) de cada campo indexado
+        """
+        self.remove(doc_id)
+
+        weights: Dict[str, float] = {}
+        for text, weight in fields:
+            for term in tokenize(text or ''):
+                weights[term] = weights.get(term, 0.0) + weight
+
+        for term, weight in weights.items():
+            posting = self.postings.writable(term, CowMap)
+            if not posting:
+                self.terms.add(term)  # termo novo (postings vazias são removidas)
+            posting[doc_id] = weight
+        self.doc_terms[doc_id] = weights
+
+    def remove(self, doc_id: int):
+        """Remove um documento do índice, se presente."""
+        weights = self.doc_terms.pop(doc_id, None)
+        if not weights:
+            return
+
+        for term in weights:
+            posting = self.postings.writable(term, CowMap)
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+                self.terms.discard(term)
+
+    def clear(self):
+        """Esvazia o índice."""
+        self.postings.clear()
+        self.doc_terms.clear()
+        self.terms.clear()
+
+    def copy(self) -> 'TextIndex':
+        """Cópia independente (os blocos são compartilhados até a próxima escrita)."""
+        clone = self.__class__()
+        clone.postings = self.postings.copy()
+        clone.doc_terms = self.doc_terms.copy()
+        clone.terms = self.terms.copy()
+        return clone
+
+    def _expand(self, token: str) -> List[str]:
+        """Retorna os termos do vocabulário que começam com o token."""
+        found = []
+        for term in self.terms.iter_from(self.terms.bisect_left(token)):
+            if not term.startswith(token):
+                break
+            found.append(term)
+        return found
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Busca documentos que contenham todos os termos da consulta.
+
+        Args:
+            query: Texto da consulta
+
+        Returns:
+            Pares (doc_id, relevância), dos mais relevantes para os menos
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.doc_terms:
+            return []
+
+        total_docs = len(self.doc_terms)
+        per_token: List[Dict[int, float]] = []
+
+        for token in dict.fromkeys(tokens):
+            scores: Dict[int, float] = {}
+            for term in self._expand(token):
+                posting = self.postings[term]
+                idf = math.log(1 + total_docs / len(posting))
+                factor = idf if term == token else idf * self.PREFIX_FACTOR
+                for doc_id, weight in posting.items():
+                    score = weight * factor
+                    if score > scores.get(doc_id, 0.0):
+                        scores[doc_id] = score
+            if not scores:
+                return []
+            per_token.append(scores)
+
+        # Intersecção partindo do conjunto menor
+        per_token.sort(key=len)
+        results = per_token[0]
+        for scores in per_token[1:]:
+            results = {doc_id: score + scores[doc_id]
+                       for doc_id, score in results.items() if doc_id in scores}
+            if not results:
+                return []
+
+        return sorted(results.items(), key=lambda item: (-item[1], item[0]))
+
+
+class BM25Index(TextIndex):
+    """
+    Índice invertido com ranking BM25, para textos longos (notas).
+
+    Ao contrário de ``TextIndex``, a consulta usa semântica OU: cada termo
+    soma sua contribuição BM25, normalizada pelo tamanho do documento. O peso
+    dos campos multiplica a frequência do termo (título conta mais).
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        super().__init__()
+        self.doc_len: CowMap = CowMap()
+        self.total_len = 0.0
+
+    def add(self, doc_id: int, fields: Iterable[Tuple[str, float]]):
+        super().add(doc_id, fields)
+        length = sum(self.doc_terms[doc_id].values())
+        self.doc_len[doc_id] = length
+        self.total_len += length
+
+    def remove(self, doc_id: int):
+        super().remove(doc_id)
+        self.total_len -= self.doc_len.pop(doc_id, 0.0)
+
+    def clear(self):
+        super().clear()
+        self.doc_len.clear()
+        self.total_len = 0.0
+
+    def copy(self) -> 'BM25Index':
+        clone = super().copy()
+        clone.doc_len = self.doc_len.copy()
+        clone.total_len = self.total_len
+        return clone
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Busca documentos com qualquer termo da consulta, por relevância BM25.
+
+        Args:
+            query: Texto da consulta (termos casam por prefixo)
+            limit: Número máximo de resultados (None = todos)
+
+        Returns:
+            Pares (doc_id, relevância), dos mais relevantes para os menos
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.doc_terms:
+            return []
+
+        total_docs = len(self.doc_terms)
+        avg_len = self.total_len / total_docs or 1.0
+        scores: Dict[int, float] = {}
+
+        for token in dict.fromkeys(tokens):
+            best: Dict[int, float] = {}
+            for term in self._expand(token):
+                posting = self.postings[term]
+                df = len(posting)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                if term != token:
+                    idf *= self.PREFIX_FACTOR
+                for doc_id, tf in posting.items():
+                    norm = self.K1 * (1 - self.B + self.B * self.doc_len[doc_id] / avg_len)
+                    score = idf * tf * (self.K1 + 1) / (tf + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        key = lambda item: (-item[1], item[0])
+        if limit is not None and limit < len(scores):
+            return heapq.nsmallest(max(limit, 0), scores.items(), key=key)
+        return sorted(scores.items(), key=key)
+
+
+def snippet(text: str, query: str, width: int = 160) -> str:
+    """
+    Extrai o trecho do texto com mais termos da consulta.
+
+    Args:
+        text: Texto completo
+        query: Consulta (termos casam por prefixo, sem acentos)
+        width: Tamanho aproximado do trecho
+
+    Returns:
+        Trecho com reticências nas pontas cortadas
+    """
+    if len(text) <= width:
+        return text
+
+    tokens = set(tokenize(query))
+    hits = []
+    for match in _TOKEN_RE.finditer(text):
+        term = fold(match.group())
+        if any(term.startswith(token) for token in tokens):
+            hits.append((match.start(), term))
+    if not hits:
+        return text[:width].rstrip() + '...'
+
+    # Janela que começa em um acerto e cobre mais termos distintos
+    best_start, best_count, end = hits[0][0], 0, 0
+    for i, (start, _) in enumerate(hits):
+        while end < len(hits) and hits[end][0] < start + width:
+            end += 1
+        count = len({term for _, term in hits[i:end]})
+        if count > best_count:
+            best_start, best_count = start, count
+
+    start = max(0, min(best_start - width // 4, len(text) - width))
+    if start:
+        space = text.rfind(' ', 0, start + 1)
+        start = space + 1 if space >= 0 and start - space < 20 else start
+    excerpt = text[start:start + width].strip()
+    return ('...' if start else '') + excerpt + ('...' if start + width < len(text) else '')
+
+
+class BucketIndex:
+    """
+    Agrupa ids por chave, mantendo cada grupo ordenado por id.
+
+    Usado para a ordem de listagem (concluída, prioridade): os N primeiros
+    itens saem percorrendo os grupos na ordem das chaves, sem reordenar.
+    """
+
+    def __init__(self):
+        self.buckets: CowMap = CowMap()  # chave -> CowSortedList de ids
+        self.key_of: CowMap = CowMap()
+
+    def add(self, doc_id: int, key: Hashable):
+        """Inclui o id no grupo da chave, movendo-o se já estiver em outro."""
+        current = self.key_of.get(doc_id)
+        if current == key:
+            return
+        if current is not None:
+            self.remove(doc_id)
+
+        self.buckets.writable(key, CowSortedList).add(doc_id)
+        self.key_of[doc_id] = key
+
+    def remove(self, doc_id: int):
+        """Remove o id do índice, se presente."""
+        key = self.key_of.pop(doc_id, None)
+        if key is None:
+            return
+        self.buckets.writable(key, CowSortedList).discard(doc_id)
+
+    def clear(self):
+        """Esvazia o índice."""
+        self.buckets.clear()
+        self.key_of.clear()
+
+    def copy(self) -> 'BucketIndex':
+        """Cópia independente (os blocos são compartilhados até a próxima escrita)."""
+        clone = BucketIndex()
+        clone.buckets = self.buckets.copy()
+        clone.key_of = self.key_of.copy()
+        return clone
+
+    def count(self, key: Hashable) -> int:
+        """Número de ids no grupo da chave."""
+        return len(self.buckets.get(key, ()))
+
+    def iter_ids(self, keys: Iterable[Hashable],
+                 after: Optional[Tuple[Hashable, int]] = None) -> Iterator[int]:
+        """
+        Percorre os ids dos grupos informados, na ordem dada.
+
+        Args:
+            keys: Chaves dos grupos, em ordem crescente
+            after: Posição (chave, id) a partir da qual continuar, exclusiva
+        """
+        for key in keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            start = 0
+            if after is not None:
+                if key < after[0]:
+                    continue
+                if key == after[0]:
+                    start = bucket.bisect_right(after[1])
+            yield from bucket.iter_from(start)
+
+    def count_after(self, keys: Iterable[Hashable], after: Tuple[Hashable, int]) -> int:
+        """Número de ids posteriores à posição (chave, id) nos grupos dados."""
+        total = 0
+        for key in keys:
+            if key > after[0]:
+                total += self.count(key)
+            elif key == after[0] and key in self.buckets:
+                bucket = self.buckets[key]
+                total += len(bucket) - bucket.bisect_right(after[1])
+        return total
+
+
+class SortedIndex:
+    """Ids ordenados por uma chave (por exemplo, uma data), desempate por id."""
+
+    def __init__(self):
+        self.entries = CowSortedList()  # (chave, id)
+        self.key_of: CowMap = CowMap()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, doc_id: int, key: Any):
+        """Inclui o id com a chave, reposicionando-o se já existir."""
+        if doc_id in self.key_of:
+            if self.key_of[doc_id] == key:
+                return
+            self.remove(doc_id)
+
+        self.entries.add((key, doc_id))
+        self.key_of[doc_id] = key
+
+    def remove(self, doc_id: int):
+        """Remove o id do índice, se presente."""
+        if doc_id not in self.key_of:
+            return
+        self.entries.discard((self.key_of.pop(doc_id), doc_id))
+
+    def clear(self):
+        """Esvazia o índice."""
+        self.entries.clear()
+        self.key_of.clear()
+
+    def copy(self) -> 'SortedIndex':
+        """Cópia independente (os blocos são compartilhados até a próxima escrita)."""
+        clone = SortedIndex()
+        clone.entries = self.entries.copy()
+        clone.key_of = self.key_of.copy()
+        return clone
+
+    def iter_desc(self, before: Optional[Tuple[Any, int]] = None) -> Iterator[Tuple[Any, int]]:
+        """Percorre (chave, id) do maior para o menor, começando antes de ``before``."""
+        pos = self.entries.bisect_left(tuple(before)) if before is not None else None
+        yield from self.entries.iter_before(pos)
+
+    def count_before(self, entry: Tuple[Any, int]) -> int:
+        """Número de entradas menores que (chave, id)."""
+        return self.entries.bisect_left(tuple(entry))
+
+    def _bounds(self, low: Any, high: Any) -> Tuple[int, int]:
+        start = self.entries.bisect_left((low,)) if low is not None else 0
+        end = self.entries.bisect_left((high,)) if high is not None else len(self.entries)
+        return start, end
+
+    def iter_range(self, low: Any = None, high: Any = None) -> Iterator[Tuple[Any, int]]:
+        """Percorre (chave, id) em ordem crescente, com ``low <= chave < high``."""
+        start, end = self._bounds(low, high)
+        yield from islice(self.entries.iter_from(start), max(end - start, 0))
+
+    def count_range(self, low: Any = None, high: Any = None) -> int:
+        """Número de entradas com ``low <= chave < high``."""
+        start, end = self._bounds(low, high)
+        return max(end - start, 0)
+
+
+class TagIndex:
+    """Índice tag -> ids (ordenados), sem diferenciar maiúsculas nem acentos."""
+
+    def __init__(self):
+        self.ids: CowMap = CowMap()      # tag -> CowSortedList de ids
+        self.labels: CowMap = CowMap()   # grafia exibida de cada tag
+        self.tags_of: CowMap = CowMap()  # id -> tags
+
+    def add(self, doc_id: int, tags: Iterable[str]):
+        """Indexa (ou reindexa) as tags de um documento."""
+        self.remove(doc_id)
+
+        keys = {}
+        for tag in tags:
+            tag = tag.strip()
+            if tag:
+                keys.setdefault(fold(tag), tag)
+
+        for key, label in keys.items():
+            if key not in self.ids:
+                self.labels[key] = label
+            self.ids.writable(key, CowSortedList).add(doc_id)
+        if keys:
+            self.tags_of[doc_id] = tuple(keys)
+
+    def remove(self, doc_id: int):
+        """Remove o documento do índice, se presente."""
+        for key in self.tags_of.pop(doc_id, ()):
+            ids = self.ids.writable(key, CowSortedList)
+            ids.discard(doc_id)
+            if not ids:
+                del self.ids[key]
+                del self.labels[key]
+
+    def clear(self):
+        """Esvazia o índice."""
+        self.ids.clear()
+        self.labels.clear()
+        self.tags_of.clear()
+
+    def copy(self) -> 'TagIndex':
+        """Cópia independente (os blocos são compartilhados até a próxima escrita)."""
+        clone = TagIndex()
+        clone.ids = self.ids.copy()
+        clone.labels = self.labels.copy()
+        clone.tags_of = self.tags_of.copy()
+        return clone
+
+    def ids_for(self, tag: str) -> CowSortedList:
+        """Ids com a tag, em ordem crescente (vazio se a tag não existe)."""
+        return self.ids.get(fold(tag.strip())) or CowSortedList()
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """Pares (tag, quantidade), das tags mais usadas para as menos."""
+        return sorted(
+            ((self.labels[key], len(ids)) for key, ids in self.ids.items()),
+            key=lambda item: (-item[1], fold(item[0]))
+        )
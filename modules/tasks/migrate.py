@@ -0,0 +1,91 @@
+"""
+🔁 Conversão do banco de tarefas entre os formatos json e binary.
+
+Uso:
+    python -m modules.tasks.migrate --to binary [--path ./data/tasks.json]
+
+O arquivo é reescrito no lugar (a versão anterior fica em ``.bak``) e
+operações pendentes do journal são incorporadas antes da conversão.
+Depois, ajuste ``TASKS_DB_FORMAT`` para que as próximas gravações usem o
+novo formato.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from config.settings import settings
+from modules.tasks import codec
+from modules.tasks.storage import JsonStorage, JournalStorage
+
+
+def migrate(path: Path, fmt: str) -> dict:
+    """
+    Reescreve o banco no formato pedido.
+
+    Args:
+        path: Caminho do banco (TASKS_DB_PATH)
+        fmt: Formato de destino ('json' ou 'binary')
+
+    Returns:
+        Resumo com formato de origem, tamanhos e contagens
+
+    Raises:
+        FileNotFoundError: Se o banco não existir
+    """
+    journal = path.with_name(path.name + '.journal')
+    if not path.exists() and not journal.exists():
+        raise FileNotFoundError(f"Banco não encontrado: {path}")
+
+    storage = JournalStorage(path, fmt=fmt) if journal.exists() else JsonStorage(path, fmt=fmt)
+    try:
+        # Leitura e snapshot sob o mesmo lock: uma gravação do servidor MCP
+        # ou da API entre os dois seria apagada pelo snapshot
+        with storage.lock:
+            source = codec.detect(path.read_bytes()[:len(codec.MAGIC)]) if path.exists() else fmt
+            size_before = path.stat().st_size if path.exists() else 0
+
+            data = storage.load()
+            if data is None:
+                # Só o journal, vazio: não há o que converter
+                raise FileNotFoundError(f"Banco não encontrado: {path}")
+            storage.write_snapshot(data)
+            size_after = path.stat().st_size
+    finally:
+        storage.close()
+
+    return {
+        'from': source,
+        'to': fmt,
+        'tasks': len(data.get('tasks', [])),
+        'notes': len(data.get('notes', [])),
+        'size_before': size_before,
+        'size_after': size_after
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Converte o banco de tarefas entre json e binary")
+    parser.add_argument('--to', choices=codec.FORMATS, required=True, help="formato de destino")
+    parser.add_argument('--path', default=settings.TASKS_DB_PATH, help="caminho do banco")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        summary = migrate(Path(args.path), args.to)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erro na migração: {e}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {args.path}: {summary['from']} -> {summary['to']} em {elapsed:.2f}s")
+    print(f"   Tarefas: {summary['tasks']}  Notas: {summary['notes']}")
+    print(f"   Tamanho: {summary['size_before']} -> {summary['size_after']} bytes")
+    if settings.TASKS_DB_FORMAT != args.to:
+        print(f"⚠️  Ajuste TASKS_DB_FORMAT={args.to} no .env para manter o novo formato")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
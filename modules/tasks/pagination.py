@@ -0,0 +1,60 @@
+"""
+📄 Paginação por cursor (keyset) para listagens de tarefas e notas.
+
+O cursor é opaco para o cliente: codifica a chave de ordenação e o id do
+último item da página, e a próxima página começa logo depois dele.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class Page(NamedTuple):
+    """Uma página de resultados."""
+    items: List[Dict[str, Any]]
+    total: int
+    remaining: int
+    next_cursor: Optional[str]
+
+
+def encode_cursor(kind: str, key: List[Any]) -> str:
+    """
+    Codifica um cursor opaco.
+
+    Args:
+        kind: Tipo da listagem ('tasks' ou 'notes')
+        key: Chave de ordenação do último item, terminando no id
+
+    Returns:
+        Cursor em base64 urlsafe
+    """
+    raw = json.dumps([kind] + list(key), separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(kind: str, cursor: Optional[str]) -> Optional[List[Any]]:
+    """
+    Decodifica um cursor gerado por ``encode_cursor``.
+
+    Args:
+        kind: Tipo de listagem esperado
+        cursor: Cursor recebido do cliente (vazio = primeira página)
+
+    Returns:
+        Chave de ordenação, ou None para a primeira página
+
+    Raises:
+        ValueError: Se o cursor for inválido ou de outra listagem
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Cursor inválido: {e}")
+
+    if not isinstance(data, list) or len(data) < 2 or data[0] != kind:
+        raise ValueError("Cursor inválido para esta listagem")
+    return data[1:]
@@ -0,0 +1,215 @@
+"""
+🧮 Linguagem de consulta de tarefas.
+
+Uma consulta é uma sequência de termos separados por espaço, todos
+combinados com E::
+
+    priority:high due<2026-11-01 text:"deploy" sort:-created
+
+Termos aceitos:
+
+    status:pending | completed | all
+    priority:high[,medium,...]
+    id:3[,7,...]
+    due<DATA  due<=DATA  due>DATA  due>=DATA  due:DATA
+    due:none | due:any          (sem prazo / com prazo)
+    created<DATA ... created:DATA
+    text:"palavras"             (palavras soltas também contam como texto)
+    sort:campo | sort:-campo    (created, due, priority, title, id; vários com vírgula)
+
+Datas seguem o formato dos prazos (ISO ou dd/mm/aaaa, com hora opcional);
+uma data sem hora vale pelo dia inteiro. A análise é feita uma vez por
+texto de consulta e guardada em cache.
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+from modules.tasks.index import PRIORITY_RANK, fold, tokenize
+from modules.tasks.records import TaskRecord, parse_due
+
+_TERM_RE = re.compile(r'\s*(?:(\w+)(<=|>=|<|>|:))?("[^"]*"|\S+)')
+
+_SECOND = 1_000_000
+_DAY = 86_400 * _SECOND
+
+SORT_FIELDS = ('created', 'due', 'priority', 'title', 'id')
+
+Range = Tuple[Optional[int], Optional[int]]
+
+
+class Query(NamedTuple):
+    """Consulta analisada: filtros combinados com E e a ordenação."""
+    status: str = 'all'
+    ranks: Optional[FrozenSet[int]] = None
+    ids: Optional[FrozenSet[int]] = None
+    due: Optional[Range] = None          # [início, fim) em microssegundos
+    has_due: Optional[bool] = None
+    created: Optional[Range] = None
+    text: Tuple[str, ...] = ()            # tokens normalizados
+    sort: Tuple[Tuple[str, bool], ...] = ()  # (campo, decrescente)
+
+    def matches(self, task: TaskRecord) -> bool:
+        """Indica se a tarefa satisfaz todos os filtros."""
+        if self.status != 'all' and task.completed != (self.status == 'completed'):
+            return False
+        if self.ranks is not None and task.rank not in self.ranks:
+            return False
+        if self.ids is not None and task.id not in self.ids:
+            return False
+        if self.has_due is not None and bool(task.due_text) != self.has_due:
+            return False
+        if self.due is not None and not _in_range(task.due_ts, self.due):
+            return False
+        if self.created is not None and not _in_range(_created_ts(task), self.created):
+            return False
+        if self.text:
+            words = tokenize(f"{task.title} {task.description}")
+            return all(any(word.startswith(token) for word in words) for token in self.text)
+        return True
+
+
+def _in_range(value: Optional[int], bounds: Range) -> bool:
+    low, high = bounds
+    return value is not None and (low is None or value >= low) and (high is None or value < high)
+
+
+def _created_ts(task: TaskRecord) -> int:
+    """Criação como instante, mesmo quando guardada como texto (data com fuso)."""
+    if isinstance(task.created_ts, int):
+        return task.created_ts
+    return parse_due(task.created_ts) or 0
+
+
+def _bounds(field: str, op: str, value: str) -> Range:
+    """Converte uma comparação de data no intervalo [início, fim)."""
+    stamp = parse_due(value)
+    if stamp is None:
+        raise ValueError(f"Data inválida em {field}{op}{value}")
+    if len(value.strip()) <= 10:
+        # parse_due leva uma data sem hora para 23:59:59; o dia vai de start a end
+        end = stamp + _SECOND
+        start = end - _DAY
+    else:
+        start, end = stamp, stamp + 1
+
+    return {
+        '<': (None, start),
+        '<=': (None, end),
+        '>': (end, None),
+        '>=': (start, None),
+        ':': (start, end),
+    }[op]
+
+
+def _intersect(current: Optional[Range], new: Range) -> Range:
+    if current is None:
+        return new
+    lows = [v for v in (current[0], new[0]) if v is not None]
+    highs = [v for v in (current[1], new[1]) if v is not None]
+    return (max(lows) if lows else None, min(highs) if highs else None)
+
+
+def _values(field: str, value: str) -> List[str]:
+    values = [v.strip() for v in value.split(',') if v.strip()]
+    if not values:
+        raise ValueError(f"Valor vazio em {field}")
+    return values
+
+
+@lru_cache(maxsize=256)
+def parse_query(text: str) -> Query:
+    """
+    Analisa uma consulta.
+
+    Args:
+        text: Consulta, por exemplo ``priority:high due<2026-11-01 sort:-created``
+
+    Returns:
+        Consulta analisada (imutável, compartilhada pelo cache)
+
+    Raises:
+        ValueError: Se houver campo, operador ou valor inválido
+    """
+    fields = {}
+    text_tokens: List[str] = []
+
+    for match in _TERM_RE.finditer(text.strip()):
+        field, op, value = match.groups()
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            value = value[1:-1]
+        field = field.lower() if field else None
+
+        if field is None or field == 'text':
+            if op not in (None, ':'):
+                raise ValueError(f"Operador {op} não se aplica a texto")
+            text_tokens.extend(tokenize(value))
+            continue
+
+        if field in ('due', 'created'):
+            if field == 'due' and op == ':' and value.lower() in ('none', 'any'):
+                fields['has_due'] = value.lower() == 'any'
+            else:
+                fields[field] = _intersect(fields.get(field), _bounds(field, op, value))
+            continue
+
+        if op != ':':
+            raise ValueError(f"Operador {op} não se aplica a {field}")
+
+        if field == 'status':
+            if value not in ('all', 'pending', 'completed'):
+                raise ValueError(f"Status inválido: {value} (use all, pending ou completed)")
+            fields['status'] = value
+        elif field == 'priority':
+            unknown = [v for v in _values(field, value) if v not in PRIORITY_RANK]
+            if unknown:
+                raise ValueError(f"Prioridade inválida: {', '.join(unknown)}")
+            fields['ranks'] = frozenset(PRIORITY_RANK[v] for v in _values(field, value))
+        elif field == 'id':
+            try:
+                fields['ids'] = frozenset(int(v) for v in _values(field, value))
+            except ValueError:
+                raise ValueError(f"Id inválido: {value}")
+        elif field == 'sort':
+            sort = []
+            for name in _values(field, value):
+                descending = name.startswith('-')
+                name = name.lstrip('+-').lower()
+                if name not in SORT_FIELDS:
+                    raise ValueError(f"Ordenação inválida: {name} (use {', '.join(SORT_FIELDS)})")
+                sort.append((name, descending))
+            fields['sort'] = tuple(sort)
+        else:
+            raise ValueError(f"Campo desconhecido: {field}")
+
+    return Query(text=tuple(dict.fromkeys(text_tokens)), **fields)
+
+
+def sort_tasks(tasks: List[TaskRecord], sort: Tuple[Tuple[str, bool], ...]) -> List[TaskRecord]:
+    """
+    Ordena tarefas pelos campos da consulta (sem ordenação: pendentes, prioridade, id).
+
+    Tarefas sem prazo ficam por último em ``sort:due`` e ``sort:-due``; o id
+    desempata.
+    """
+    tasks = sorted(tasks, key=lambda t: t.id)
+    if not sort:
+        return sorted(tasks, key=lambda t: (t.completed, t.rank))
+
+    # Ordenações estáveis, do critério menos importante para o mais importante
+    for name, descending in reversed(sort):
+        if name == 'due':
+            with_due = [t for t in tasks if t.due_ts is not None]
+            without = [t for t in tasks if t.due_ts is None]
+            with_due.sort(key=lambda t: t.due_ts, reverse=descending)
+            tasks = with_due + without
+        elif name == 'created':
+            tasks.sort(key=_created_ts, reverse=descending)
+        elif name == 'priority':
+            tasks.sort(key=lambda t: t.rank, reverse=descending)
+        elif name == 'title':
+            tasks.sort(key=lambda t: fold(t.title), reverse=descending)
+        else:
+            tasks.sort(key=lambda t: t.id, reverse=descending)
+    return tasks
@@ -0,0 +1,304 @@
+"""
+🧱 Representação compacta de tarefas e notas em memória.
+
+Os registros usam ``__slots__``, guardam a prioridade como índice e as datas
+como inteiros (microssegundos desde 1970, sem fuso). O acesso por chave
+(``task['created_at']``) devolve os mesmos valores do formato JSON, que só é
+montado nas bordas com ``to_dict``.
+
+Notas lidas do banco não carregam o conteúdo: guardam a referência ao
+arquivo de conteúdo (ver ``content``) e leem o texto quando alguém pede.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from modules.tasks.content import ContentFile
+from modules.tasks.index import PRIORITY_RANK
+
+PRIORITIES = tuple(sorted(PRIORITY_RANK, key=PRIORITY_RANK.get))
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+Timestamp = Union[int, str, None]
+
+
+def to_timestamp(value: Optional[str]) -> Timestamp:
+    """
+    Converte uma data ISO em inteiro, quando a conversão é reversível.
+
+    Datas com fuso ou em outro formato ficam como texto, para que
+    ``from_timestamp`` devolva exatamente o valor original.
+    """
+    if not value or not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        return value
+
+    stamp = (parsed - _EPOCH) // _MICROSECOND
+    return stamp if from_timestamp(stamp) == value else value
+
+
+def from_timestamp(value: Timestamp) -> Optional[str]:
+    """Converte o inteiro de ``to_timestamp`` de volta para ISO."""
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
+
+
+def now_timestamp() -> int:
+    """Instante atual no formato interno."""
+    return (datetime.now() - _EPOCH) // _MICROSECOND
+
+
+_DUE_FORMATS = ('%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+
+def parse_due(value: Optional[str]) -> Optional[int]:
+    """
+    Converte um prazo livre em instante no formato interno.
+
+    Aceita ISO ("2026-11-01", "2026-11-01T14:00", com ou sem fuso) e o
+    formato brasileiro ("01/11/2026", "01/11/2026 14:00"). Uma data sem
+    hora vence no fim do dia.
+
+    Returns:
+        Instante (hora local), ou None se vazio ou irreconhecível
+    """
+    if not value:
+        return None
+    value = value.strip()
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in _DUE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    if len(value) <= 10:  # só a data
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return (parsed - _EPOCH) // _MICROSECOND
+
+
+class Record:
+    """Base dos registros: acesso por chave e conversão para dicionário."""
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Equivalente a ``dict.get``."""
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        """Campos do formato JSON."""
+        return self.FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para o formato JSON do banco e da API."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def to_storage(self) -> Dict[str, Any]:
+        """Converte para o formato gravado pelo backend."""
+        return self.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class TaskRecord(Record):
+    """Tarefa em memória."""
+
+    __slots__ = ('id', 'title', 'description', 'rank', 'due_text', 'due_ts',
+                 'completed', 'created_ts', 'completed_ts', 'parent_id', 'blocked_by',
+                 'recurrence', 'exceptions')
+    FIELDS = ('id', 'title', 'description', 'priority', 'due_date',
+              'completed', 'created_at', 'completed_at', 'parent_id', 'blocked_by',
+              'recurrence', 'exceptions')
+
+    def __init__(self, id: Optional[int], title: str, description: str = "",
+                 priority: str = "medium", due_date: str = "", completed: bool = False,
+                 created_at: Optional[str] = None, completed_at: Optional[str] = None,
+                 parent_id: Optional[int] = None, blocked_by=(),
+                 recurrence: str = "", exceptions=()):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.due_date = due_date
+        self.completed = bool(completed)
+        self.created_ts = to_timestamp(created_at) if created_at else now_timestamp()
+        self.completed_ts = to_timestamp(completed_at)
+        self.parent_id = parent_id
+        self.blocked_by = tuple(blocked_by)
+        # Tarefa recorrente: due_date é a ocorrência atual; as seguintes são
+        # geradas pela regra (ver modules.tasks.recurrence), menos as exceções
+        self.recurrence = recurrence or ""
+        self.exceptions = tuple(exceptions)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'TaskRecord':
+        """Cria o registro a partir do formato JSON (ou devolve o próprio registro)."""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            data['id'], data['title'], data.get('description', ''),
+            data.get('priority', 'medium'), data.get('due_date', ''),
+            data.get('completed', False), data.get('created_at'), data.get('completed_at'),
+            data.get('parent_id'), data.get('blocked_by') or (),
+            data.get('recurrence', ''), data.get('exceptions') or ()
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para o formato JSON (``blocked_by`` e ``exceptions`` como listas)."""
+        data = super().to_dict()
+        data['blocked_by'] = list(self.blocked_by)
+        data['exceptions'] = list(self.exceptions)
+        return data
+
+    @property
+    def priority(self) -> str:
+        return PRIORITIES[self.rank]
+
+    @priority.setter
+    def priority(self, value: str):
+        self.rank = PRIORITY_RANK.get(value, 1)
+
+    @property
+    def due_date(self) -> str:
+        return self.due_text
+
+    @due_date.setter
+    def due_date(self, value: Optional[str]):
+        # O texto original é preservado; due_ts é o prazo normalizado
+        self.due_text = sys.intern(value or "")
+        self.due_ts = parse_due(value)
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return from_timestamp(self.created_ts)
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]):
+        self.created_ts = to_timestamp(value)
+
+    @property
+    def completed_at(self) -> Optional[str]:
+        return from_timestamp(self.completed_ts)
+
+    @completed_at.setter
+    def completed_at(self, value: Optional[str]):
+        self.completed_ts = to_timestamp(value)
+
+
+class NoteRecord(Record):
+    """Nota em memória (o conteúdo pode ficar no arquivo de conteúdo)."""
+
+    __slots__ = ('id', 'title', 'text', 'source', 'ref', 'tags', 'created_ts', 'updated_ts')
+    FIELDS = ('id', 'title', 'content', 'tags', 'created_at', 'updated_at')
+
+    def __init__(self, id: Optional[int], title: str, content: str, tags=(),
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.content = content
+        self.tags = [sys.intern(tag) for tag in tags]
+        self.created_ts = to_timestamp(created_at) if created_at else now_timestamp()
+        self.updated_ts = to_timestamp(updated_at) if updated_at else self.created_ts
+
+    @classmethod
+    def from_dict(cls, data: Any, source: Optional[ContentFile] = None) -> 'NoteRecord':
+        """
+        Cria o registro a partir do formato JSON (ou devolve o próprio registro).
+
+        Args:
+            data: Nota com ``content`` ou com ``content_ref``
+            source: Arquivo de conteúdo a que ``content_ref`` se refere
+        """
+        if isinstance(data, cls):
+            return data
+        note = cls(
+            data['id'], data['title'], data.get('content', ''), data.get('tags', []),
+            data.get('created_at'), data.get('updated_at')
+        )
+        if 'content_ref' in data:
+            if source is None:
+                raise ValueError(f"Nota {data['id']} sem arquivo de conteúdo")
+            note.text, note.source, note.ref = None, source, tuple(data['content_ref'])
+        return note
+
+    @property
+    def content(self) -> str:
+        if self.text is not None:
+            return self.text
+        return self.source.read(*self.ref)
+
+    @content.setter
+    def content(self, value: str):
+        self.text, self.source, self.ref = value, None, None
+
+    def preview(self, limit: int) -> Tuple[str, bool]:
+        """
+        Começo do conteúdo, sem ler o corpo inteiro do arquivo.
+
+        Returns:
+            Tupla (até ``limit`` caracteres, se havia mais texto)
+        """
+        if self.text is not None:
+            return self.text[:limit], len(self.text) > limit
+        head = self.source.read(*self.ref, limit=limit + 1)
+        return head[:limit], len(head) > limit
+
+    def to_storage(self) -> Dict[str, Any]:
+        """Formato gravado: mantém a referência em vez de reler o corpo."""
+        if self.text is not None:
+            return self.to_dict()
+        return {'id': self.id, 'title': self.title, 'content_ref': list(self.ref),
+                'tags': self.tags, 'created_at': self.created_at, 'updated_at': self.updated_at}
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return from_timestamp(self.created_ts)
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]):
+        self.created_ts = to_timestamp(value)
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        return from_timestamp(self.updated_ts)
+
+    @updated_at.setter
+    def updated_at(self, value: Optional[str]):
+        self.updated_ts = to_timestamp(value)
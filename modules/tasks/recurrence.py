@@ -0,0 +1,250 @@
+"""
+🔁 Regras de recorrência das tarefas.
+
+Uma tarefa recorrente guarda só a regra, o prazo da ocorrência atual e as
+exceções (ocorrências puladas). As demais ocorrências não existem no banco:
+são geradas sob demanda por ``occurrences``, que para assim que a janela
+consultada termina.
+
+Regras aceitas (subconjunto do RRULE da RFC 5545, com ou sem "RRULE:")::
+
+    daily | weekly | monthly | yearly | weekdays
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY
+        ;INTERVAL=n            (a cada n dias/semanas/meses/anos)
+        ;BYDAY=MO,WE,...       (só com DAILY ou WEEKLY)
+        ;COUNT=n               (número de ocorrências a partir da atual)
+        ;UNTIL=DATA            (última data possível, inclusive)
+
+Semanas começam na segunda-feira. Em MONTHLY e YEARLY, meses sem o dia da
+ocorrência (31, 29/02) são pulados, como no RRULE.
+"""
+
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from modules.tasks.records import from_timestamp, parse_due
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+ALIASES = {
+    'daily': 'FREQ=DAILY',
+    'weekly': 'FREQ=WEEKLY',
+    'monthly': 'FREQ=MONTHLY',
+    'yearly': 'FREQ=YEARLY',
+    'weekdays': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+}
+
+# Passos seguidos sem ocorrência antes de desistir (regra que nunca casa,
+# como DAILY;INTERVAL=7;BYDAY=TU começando numa segunda)
+_MAX_MISSES = 1000
+
+
+class Rule(NamedTuple):
+    """Regra analisada."""
+    freq: str
+    interval: int = 1
+    byday: Tuple[int, ...] = ()   # dias da semana (0 = segunda)
+    count: Optional[int] = None
+    until: Optional[int] = None   # instante no formato interno
+    until_text: str = ""
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ','.join(WEEKDAYS[day] for day in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until_text:
+            parts.append(f"UNTIL={self.until_text}")
+        return ';'.join(parts)
+
+
+@lru_cache(maxsize=256)
+def parse_rule(text: str) -> Rule:
+    """
+    Analisa uma regra de recorrência.
+
+    Args:
+        text: Regra, por exemplo ``weekly`` ou ``FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10``
+
+    Returns:
+        Regra analisada (compartilhada pelo cache)
+
+    Raises:
+        ValueError: Se a regra for inválida
+    """
+    text = text.strip()
+    text = ALIASES.get(text.lower(), text)
+    if text.upper().startswith('RRULE:'):
+        text = text[6:]
+
+    fields = {}
+    for part in filter(None, text.split(';')):
+        name, sep, value = part.partition('=')
+        name, value = name.strip().upper(), value.strip()
+        if not sep or not value:
+            raise ValueError(f"Termo inválido na recorrência: {part}")
+
+        if name == 'FREQ':
+            if value.upper() not in FREQUENCIES:
+                raise ValueError(f"Frequência inválida: {value} (use {', '.join(FREQUENCIES)})")
+            fields['freq'] = value.upper()
+        elif name in ('INTERVAL', 'COUNT'):
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"{name} deve ser um inteiro positivo: {value}")
+            fields[name.lower()] = int(value)
+        elif name == 'BYDAY':
+            days = [day.strip().upper() for day in value.split(',')]
+            unknown = [day for day in days if day not in WEEKDAYS]
+            if unknown:
+                raise ValueError(f"Dia inválido em BYDAY: {', '.join(unknown)}")
+            fields['byday'] = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+        elif name == 'UNTIL':
+            # Também aceita o formato compacto do RRULE (20261231 ou 20261231T235959Z)
+            compact = value.rstrip('Z')
+            if len(compact) >= 8 and compact[:8].isdigit():
+                compact = f"{compact[:4]}-{compact[4:6]}-{compact[6:8]}{compact[8:]}"
+            until = parse_due(compact)
+            if until is None:
+                raise ValueError(f"Data inválida em UNTIL: {value}")
+            fields['until'], fields['until_text'] = until, value
+        else:
+            raise ValueError(f"Termo não suportado na recorrência: {name}")
+
+    if 'freq' not in fields:
+        raise ValueError("Recorrência sem FREQ (use daily, weekly, monthly, yearly ou FREQ=...)")
+    if fields.get('byday') and fields['freq'] not in ('DAILY', 'WEEKLY'):
+        raise ValueError("BYDAY só é aceito com FREQ=DAILY ou FREQ=WEEKLY")
+    return Rule(**fields)
+
+
+def to_datetime(stamp: int) -> datetime:
+    """Instante no formato interno como ``datetime`` (hora local, sem fuso)."""
+    return datetime.fromisoformat(from_timestamp(stamp))
+
+
+def is_date_only(due: str) -> bool:
+    """Indica se o prazo é só a data (vence no fim do dia, ver ``parse_due``)."""
+    return len(due.strip()) <= 10
+
+
+def format_occurrence(moment: datetime, date_only: bool) -> str:
+    """Texto do prazo de uma ocorrência, no formato do prazo original."""
+    if date_only:
+        return moment.date().isoformat()
+    return moment.isoformat(timespec='minutes' if not moment.second else 'seconds')
+
+
+def _add_months(moment: datetime, months: int) -> Optional[datetime]:
+    """Mesmo dia ``months`` meses depois, ou None se o mês não tem esse dia."""
+    year, month = divmod(moment.month - 1 + months, 12)
+    year += moment.year
+    if moment.day > calendar.monthrange(year, month + 1)[1]:
+        return None
+    return moment.replace(year=year, month=month + 1)
+
+
+def _candidates(rule: Rule, start: datetime) -> Iterator[Optional[datetime]]:
+    """Datas candidatas em ordem (None marca um passo sem ocorrência)."""
+    step = 0
+    if rule.freq == 'DAILY':
+        while True:
+            moment = start + timedelta(days=step * rule.interval)
+            yield moment if not rule.byday or moment.weekday() in rule.byday else None
+            step += 1
+    elif rule.freq == 'WEEKLY':
+        days = rule.byday or (start.weekday(),)
+        week = start - timedelta(days=start.weekday())
+        while True:
+            base = week + timedelta(weeks=step * rule.interval)
+            found = False
+            for day in days:
+                moment = base + timedelta(days=day)
+                if moment >= start:
+                    found = True
+                    yield moment
+            if not found:
+                yield None
+            step += 1
+    else:
+        months = rule.interval * (12 if rule.freq == 'YEARLY' else 1)
+        while True:
+            yield _add_months(start, step * months)
+            step += 1
+
+
+def to_stamp(moment: datetime) -> int:
+    """``datetime`` local como instante no formato interno."""
+    return parse_due(moment.isoformat(timespec='microseconds'))
+
+
+def _numbered(rule: Rule, start: datetime) -> Iterator[Tuple[int, datetime, int]]:
+    """Ocorrências dentro de COUNT e UNTIL, com a posição e o instante."""
+    position = misses = 0
+    for moment in _candidates(rule, start):
+        if moment is None:
+            misses += 1
+            if misses > _MAX_MISSES:
+                return
+            continue
+        misses = 0
+        if rule.count is not None and position >= rule.count:
+            return
+        stamp = to_stamp(moment)
+        if rule.until is not None and stamp > rule.until:
+            return
+        yield position, moment, stamp
+        position += 1
+
+
+def occurrences(rule: Rule, start: datetime,
+                exceptions: Iterable[str] = ()) -> Iterator[Tuple[int, datetime]]:
+    """
+    Gera as ocorrências da regra a partir de ``start`` (a ocorrência atual).
+
+    A geração é preguiçosa: cada ocorrência é calculada quando pedida, e o
+    gerador termina com COUNT, UNTIL ou quando a regra deixa de casar.
+
+    Args:
+        rule: Regra analisada
+        start: Ocorrência atual (o prazo da tarefa)
+        exceptions: Prazos de ocorrências puladas (contam para COUNT)
+
+    Yields:
+        Tuplas (instante, data) em ordem crescente
+    """
+    skipped = {parse_due(text) for text in exceptions}
+    for _, moment, stamp in _numbered(rule, start):
+        if stamp not in skipped:
+            yield stamp, moment
+
+
+def advance(rule: Rule, start: datetime, exceptions: Tuple[str, ...],
+            date_only: bool) -> Optional[Tuple[str, str, Tuple[str, ...]]]:
+    """
+    Passa a tarefa para a ocorrência seguinte à atual.
+
+    Args:
+        rule: Regra analisada
+        start: Ocorrência atual
+        exceptions: Prazos de ocorrências puladas
+        date_only: Se o prazo é só a data (sem hora)
+
+    Returns:
+        Tupla (novo prazo, regra com COUNT descontado, exceções ainda à
+        frente), ou None se a atual era a última
+    """
+    skipped = {parse_due(text) for text in exceptions}
+    for position, moment, stamp in _numbered(rule, start):
+        if position == 0 or stamp in skipped:
+            continue
+        if rule.count is not None:
+            rule = rule._replace(count=rule.count - position)
+        ahead = tuple(text for text in exceptions if parse_due(text) > stamp)
+        return format_occurrence(moment, date_only), str(rule), ahead
+    return None
@@ -0,0 +1,182 @@
+"""
+⏰ Lembretes de prazo das tarefas.
+
+Os prazos das tarefas pendentes ficam num min-heap; uma única thread dorme
+até o primeiro deles (``Condition.wait`` com timeout) e dispara o lembrete
+quando ele chega. Sem prazos agendados a thread fica parada, sem consultar
+nada.
+
+Remarcar ou cancelar não mexe no heap: o prazo vigente de cada tarefa fica
+em ``_deadlines``, e entradas que não batem com ele são descartadas quando
+chegam ao topo (ou todas de uma vez, quando passam a ser maioria).
+"""
+
+import heapq
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from modules.tasks.records import now_timestamp
+
+Reminder = Dict[str, Any]
+
+
+class ReminderScheduler:
+    """
+    Agenda um lembrete por tarefa e o dispara no prazo.
+
+    ``resolve`` é chamado na thread dos lembretes quando um prazo chega e
+    devolve o evento (ou None, se a tarefa não precisa mais dele). Os eventos
+    recebem um número sequencial, ficam num histórico curto, lido por
+    ``events_after`` e ``wait``, e são entregues aos ouvintes de ``subscribe``.
+    """
+
+    MAX_SLEEP = 60.0  # segundos; o prazo é revisto se o relógio do sistema mudar
+    HISTORY = 100
+
+    def __init__(self, resolve: Callable[[int, int], Optional[Reminder]]):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._resolve = resolve
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int]] = []  # (prazo, id), com entradas vencidas
+        self._deadlines: Dict[int, int] = {}    # id -> prazo vigente
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Eventos já disparados; condição separada para não acordar a thread do heap
+        self._events = threading.Condition()
+        self._history: Deque[Reminder] = deque(maxlen=self.HISTORY)
+        self._seq = 0
+        self._listeners: List[Callable[[Reminder], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    @property
+    def closed(self) -> bool:
+        """Indica se ``close`` já foi chamado (``wait`` não bloqueia mais)."""
+        return self._closed
+
+    def schedule(self, task_id: int, due_ts: int):
+        """
+        Agenda (ou remarca) o lembrete de uma tarefa.
+
+        Prazos que já passaram não são agendados: a tarefa já aparece nas
+        atrasadas, e recarregar o banco não repete lembretes antigos.
+        """
+        with self._cond:
+            if self._deadlines.get(task_id) == due_ts:
+                return
+            if due_ts <= now_timestamp():
+                self._deadlines.pop(task_id, None)
+                return
+            self._deadlines[task_id] = due_ts
+            heapq.heappush(self._heap, (due_ts, task_id))
+            self._compact()
+            if self._heap[0] == (due_ts, task_id):
+                self._cond.notify()  # novo primeiro prazo: a thread reprograma a espera
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='tasks-reminders', daemon=True)
+                self._thread.start()
+
+    def cancel(self, task_id: int):
+        """Cancela o lembrete da tarefa, se houver."""
+        with self._cond:
+            if self._deadlines.pop(task_id, None) is not None:
+                self._compact()
+
+    def clear(self):
+        """Cancela todos os lembretes agendados."""
+        with self._cond:
+            self._heap.clear()
+            self._deadlines.clear()
+
+    def next_due(self) -> Optional[int]:
+        """Prazo do próximo lembrete, ou None se não houver nenhum."""
+        with self._cond:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _compact(self):
+        """Reconstrói o heap quando as entradas vencidas passam das vigentes."""
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(due_ts, task_id) for task_id, due_ts in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    self._drop_stale()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = (self._heap[0][0] - now_timestamp()) / 1_000_000
+                    if delay <= 0:
+                        break
+                    self._cond.wait(min(delay, self.MAX_SLEEP))
+                due_ts, task_id = heapq.heappop(self._heap)
+                del self._deadlines[task_id]
+
+            self._fire(task_id, due_ts)
+
+    def _fire(self, task_id: int, due_ts: int):
+        """Monta e publica o lembrete (fora do lock do heap)."""
+        try:
+            event = self._resolve(task_id, due_ts)
+        except Exception as e:
+            self.logger.error(f"Erro ao montar lembrete da tarefa #{task_id}: {e}")
+            return
+        if event is None:
+            return
+
+        with self._events:
+            self._seq += 1
+            event = dict(event, seq=self._seq)
+            self._history.append(event)
+            listeners = list(self._listeners)
+            self._events.notify_all()
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"Erro ao entregar lembrete: {e}")
+
+    def subscribe(self, listener: Callable[[Reminder], None]):
+        """Registra uma função chamada (na thread dos lembretes) a cada lembrete."""
+        with self._events:
+            self._listeners.append(listener)
+
+    def events_after(self, seq: int = 0) -> List[Reminder]:
+        """Lembretes do histórico com número maior que ``seq``."""
+        with self._events:
+            return [event for event in self._history if event['seq'] > seq]
+
+    def wait(self, seq: int = 0, timeout: Optional[float] = None) -> List[Reminder]:
+        """
+        Aguarda lembretes posteriores a ``seq``.
+
+        Returns:
+            Os lembretes novos (vazia se o tempo acabar antes)
+        """
+        with self._events:
+            self._events.wait_for(lambda: self._seq > seq or self._closed, timeout)
+            return [event for event in self._history if event['seq'] > seq]
+
+    def close(self):
+        """Encerra a thread dos lembretes e libera quem estiver aguardando."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        with self._events:
+            self._events.notify_all()
+        if thread is not None:
+            thread.join()
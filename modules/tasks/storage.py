@@ -0,0 +1,1024 @@
+"""
+💾 Backends de persistência do módulo de tarefas.
+
+Cada backend recebe as mutações como operações pequenas
+(``put_task``, ``del_task``, ``put_note``, ``del_note``) e decide
+como torná-las persistentes.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from modules.tasks import codec
+from modules.tasks.content import ContentStore
+from modules.tasks.index import PRIORITY_RANK
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+Op = Tuple[str, Any]
+
+
+def empty_data() -> Dict[str, Any]:
+    """Retorna a estrutura de um banco vazio."""
+    return {
+        'tasks': [],
+        'notes': [],
+        'next_task_id': 1,
+        'next_note_id': 1
+    }
+
+
+def apply_ops(data: Dict[str, Any], ops: List[Op]) -> Dict[str, Any]:
+    """
+    Aplica operações do journal sobre um snapshot carregado.
+
+    Args:
+        data: Snapshot no formato do arquivo JSON
+        ops: Operações a reaplicar, na ordem em que ocorreram
+
+    Returns:
+        Snapshot atualizado
+    """
+    tasks = {t['id']: t for t in data.get('tasks', [])}
+    notes = {n['id']: n for n in data.get('notes', [])}
+    next_task_id = data.get('next_task_id', 1)
+    next_note_id = data.get('next_note_id', 1)
+
+    for op, payload in ops:
+        if op == 'put_task':
+            tasks[payload['id']] = payload
+            next_task_id = max(next_task_id, payload['id'] + 1)
+        elif op == 'del_task':
+            tasks.pop(payload, None)
+        elif op == 'put_note':
+            notes[payload['id']] = payload
+            next_note_id = max(next_note_id, payload['id'] + 1)
+        elif op == 'del_note':
+            notes.pop(payload, None)
+
+    data['tasks'] = list(tasks.values())
+    data['notes'] = list(notes.values())
+    data['next_task_id'] = next_task_id
+    data['next_note_id'] = next_note_id
+    return data
+
+
+def rebase_ops(data: Dict[str, Any], ops: List[Op],
+               remap: Optional[Dict[Tuple[str, int], int]] = None) -> List[Op]:
+    """
+    Ajusta operações feitas sobre uma versão antiga do banco para ``data``.
+
+    Um ``put`` cujo id já pertence a outro registro no disco (criado por
+    outro processo com o mesmo id) recebe o próximo id livre; as demais
+    operações passam como estão.
+
+    Args:
+        data: Snapshot atual do disco
+        ops: Operações deste processo, na ordem
+        remap: Dicionário que recebe os ids trocados, como
+            ``{('task', id antigo): id novo}``
+
+    Returns:
+        Operações prontas para aplicar sobre ``data``
+    """
+    current = {
+        'task': {t['id']: t for t in data.get('tasks', [])},
+        'note': {n['id']: n for n in data.get('notes', [])}
+    }
+    next_id = {'task': data.get('next_task_id', 1), 'note': data.get('next_note_id', 1)}
+    if remap is None:
+        remap = {}
+
+    rebased = []
+    for op, payload in ops:
+        action, kind = op.split('_', 1)
+        if action == 'put':
+            key = (kind, payload['id'])
+            existing = current[kind].get(payload['id'])
+            if (key not in remap and existing is not None
+                    and existing.get('created_at') != payload.get('created_at')):
+                remap[key] = next_id[kind]
+            if key in remap:
+                payload = dict(payload, id=remap[key])
+            current[kind][payload['id']] = payload
+            next_id[kind] = max(next_id[kind], payload['id'] + 1)
+        else:
+            payload = remap.get((kind, payload), payload)
+        rebased.append((op, payload))
+    return rebased
+
+
+class FileLock:
+    """
+    Lock exclusivo entre processos (``fcntl.flock``; ``msvcrt`` no Windows).
+
+    Reentrante na mesma thread e exclusivo entre threads do processo; o
+    arquivo de lock fica aberto, então adquirir custa uma syscall.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> 'FileLock':
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                if self._fd is None:
+                    self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                if fcntl:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    def close(self):
+        """Fecha o arquivo de lock."""
+        with self._thread_lock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
+
+
+def fsync_dir(path: Path):
+    """Sincroniza a entrada de diretório após um rename (no-op no Windows)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identidade de um arquivo (inode, tamanho, mtime em ns); None se não existe."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def atomic_write(path: Path, content: Union[str, bytes], backup: Optional[Path] = None):
+    """
+    Grava um arquivo de forma atômica: temporário, fsync e rename.
+
+    Args:
+        path: Arquivo de destino
+        content: Conteúdo completo (texto em UTF-8 ou bytes)
+        backup: Se informado, recebe a versão anterior do arquivo
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if backup is not None and path.exists():
+        # Hard link: o arquivo principal nunca some entre as duas trocas
+        try:
+            if backup.exists():
+                os.unlink(backup)
+            os.link(path, backup)
+        except OSError:
+            os.replace(path, backup)
+    os.replace(tmp_path, path)
+    fsync_dir(path.parent)
+
+
+class JsonStorage:
+    """
+    Snapshot completo, reescrito a cada mutação.
+
+    O arquivo é gravado no formato ``fmt`` (JSON indentado ou binário, ver
+    ``codec``) e lido em qualquer um dos dois. A gravação é atômica e mantém
+    a geração anterior em ``.bak``; se o arquivo principal estiver ilegível,
+    ``load`` recupera a partir do temporário de uma gravação interrompida ou
+    do backup.
+
+    Leituras e gravações acontecem sob um lock de arquivo (``.lock``), e o
+    snapshot leva um número de sequência (``seq``) incrementado a cada
+    gravação. Se outro processo gravou desde a última leitura, ``commit``
+    aplica só as operações deste lote sobre a versão do disco, em vez de
+    sobrescrevê-la com o estado em memória.
+
+    O conteúdo das notas vai para o arquivo de conteúdo (ver ``content``);
+    o snapshot guarda só ``content_ref`` e o nome da geração em uso
+    (``content_file``).
+    """
+
+    kind = 'json'
+    queryable = False
+
+    def __init__(self, path: Path, fmt: str = 'json'):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = Path(path)
+        self.fmt = fmt
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.backup_path = self.path.with_name(self.path.name + '.bak')
+        self.lock = FileLock(self.path.with_name(self.path.name + '.lock'))
+        # Arquivo visto na última leitura ou gravação, para detectar escritas de outro processo
+        self.signature = None
+        self.seq = 0
+        self.content = ContentStore(self.path)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any]:
+        return codec.load_file(path)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Lê o snapshot do disco, ou None se o banco ainda não existe."""
+        with self.lock:
+            data = self._load_current()
+            if data is not None and self.content.needs_compaction(data.get('notes', [])):
+                self.logger.info(f"Compactando {self.content.name}")
+                self.content.compact(data['notes'])
+                self.write_snapshot(data)
+        return data
+
+    def _load_current(self) -> Optional[Dict[str, Any]]:
+        """Estado completo do disco (chamar com o lock)."""
+        data = self._load_snapshot()
+        if data is not None:
+            self.seq = data.get('seq', 0)
+            self.content.open(data.get('content_file'))
+        return data
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        candidates = [p for p in (self.path, self.tmp_path, self.backup_path) if p.exists()]
+        if not candidates:
+            return None
+
+        for path in candidates:
+            signature = file_signature(path)
+            try:
+                data = self._read(path)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Snapshot ilegível em {path}: {e}")
+                continue
+
+            if path != self.path:
+                self.logger.warning(f"Dados recuperados de {path}")
+                self._quarantine()
+                atomic_write(self.path, self._dumps(data))
+                signature = file_signature(self.path)
+            self.signature = signature
+            return data
+
+        # Nada legível: preservar os arquivos para recuperação manual
+        self._quarantine()
+        raise ValueError(f"Nenhuma cópia legível de {self.path}")
+
+    def _quarantine(self):
+        """Move um arquivo principal corrompido para fora do caminho."""
+        if self.path.exists():
+            stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            corrupt = self.path.with_name(f"{self.path.name}.corrupt-{stamp}")
+            os.replace(self.path, corrupt)
+            self.logger.error(f"Arquivo corrompido preservado em {corrupt}")
+
+    def _dumps(self, data: Dict[str, Any]) -> bytes:
+        return codec.dumps(data, self.fmt)
+
+    def _write(self, data: Dict[str, Any]):
+        """Grava o snapshot com a próxima sequência (chamar com o lock)."""
+        self.seq += 1
+        notes = [self.content.externalize(n) for n in data.get('notes', [])]
+        self.content.sync()
+        data = dict(data, notes=notes, content_file=self.content.name, seq=self.seq,
+                    last_updated=datetime.now().isoformat())
+        atomic_write(self.path, self._dumps(data), backup=self.backup_path)
+        self.signature = file_signature(self.path)
+
+    def _changed_on_disk(self) -> bool:
+        """Indica se o arquivo mudou desde a última leitura ou gravação deste processo."""
+        return file_signature(self.path) != self.signature
+
+    def stale(self) -> bool:
+        """Indica se outro processo gravou no banco desde a última leitura (use sob o lock)."""
+        return self._changed_on_disk()
+
+    def write_snapshot(self, data: Dict[str, Any]):
+        """Grava o snapshot completo de forma atômica."""
+        with self.lock:
+            self._write(data)
+
+    def poll(self) -> Tuple[bool, List[Op]]:
+        """
+        Verifica se outro processo alterou o banco desde a última leitura.
+
+        Returns:
+            Tupla (recarregar tudo, operações novas a aplicar)
+        """
+        with self.lock:
+            return self._changed_on_disk(), []
+
+    def change_token(self) -> Any:
+        """
+        Marca de versão do que as consultas ao backend enxergam.
+
+        As listagens deste backend saem da memória, que só muda por ``poll``
+        e pelas mutações locais; por isso a marca é sempre a mesma.
+        """
+        return None
+
+    def commit(self, ops: List[Op], snapshot: Callable[[], Dict[str, Any]]) -> Dict[Tuple[str, int], int]:
+        """
+        Persiste um lote de mutações, mesclando se outro processo gravou antes.
+
+        Returns:
+            Ids trocados na mescla, como ``{('task', id antigo): id novo}``
+        """
+        remap: Dict[Tuple[str, int], int] = {}
+        with self.lock:
+            if not self._changed_on_disk() or not self.path.exists():
+                self._write(snapshot())
+                return remap
+
+            disk = self._read(self.path)
+            self.seq = max(self.seq, disk.get('seq', 0))
+            self.content.open(disk.get('content_file'))
+            self._write(apply_ops(disk, rebase_ops(disk, ops, remap)))
+            # A memória não tem as mudanças do outro processo: o próximo poll recarrega
+            self.signature = None
+            self.logger.warning(f"Banco alterado por outro processo; {len(ops)} operações mescladas (seq {self.seq})")
+        return remap
+
+    def checkpoint(self, snapshot: Callable[[], Dict[str, Any]]):
+        """Consolida no disco o que ainda estiver pendente."""
+        pass
+
+    def close(self):
+        """Libera recursos do backend."""
+        self.content.close()
+        self.lock.close()
+
+
+class JournalStorage(JsonStorage):
+    """
+    Snapshot JSON mais um journal append-only em JSON Lines.
+
+    Cada mutação vira uma linha curta no journal; o snapshot completo só é
+    reescrito na compactação, a cada ``compact_every`` operações.
+    """
+
+    kind = 'journal'
+
+    def __init__(self, path: Path, compact_every: int = 500, fmt: str = 'json'):
+        super().__init__(path, fmt)
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.compact_every = max(1, compact_every)
+        self.pending_ops = 0
+        self.journal_offset = 0  # bytes do journal já aplicados em memória
+
+    def _load_current(self) -> Optional[Dict[str, Any]]:
+        """Lê o snapshot e reaplica as operações pendentes do journal."""
+        data = super()._load_current()
+        ops, self.journal_offset = self._read_journal()
+        self.pending_ops = len(ops)
+
+        if data is None and not ops:
+            return None
+
+        if ops:
+            self.logger.info(f"Reaplicando {len(ops)} operações do journal")
+        return apply_ops(data or empty_data(), ops)
+
+    def _read_journal(self, offset: int = 0) -> Tuple[List[Op], int]:
+        """
+        Lê as operações do journal a partir de um offset.
+
+        Só linhas completas são consumidas: uma última linha sem quebra
+        (truncada, ou ainda sendo gravada por outro processo) fica para depois.
+
+        Returns:
+            Tupla (operações, offset logo após a última linha completa)
+        """
+        if not self.journal_path.exists():
+            return [], 0
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+
+        complete = raw.rfind(b'\n') + 1
+        if complete < len(raw):
+            self.logger.warning("Última linha do journal incompleta, ignorada")
+
+        ops = []
+        for line_no, line in enumerate(raw[:complete].splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                ops.append((entry['op'], entry['data']))
+            except (ValueError, KeyError) as e:
+                self.logger.warning(f"Linha {line_no} do journal ignorada: {e}")
+        return ops, offset + complete
+
+    def write_snapshot(self, data: Dict[str, Any]):
+        """Grava o snapshot completo e descarta o journal já incorporado."""
+        with self.lock:
+            super().write_snapshot(data)
+            with open(self.journal_path, 'w', encoding='utf-8'):
+                pass
+        self.pending_ops = 0
+        self.journal_offset = 0
+
+    def stale(self) -> bool:
+        """Indica se outro processo gravou no banco desde a última leitura (use sob o lock)."""
+        journal_size = (file_signature(self.journal_path) or (0, 0, 0))[1]
+        return super().stale() or journal_size != self.journal_offset
+
+    def _read_current(self) -> Dict[str, Any]:
+        """Estado atual do disco (snapshot mais journal); os corpos novos vão para a geração dele."""
+        data = self._read(self.path) if self.path.exists() else empty_data()
+        self.content.open(data.get('content_file'))
+        return apply_ops(data, self._read_journal()[0])
+
+    def commit(self, ops: List[Op], snapshot: Callable[[], Dict[str, Any]]) -> Dict[Tuple[str, int], int]:
+        """
+        Anexa as operações ao journal e compacta quando necessário.
+
+        Returns:
+            Ids trocados na mescla, como ``{('task', id antigo): id novo}``
+        """
+        remap: Dict[Tuple[str, int], int] = {}
+        with self.lock:
+            contended = self.stale()
+            if contended:
+                # Outro processo gravou: ids novos não podem colidir com os dele
+                ops = rebase_ops(self._read_current(), ops, remap)
+            ops = [(op, self.content.externalize(p) if op == 'put_note' else p) for op, p in ops]
+            self.content.sync()
+
+            lines = ''.join(
+                json.dumps({'op': op, 'data': payload}, ensure_ascii=False) + '\n'
+                for op, payload in ops
+            )
+            with open(self.journal_path, 'ab') as f:
+                start = f.seek(0, os.SEEK_END)
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+                # Se outro processo anexou linhas ainda não lidas, o offset fica
+                # parado e o próximo poll as lê (reaplicar as nossas é inócuo)
+                if start == self.journal_offset:
+                    self.journal_offset = f.tell()
+            self.pending_ops += len(ops)
+
+            # A compactação usa o estado em memória, que só está completo sem concorrência
+            if self.pending_ops >= self.compact_every and not contended:
+                self.logger.info(f"Compactando journal ({self.pending_ops} operações)")
+                self.write_snapshot(snapshot())
+        return remap
+
+    def checkpoint(self, snapshot: Callable[[], Dict[str, Any]]):
+        """Compacta o journal se houver operações pendentes."""
+        if self.pending_ops:
+            self.write_snapshot(snapshot())
+
+    def poll(self) -> Tuple[bool, List[Op]]:
+        """
+        Verifica mudanças de outro processo, lendo só o final novo do journal.
+
+        Returns:
+            Tupla (recarregar tudo, operações novas a aplicar)
+        """
+        # Sob o lock: o offset e a contagem também mudam em commit
+        with self.lock:
+            reload, _ = super().poll()
+            size = (file_signature(self.journal_path) or (0, 0, 0))[1]
+            if reload or size < self.journal_offset:
+                return True, []  # compactado por outro processo
+            if size == self.journal_offset:
+                return False, []
+
+            ops, self.journal_offset = self._read_journal(self.journal_offset)
+            self.pending_ops += len(ops)
+            return False, ops
+
+
+class SqliteStorage:
+    """
+    Banco SQLite (modo WAL) com índices para as consultas de listagem.
+
+    Cada mutação vira um UPSERT/DELETE de uma linha. As consultas de
+    listagem, contagem e busca são respondidas direto pelo banco, que também
+    reflete as escritas feitas por outros processos.
+    """
+
+    kind = 'sqlite'
+    queryable = True
+
+    TASK_COLUMNS = ('id', 'title', 'description', 'priority', 'due_date',
+                    'completed', 'created_at', 'completed_at', 'parent_id', 'blocked_by',
+                    'recurrence', 'exceptions')
+    NOTE_COLUMNS = ('id', 'title', 'content', 'tags', 'created_at', 'updated_at')
+
+    def __init__(self, path: Path):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = Path(path)
+        # TASKS_DB_PATH aponta para o JSON por padrão; o banco fica ao lado
+        self.db_file = self.path.with_suffix('.db') if self.path.suffix == '.json' else self.path
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.has_fts = False
+        self.data_version = None
+        self._create_schema()
+
+    def _create_schema(self):
+        """Cria tabelas e índices se ainda não existirem."""
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL DEFAULT '',
+                    priority TEXT NOT NULL DEFAULT 'medium',
+                    priority_rank INTEGER NOT NULL DEFAULT 1,
+                    due_date TEXT NOT NULL DEFAULT '',
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    completed_at TEXT,
+                    parent_id INTEGER,
+                    blocked_by TEXT NOT NULL DEFAULT '[]',
+                    recurrence TEXT NOT NULL DEFAULT '',
+                    exceptions TEXT NOT NULL DEFAULT '[]'
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_order ON tasks (completed, priority_rank, id);
+                CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, completed);
+                CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+                CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+
+                CREATE TABLE IF NOT EXISTS notes (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    tags TEXT NOT NULL DEFAULT '[]',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes (created_at);
+
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+            """)
+            # Bancos criados antes das dependências e das recorrências
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+            for name, definition in (('parent_id', "INTEGER"),
+                                     ('blocked_by', "TEXT NOT NULL DEFAULT '[]'"),
+                                     ('recurrence', "TEXT NOT NULL DEFAULT ''"),
+                                     ('exceptions', "TEXT NOT NULL DEFAULT '[]'")):
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {definition}")
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+                    "title, description, tokenize='unicode61 remove_diacritics 2')"
+                )
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                self.logger.warning(f"FTS5 indisponível, busca usará LIKE: {e}")
+
+    @staticmethod
+    def _task_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        task = {col: row[col] for col in SqliteStorage.TASK_COLUMNS}
+        task['completed'] = bool(task['completed'])
+        task['blocked_by'] = json.loads(task['blocked_by'])
+        task['exceptions'] = json.loads(task['exceptions'])
+        return task
+
+    @staticmethod
+    def _note_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        note = {col: row[col] for col in SqliteStorage.NOTE_COLUMNS}
+        note['tags'] = json.loads(note['tags'])
+        return note
+
+    def _meta(self, key: str, default: int = 1) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _bump_meta(self, key: str, value: int):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)",
+            (key, value)
+        )
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Lê todas as linhas, importando o JSON legado na primeira execução."""
+        with self.lock:
+            has_rows = self.conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM tasks) OR EXISTS (SELECT 1 FROM notes) "
+                "OR EXISTS (SELECT 1 FROM meta)"
+            ).fetchone()[0]
+
+        if not has_rows:
+            legacy = None
+            if self.path != self.db_file:
+                source = JsonStorage(self.path)
+                legacy = source.load()
+                if legacy is not None:
+                    legacy['notes'] = [source.content.resolve(n) for n in legacy['notes']]
+                source.close()
+            if legacy is None:
+                return None
+            self.logger.info(f"Importando {self.path} para {self.db_file}")
+            self.write_snapshot(legacy)
+
+        with self.lock:
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            tasks = [self._task_from_row(r) for r in self.conn.execute("SELECT * FROM tasks ORDER BY id")]
+            notes = [self._note_from_row(r) for r in self.conn.execute("SELECT * FROM notes ORDER BY id")]
+            return {
+                'tasks': tasks,
+                'notes': notes,
+                'next_task_id': self._meta('next_task_id'),
+                'next_note_id': self._meta('next_note_id')
+            }
+
+    def _put_task(self, task: Dict[str, Any]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tasks (id, title, description, priority, priority_rank, "
+            "due_date, completed, created_at, completed_at, parent_id, blocked_by, "
+            "recurrence, exceptions) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task['id'], task['title'], task['description'], task['priority'],
+             PRIORITY_RANK.get(task['priority'], 1), task['due_date'] or '',
+             int(task['completed']), task['created_at'], task['completed_at'],
+             task.get('parent_id'), json.dumps(list(task.get('blocked_by') or ())),
+             task.get('recurrence') or '', json.dumps(list(task.get('exceptions') or ())))
+        )
+        if self.has_fts:
+            self.conn.execute("DELETE FROM tasks_fts WHERE rowid = ?", (task['id'],))
+            self.conn.execute(
+                "INSERT INTO tasks_fts (rowid, title, description) VALUES (?, ?, ?)",
+                (task['id'], task['title'], task['description'])
+            )
+        self._bump_meta('next_task_id', task['id'] + 1)
+
+    def _del_task(self, task_id: int):
+        self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        if self.has_fts:
+            self.conn.execute("DELETE FROM tasks_fts WHERE rowid = ?", (task_id,))
+
+    def _put_note(self, note: Dict[str, Any]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO notes (id, title, content, tags, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (note['id'], note['title'], note['content'],
+             json.dumps(note['tags'], ensure_ascii=False), note['created_at'], note['updated_at'])
+        )
+        self._bump_meta('next_note_id', note['id'] + 1)
+
+    def _apply(self, ops: List[Op]):
+        for op, payload in ops:
+            if op == 'put_task':
+                self._put_task(payload)
+            elif op == 'del_task':
+                self._del_task(payload)
+            elif op == 'put_note':
+                self._put_note(payload)
+            elif op == 'del_note':
+                self.conn.execute("DELETE FROM notes WHERE id = ?", (payload,))
+
+    def write_snapshot(self, data: Dict[str, Any]):
+        """Substitui todo o conteúdo do banco pelo snapshot."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM notes")
+            if self.has_fts:
+                self.conn.execute("DELETE FROM tasks_fts")
+            self._apply([('put_task', t) for t in data.get('tasks', [])])
+            self._apply([('put_note', n) for n in data.get('notes', [])])
+            self._bump_meta('next_task_id', data.get('next_task_id', 1))
+            self._bump_meta('next_note_id', data.get('next_note_id', 1))
+
+    def _current(self, ops: List[Op]) -> Dict[str, Any]:
+        """Estado do banco que ``rebase_ops`` consulta: próximos ids e registros dos puts."""
+        ids = {'task': [], 'note': []}
+        for op, payload in ops:
+            action, kind = op.split('_', 1)
+            if action == 'put':
+                ids[kind].append(payload['id'])
+
+        data = {'next_task_id': self._meta('next_task_id'), 'next_note_id': self._meta('next_note_id')}
+        for kind, table in (('task', 'tasks'), ('note', 'notes')):
+            data[table] = [dict(row) for row in self.conn.execute(
+                f"SELECT id, created_at FROM {table} WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids[kind]),)
+            )] if ids[kind] else []
+        return data
+
+    def commit(self, ops: List[Op], snapshot: Callable[[], Dict[str, Any]]) -> Dict[Tuple[str, int], int]:
+        """
+        Aplica as mutações numa única transação, mesclando com outros processos.
+
+        ``BEGIN IMMEDIATE`` reserva a escrita antes da leitura dos próximos
+        ids: um registro criado com um id que outro processo já usou recebe
+        um id novo (ver ``rebase_ops``), em vez de sobrescrever a linha dele.
+
+        Returns:
+            Ids trocados na mescla, como ``{('task', id antigo): id novo}``
+        """
+        remap = {}
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._apply(rebase_ops(self._current(ops), ops, remap))
+        return remap
+
+    def checkpoint(self, snapshot: Callable[[], Dict[str, Any]]):
+        """Incorpora o WAL ao arquivo principal do banco."""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def poll(self) -> Tuple[bool, List[Op]]:
+        """
+        Verifica se outra conexão gravou no banco (``PRAGMA data_version``).
+
+        Returns:
+            Tupla (recarregar tudo, operações novas a aplicar)
+        """
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return version != self.data_version, []
+
+    def change_token(self) -> Any:
+        """
+        Marca de versão do que as consultas ao backend enxergam.
+
+        ``PRAGMA data_version`` muda a cada gravação de outra conexão, que as
+        consultas por índice já veem antes de a memória ser recarregada.
+        """
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """Fecha a conexão com o banco."""
+        with self.lock:
+            self.conn.close()
+
+    def query_tasks(self, status: str = "all", limit: int = 20,
+                    after: Optional[List[Any]] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Lista tarefas na ordem (concluída, prioridade, id) usando o índice.
+
+        Args:
+            status: Filtro de status (all, pending, completed)
+            limit: Número máximo de tarefas
+            after: Chave [concluída, prioridade, id] do último item já visto
+
+        Returns:
+            Tupla (tarefas da página, total filtrado, restantes após a página)
+        """
+        clauses, params = [], []
+        if status == "pending":
+            clauses.append("completed = 0")
+        elif status == "completed":
+            clauses.append("completed = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        def keyset(key):
+            cond = "(completed, priority_rank, id) > (?, ?, ?)"
+            return (f"{where} AND {cond}" if where else f"WHERE {cond}"), [int(key[0]), key[1], key[2]]
+
+        page_where, page_params = keyset(after) if after else (where, [])
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM tasks {page_where} ORDER BY completed, priority_rank, id LIMIT ?",
+                page_params + [limit]
+            ).fetchall()
+            total = self.conn.execute(f"SELECT COUNT(*) FROM tasks {where}", params).fetchone()[0]
+            remaining = 0
+            if rows:
+                last = rows[-1]
+                rest_where, rest_params = keyset((last['completed'], last['priority_rank'], last['id']))
+                remaining = self.conn.execute(
+                    f"SELECT COUNT(*) FROM tasks {rest_where}", rest_params
+                ).fetchone()[0]
+        return [self._task_from_row(r) for r in rows], total, remaining
+
+    def query_notes(self, limit: int = 10,
+                    before: Optional[List[Any]] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Lista notas das mais recentes para as mais antigas (created_at, id).
+
+        Args:
+            limit: Número máximo de notas
+            before: Chave [created_at, id] do último item já visto
+
+        Returns:
+            Tupla (notas da página, total, restantes após a página)
+        """
+        cond = "WHERE (created_at, id) < (?, ?)"
+        with self.lock:
+            if before:
+                rows = self.conn.execute(
+                    f"SELECT * FROM notes {cond} ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (before[0], before[1], limit)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM notes ORDER BY created_at DESC, id DESC LIMIT ?", (limit,)
+                ).fetchall()
+            total = self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            remaining = 0
+            if rows:
+                remaining = self.conn.execute(
+                    f"SELECT COUNT(*) FROM notes {cond}", (rows[-1]['created_at'], rows[-1]['id'])
+                ).fetchone()[0]
+        return [self._note_from_row(r) for r in rows], total, remaining
+
+    def task_stats(self) -> Dict[str, Any]:
+        """Contagens agregadas por status e por prioridade das pendentes."""
+        with self.lock:
+            by_status = dict(self.conn.execute(
+                "SELECT completed, COUNT(*) FROM tasks GROUP BY completed"
+            ).fetchall())
+            by_priority = dict(self.conn.execute(
+                "SELECT priority, COUNT(*) FROM tasks WHERE completed = 0 GROUP BY priority"
+            ).fetchall())
+            notes = self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+        pending = by_status.get(0, 0)
+        completed = by_status.get(1, 0)
+        return {
+            'total': pending + completed,
+            'pending': pending,
+            'completed': completed,
+            'priority': {p: by_priority.get(p, 0) for p in PRIORITY_RANK},
+            'notes': notes
+        }
+
+    def search_tasks(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Busca tarefas por texto no índice FTS5 (com prefixo e sem acentos).
+
+        Args:
+            query: Texto para buscar
+
+        Returns:
+            Tarefas encontradas, das mais relevantes para as menos
+        """
+        terms = [t for t in query.replace('"', ' ').split() if t]
+        if not terms:
+            return []
+
+        with self.lock:
+            if self.has_fts:
+                match = ' '.join(f'"{t}"*' for t in terms)
+                rows = self.conn.execute(
+                    "SELECT tasks.* FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+                    "WHERE tasks_fts MATCH ? ORDER BY bm25(tasks_fts)",
+                    (match,)
+                ).fetchall()
+            else:
+                pattern = f"%{query}%"
+                rows = self.conn.execute(
+                    "SELECT * FROM tasks WHERE title LIKE ? OR description LIKE ? ORDER BY id",
+                    (pattern, pattern)
+                ).fetchall()
+        return [self._task_from_row(r) for r in rows]
+
+
+class WriteBehindQueue:
+    """
+    Agrupa mutações e as persiste em lote numa thread dedicada.
+
+    O lote é gravado quando a janela ``window`` (em segundos) desde a
+    primeira operação pendente expira, quando acumula ``max_ops`` operações
+    ou quando ``flush`` é chamado. Cada lote tem um Future resolvido após a
+    gravação, para quem precisar aguardar a durabilidade.
+    """
+
+    def __init__(self, commit: Callable[[List[Op]], None], window: float, max_ops: int = 100):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._commit = commit
+        self.window = window
+        self.max_ops = max(1, max_ops)
+        self._cond = threading.Condition()
+        self._pending: List[Op] = []
+        self._future: Future = Future()
+        self._deadline = 0.0
+        self._flush_now = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='tasks-write-behind', daemon=True)
+        self._thread.start()
+
+    def submit(self, ops: List[Op]) -> Future:
+        """
+        Enfileira operações para o próximo lote.
+
+        Returns:
+            Future resolvido quando o lote com essas operações for gravado
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Fila de gravação encerrada")
+            if not self._pending:
+                self._deadline = time.monotonic() + self.window
+            self._pending.extend(ops)
+            self._cond.notify()
+            return self._future
+
+    def flush(self) -> Future:
+        """Antecipa a gravação do lote pendente e retorna seu Future."""
+        with self._cond:
+            if not self._pending:
+                done: Future = Future()
+                done.set_result(0)
+                return done
+            self._flush_now = True
+            self._cond.notify()
+            return self._future
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _ready(self) -> bool:
+        return (self._flush_now or self._closed
+                or len(self._pending) >= self.max_ops
+                or time.monotonic() >= self._deadline)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._pending and self._ready()):
+                    if self._closed and not self._pending:
+                        return
+                    timeout = self._deadline - time.monotonic() if self._pending else None
+                    self._cond.wait(timeout)
+                ops, future = self._pending, self._future
+                self._pending, self._future, self._flush_now = [], Future(), False
+
+            try:
+                self._commit(ops)
+                future.set_result(len(ops))
+            except Exception as e:
+                self.logger.error(f"Erro ao gravar lote de {len(ops)} operações: {e}")
+                future.set_exception(e)
+
+
+def create_storage(kind: str, path: Path, **options):
+    """
+    Cria o backend de persistência configurado.
+
+    Args:
+        kind: Tipo de backend (json, journal, sqlite)
+        path: Caminho do banco de dados
+        **options: Opções específicas do backend
+
+    Returns:
+        Instância do backend
+    """
+    fmt = options.get('fmt', 'json')
+    if kind == 'journal':
+        return JournalStorage(path, compact_every=options.get('compact_every', 500), fmt=fmt)
+    if kind == 'sqlite':
+        return SqliteStorage(path)
+    return JsonStorage(path, fmt=fmt)
@@ -2,26 +2,379 @@
 ✅ Sistema simples de tarefas e notas.
 """
 
-import json
 import asyncio
+import contextlib
+import copy
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 
 from modules.base import BaseModule
 from config.settings import settings
 from utils.validators import validate_string
+from modules.tasks.storage import create_storage, WriteBehindQueue
+from modules.tasks.archive import ArchiveStore
+from modules.tasks.cow import CowMap, CowSet
+from modules.tasks.graph import DependencyGraph
+from modules.tasks.index import (
+    TextIndex, BM25Index, BucketIndex, SortedIndex, TagIndex, fold, snippet, tokenize, PRIORITY_RANK
+)
+from modules.tasks.pagination import Page, encode_cursor, decode_cursor
+from modules.tasks.query import Query, parse_query, sort_tasks
+from modules.tasks.records import Record, TaskRecord, NoteRecord, from_timestamp, now_timestamp, parse_due
+from modules.tasks.recurrence import (
+    advance, format_occurrence, is_date_only, occurrences, parse_rule, to_datetime
+)
+from modules.tasks.reminders import ReminderScheduler
 
 class TasksTools(BaseModule):
     """Módulo de gerenciamento de tarefas e notas."""
 
+    RENDER_CACHE_SIZE = 64
+    ARCHIVE_INTERVAL = 3600  # segundos entre verificações de arquivamento
+
     def __init__(self):
         super().__init__()
         self.db_path = Path(settings.TASKS_DB_PATH)
-        self.tasks = []
-        self.notes = []
+        # Índices id -> registro, iterados na ordem dos ids; como os índices
+        # abaixo, têm cópia sob escrita para view() publicar versões sem copiar tudo
+        self._tasks_by_id: CowMap = CowMap()
+        self._notes_by_id: CowMap = CowMap()
+        self._task_text = TextIndex()
+        self._task_order = BucketIndex()
+        self._task_due = SortedIndex()  # prazo -> ids das pendentes com prazo
+        # Dependências; prontas = pendentes sem espera aberta, por prioridade
+        self._graph = DependencyGraph(self._is_open)
+        self._task_ready = BucketIndex()
+        # Recorrentes pendentes; as ocorrências futuras são geradas na consulta
+        self._task_recurring = CowSet()
+        # Lembretes no prazo das pendentes (uma thread armada para o próximo)
+        self.reminders = ReminderScheduler(self._reminder_event)
+        self._note_order = SortedIndex()
+        self._note_tags = TagIndex()
+        # Exige ler todos os corpos: montado só na primeira busca de notas
+        self._note_text = BM25Index()
+        self._note_text_ready = False
         self.next_task_id = 1
         self.next_note_id = 1
+        # Versão dos dados: muda a cada mutação e invalida as listagens em cache
+        self.version = 0
+        self._render_cache: Dict[Tuple, Tuple[Tuple[int, Any], str]] = {}
+        # Mutações são serializadas por este lock; leitores de outras threads
+        # usam a versão publicada por view(), sem lock
+        self._write_lock = threading.RLock()
+        self._live = self
+        self._view: Optional['TasksTools'] = None
+        self.storage = create_storage(
+            settings.TASKS_STORAGE,
+            self.db_path,
+            compact_every=settings.TASKS_JOURNAL_COMPACT_OPS,
+            fmt=settings.TASKS_DB_FORMAT
+        )
+        # Toda E/S do backend passa por uma única thread, na ordem de chegada,
+        # para não bloquear o event loop com serialização e fsync
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tasks-io')
+        self._writer = None
+        if settings.TASKS_WRITE_BEHIND_MS > 0:
+            # O lote também é gravado pela thread de E/S, na ordem das demais
+            # operações do backend (poll, snapshot), nunca ao mesmo tempo
+            self._writer = WriteBehindQueue(
+                lambda ops: self._io.submit(self.storage.commit, ops, self._snapshot).result(),
+                window=settings.TASKS_WRITE_BEHIND_MS / 1000,
+                max_ops=settings.TASKS_WRITE_BEHIND_MAX_OPS
+            )
+        # Camada fria: concluídas antigas, lidas só quando a consulta chega nelas
+        self.archive = ArchiveStore(self.db_path, settings.TASKS_DB_FORMAT)
+        self._archived: Optional[CowMap] = None
+        self._archive_order = BucketIndex()
+        self._archive_version = 0  # versão em que tarefas deixaram o banco pelo arquivo
+        self._last_archive_check = float('-inf')
+
+    @property
+    def tasks(self) -> List[TaskRecord]:
+        """Lista de tarefas na ordem de criação."""
+        return list(self._tasks_by_id.values())
+
+    @tasks.setter
+    def tasks(self, tasks: List[Dict[str, Any]]):
+        self._tasks_by_id = CowMap((t['id'], TaskRecord.from_dict(t)) for t in tasks)
+        self._rebuild_task_indexes()
+
+    @property
+    def notes(self) -> List[NoteRecord]:
+        """Lista de notas na ordem de criação."""
+        return list(self._notes_by_id.values())
+
+    @notes.setter
+    def notes(self, notes: List[Dict[str, Any]]):
+        source = self._content_source()
+        self._notes_by_id = CowMap((n['id'], NoteRecord.from_dict(n, source)) for n in notes)
+        self._rebuild_note_indexes()
+
+    def _reading(self):
+        """Lock para ler os índices: só o objeto vivo precisa; uma view nunca muda."""
+        return self._write_lock if self._live is self else contextlib.nullcontext()
+
+    def _content_source(self):
+        """Arquivo de conteúdo das notas do backend (None se ele guarda o texto)."""
+        content = getattr(self.storage, 'content', None)
+        return content.current if content else None
+
+    def _touch(self):
+        """Registra uma mutação, invalidando as listagens em cache."""
+        self.version += 1
+
+    def _cached_render(self, key: Tuple, render: Callable[[], str]) -> str:
+        """
+        Retorna o texto de uma listagem, reaproveitando o da mesma versão.
+
+        A versão inclui a marca do backend (``change_token``): no sqlite, as
+        consultas leem o banco, e gravações de outros processos também
+        invalidam o cache.
+
+        Args:
+            key: Ferramenta e argumentos da listagem
+            render: Função que monta o texto
+
+        Returns:
+            Texto da listagem
+        """
+        version = (self.version, self.storage.change_token())
+        cached = self._render_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        text = render()
+        self._render_cache.pop(key, None)
+        if len(self._render_cache) >= self.RENDER_CACHE_SIZE:
+            del self._render_cache[next(iter(self._render_cache))]
+        self._render_cache[key] = (version, text)
+        return text
+
+    def view(self) -> 'TasksTools':
+        """
+        Versão somente leitura dos dados, para leitores em outras threads.
+
+        Cada versão é publicada uma única vez, no primeiro pedido depois de
+        uma mutação, sob o lock de escrita. Mapas e índices têm cópia sob
+        escrita (``cow``): publicar copia só as tabelas de blocos, e a escrita
+        seguinte copia só os blocos que altera. Registros nunca são alterados
+        depois de publicados (ver ``_mark_completed``), então a versão não
+        muda enquanto alguém a lê, e as consultas nela não usam lock.
+
+        Returns:
+            Objeto com as mesmas consultas (select_*, find_*, get_*); não
+            deve ser usado para mutações
+        """
+        view = self._view
+        if view is not None and view.version == self.version:
+            return view
+
+        with self._write_lock:
+            if self._view is None or self._view.version != self.version:
+                view = copy.copy(self)
+                view._tasks_by_id = self._tasks_by_id.copy()
+                view._notes_by_id = self._notes_by_id.copy()
+                view._task_text = self._task_text.copy()
+                view._task_order = self._task_order.copy()
+                view._task_due = self._task_due.copy()
+                view._graph = self._graph.copy(view._is_open)
+                view._task_ready = self._task_ready.copy()
+                view._task_recurring = self._task_recurring.copy()
+                view._note_order = self._note_order.copy()
+                view._note_tags = self._note_tags.copy()
+                view._note_text = self._note_text.copy()
+                view._archive_order = self._archive_order.copy()
+                if self._archived is not None:
+                    view._archived = self._archived.copy()
+                view._render_cache = {}
+                view._view = view
+                self._view = view
+            return self._view
+
+    def _rebuild_task_indexes(self):
+        """Reconstrói os índices derivados das tarefas."""
+        self._touch()
+        self._task_text.clear()
+        self._task_order.clear()
+        self._task_due.clear()
+        self._graph.clear()
+        self._task_ready.clear()
+        self._task_recurring.clear()
+        self.reminders.clear()
+        for task in self._tasks_by_id.values():
+            self._index_task(task)
+
+    @staticmethod
+    def _order_key(task: TaskRecord) -> Tuple[bool, int]:
+        """Chave da ordem de listagem: pendentes primeiro, depois prioridade."""
+        return (task.completed, task.rank)
+
+    def _index_task(self, task: TaskRecord):
+        """Inclui ou atualiza uma tarefa nos índices derivados."""
+        self._touch()
+        self._task_text.add(task['id'], ((task['title'], 2.0), (task['description'], 1.0)))
+        self._task_order.add(task['id'], self._order_key(task))
+        if task.due_ts is not None and not task.completed:
+            self._task_due.add(task.id, task.due_ts)
+            self.reminders.schedule(task.id, task.due_ts)
+        else:
+            self._task_due.remove(task.id)
+            self.reminders.cancel(task.id)
+        if task.recurrence and task.due_ts is not None and not task.completed:
+            self._task_recurring.add(task.id)
+        else:
+            self._task_recurring.discard(task.id)
+        changed = self._graph.set_relations(task.id, task.blocked_by, task.parent_id)
+        self._refresh_ready(changed | self._graph.status_changed(task.id))
+
+    def _unindex_task(self, task: TaskRecord):
+        """Remove uma tarefa dos índices derivados."""
+        self._touch()
+        self._task_text.remove(task['id'])
+        self._task_order.remove(task['id'])
+        self._task_due.remove(task['id'])
+        self._task_ready.remove(task['id'])
+        self._task_recurring.discard(task['id'])
+        self.reminders.cancel(task['id'])
+        self._refresh_ready(self._graph.remove(task['id']))
+
+    def _is_open(self, task_id: int) -> bool:
+        """Indica se a tarefa existe e está pendente (arquivadas estão concluídas)."""
+        task = self._tasks_by_id.get(task_id)
+        return task is not None and not task.completed
+
+    def _reminder_event(self, task_id: int, due_ts: int) -> Optional[Dict[str, Any]]:
+        """
+        Monta o lembrete de uma tarefa que venceu (roda na thread dos lembretes).
+
+        Returns:
+            Evento do lembrete, ou None se a tarefa foi concluída, removida ou remarcada
+        """
+        task = self.view().get_task(task_id)
+        if task is None or task.completed or task.due_ts != due_ts:
+            return None
+
+        self.logger.info(f"⏰ Lembrete: tarefa #{task.id} '{task.title}' venceu ({task.due_date})")
+        return {
+            'task_id': task.id,
+            'title': task.title,
+            'priority': task.priority,
+            'due_date': task.due_date,
+            'fired_at': datetime.now().isoformat()
+        }
+
+    def _refresh_ready(self, task_ids):
+        """Atualiza o índice de prontas para as tarefas cuja contagem de esperas mudou."""
+        for task_id in task_ids:
+            task = self._tasks_by_id.get(task_id)
+            if task is not None and not task.completed and not self._graph.is_blocked(task_id):
+                self._task_ready.add(task_id, task.rank)
+            else:
+                self._task_ready.remove(task_id)
+
+    def _rebuild_note_indexes(self):
+        """Reconstrói os índices derivados das notas."""
+        self._touch()
+        self._note_order.clear()
+        self._note_tags.clear()
+        self._note_text.clear()
+        self._note_text_ready = False
+        for note in self._notes_by_id.values():
+            self._index_note(note)
+
+    def _index_note(self, note: NoteRecord):
+        """Inclui ou atualiza uma nota nos índices derivados."""
+        self._touch()
+        self._note_order.add(note['id'], note['created_at'])
+        self._note_tags.add(note['id'], note['tags'])
+        if self._note_text_ready:
+            self._index_note_text(note)
+
+    def _index_note_text(self, note: NoteRecord):
+        self._note_text.add(note['id'], (
+            (note['title'], 3.0), (' '.join(note['tags']), 2.0), (note['content'], 1.0)
+        ))
+
+    def _unindex_note(self, note: NoteRecord):
+        """Remove uma nota dos índices derivados."""
+        self._touch()
+        self._note_order.remove(note['id'])
+        self._note_tags.remove(note['id'])
+        self._note_text.remove(note['id'])
+
+    def get_task(self, task_id: int) -> Optional[TaskRecord]:
+        """Retorna a tarefa pelo id (procurando também no arquivo), ou None se não existir."""
+        task = self._tasks_by_id.get(task_id)
+        if task is None and self.archive.count():
+            task = self._archived_tasks().get(task_id)
+        return task
+
+    def _archived_tasks(self) -> CowMap:
+        """
+        Tarefas arquivadas, lidas dos segmentos no primeiro acesso.
+
+        A leitura é feita uma única vez, no objeto vivo e sob o lock de
+        escrita; uma view recebe uma cópia (O(blocos)) do que ele carregou.
+        """
+        if self._archived is not None:
+            return self._archived
+
+        live = self._live
+        with live._write_lock:
+            if live._archived is None:
+                archived, order = CowMap(), BucketIndex()
+                for data in live.archive.load():
+                    if data['id'] in live._tasks_by_id:
+                        continue  # arquivada, mas a remoção do banco não chegou a ser gravada
+                    task = TaskRecord.from_dict(data)
+                    archived[task.id] = task
+                    order.add(task.id, live._order_key(task))
+                live._archive_order, live._archived = order, archived
+                live.logger.info(f"Arquivo carregado: {len(archived)} tarefas")
+            if live is self:
+                return self._archived
+
+            archived, order = live._archived.copy(), live._archive_order.copy()
+            if live._archive_version > self.version:
+                # Arquivadas depois desta versão: aqui elas ainda estão no banco
+                for task_id in [i for i in archived if i in self._tasks_by_id]:
+                    del archived[task_id]
+                    order.remove(task_id)
+        self._archive_order, self._archived = order, archived
+        return archived
+
+    def _iter_task_ids(self, keys: List[Tuple[bool, int]],
+                       after: Optional[Tuple[Tuple[bool, int], int]] = None):
+        """Percorre ids na ordem de listagem, intercalando os arquivados nos grupos de concluídas."""
+        for key in keys:
+            hot = self._task_order.iter_ids([key], after)
+            if key[0] and self.archive.count(key[1]):
+                self._archived_tasks()
+                yield from heapq.merge(hot, self._archive_order.iter_ids([key], after))
+            else:
+                yield from hot
+
+    def _archived_count(self, keys: List[Tuple[bool, int]],
+                        after: Optional[Tuple[Tuple[bool, int], int]] = None) -> int:
+        """Número de arquivadas nos grupos dados (após a posição, se houver)."""
+        keys = [key for key in keys if key[0] and self.archive.count(key[1])]
+        if not keys:
+            return 0
+        if after is not None and (self._archived is not None or after[0] in keys):
+            self._archived_tasks()
+            return self._archive_order.count_after(keys, after)
+        return sum(self.archive.count(key[1]) for key in keys
+                   if after is None or key > after[0])
+
+    def get_note(self, note_id: int) -> Optional[NoteRecord]:
+        """Retorna a nota pelo id, ou None se não existir."""
+        return self._notes_by_id.get(note_id)
 
     async def is_available(self) -> bool:
         """Sempre disponível - usa armazenamento local."""
@@ -35,9 +388,10 @@ class TasksTools(BaseModule):
 
             # Carregar dados existentes
             await self.load_data()
+            await self.archive_completed()
 
             self.initialized = True
-            self.logger.info(f"Tasks inicializado com {len(self.tasks)} tarefas e {len(self.notes)} notas")
+            self.logger.info(f"Tasks inicializado com {len(self._tasks_by_id)} tarefas e {len(self._notes_by_id)} notas")
 
         except Exception as e:
             self.logger.error(f"Erro ao inicializar Tasks: {e}")
@@ -52,148 +406,966 @@ class TasksTools(BaseModule):
             "delete_task": self.delete_task,
             "create_note": self.create_note,
             "list_notes": self.list_notes,
-            "search_tasks": self.search_tasks
+            "search_tasks": self.search_tasks,
+            "create_tasks": self.create_tasks,
+            "complete_tasks": self.complete_tasks,
+            "delete_tasks": self.delete_tasks,
+            "create_notes": self.create_notes,
+            "list_notes_by_tag": self.list_notes_by_tag,
+            "list_tags": self.list_tags,
+            "search_notes": self.search_notes,
+            "list_due_tasks": self.list_due_tasks,
+            "list_overdue_tasks": self.list_overdue_tasks,
+            "query_tasks": self.query_tasks,
+            "add_dependency": self.add_dependency,
+            "remove_dependency": self.remove_dependency,
+            "list_ready_tasks": self.list_ready_tasks,
+            "critical_path": self.critical_path,
+            "list_reminders": self.list_reminders,
+            "list_agenda": self.list_agenda,
+            "skip_occurrence": self.skip_occurrence
         }
 
     async def load_data(self):
-        """Carrega dados do arquivo JSON."""
+        """Carrega dados do backend de persistência."""
         try:
-            if self.db_path.exists():
-                with open(self.db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            if await self._run_io(self.archive.refresh):
+                self._archived = None  # outro processo arquivou: reler sob demanda
+                self._touch()
+                self._archive_version = self.version
+
+            data = await self._run_io(self.storage.load)
+            if data is not None:
+                with self._write_lock:
                     self.tasks = data.get('tasks', [])
                     self.notes = data.get('notes', [])
                     self.next_task_id = data.get('next_task_id', 1)
                     self.next_note_id = data.get('next_note_id', 1)
-                    
+
                     # Atualizar IDs se necessário
-                    if self.tasks:
-                        max_task_id = max(t['id'] for t in self.tasks)
+                    if self._tasks_by_id:
+                        max_task_id = max(self._tasks_by_id)
                         self.next_task_id = max(self.next_task_id, max_task_id + 1)
-                    if self.notes:
-                        max_note_id = max(n['id'] for n in self.notes)
+                    if self._notes_by_id:
+                        max_note_id = max(self._notes_by_id)
                         self.next_note_id = max(self.next_note_id, max_note_id + 1)
             else:
-                self.tasks = []
-                self.notes = []
+                with self._write_lock:
+                    self.tasks = []
+                    self.notes = []
                 await self.save_data()
         except Exception as e:
             self.logger.error(f"Erro ao carregar dados: {e}")
-            self.tasks = []
-            self.notes = []
+            with self._write_lock:
+                self.tasks = []
+                self.notes = []
+
+    async def refresh(self) -> bool:
+        """
+        Traz para a memória as mudanças gravadas por outro processo.
+
+        Não relê nada se o banco não mudou; no backend journal aplica só as
+        operações novas do journal, e relê tudo apenas após uma compactação.
+
+        Returns:
+            True se os dados em memória mudaram
+        """
+        try:
+            reload, ops = await self._run_io(self.storage.poll)
+            if reload:
+                await self.flush()
+                await self.load_data()
+                return True
+
+            if await self._run_io(self.archive.refresh):
+                self._archived = None
+                self._touch()
+                self._archive_version = self.version
+            if ops:
+                self._apply_ops(ops)
+            return bool(ops)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao atualizar dados: {e}")
+            return False
+
+    def _apply_ops(self, ops):
+        """Aplica em memória operações gravadas por outro processo."""
+        with self._write_lock:
+            for op, payload in ops:
+                if op == 'put_task':
+                    task = self._replace_task(TaskRecord.from_dict(payload))
+                    self.next_task_id = max(self.next_task_id, task.id + 1)
+                elif op == 'del_task':
+                    self._remove_task(payload)
+                elif op == 'put_note':
+                    old = self._notes_by_id.get(payload['id'])
+                    if old:
+                        self._unindex_note(old)
+                    note = self._notes_by_id[payload['id']] = NoteRecord.from_dict(
+                        payload, self._content_source())
+                    self._index_note(note)
+                    self.next_note_id = max(self.next_note_id, note.id + 1)
+                elif op == 'del_note':
+                    note = self._notes_by_id.pop(payload, None)
+                    if note:
+                        self._unindex_note(note)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Monta o snapshot completo do banco."""
+        # Sob o lock, para não gravar um lote pela metade; os registros não
+        # mudam depois de publicados, então a conversão pode ser feita fora
+        with self._write_lock:
+            tasks = list(self._tasks_by_id.values())
+            notes = list(self._notes_by_id.values())
+            next_task_id, next_note_id = self.next_task_id, self.next_note_id
+        return {
+            'tasks': [t.to_dict() for t in tasks],
+            'notes': [n.to_storage() for n in notes],
+            'next_task_id': next_task_id,
+            'next_note_id': next_note_id
+        }
+
+    async def _run_io(self, func: Callable, *args) -> Any:
+        """
+        Executa uma operação do backend na thread de E/S.
+
+        As operações rodam uma de cada vez, na ordem em que foram chamadas;
+        o event loop continua atendendo outras ferramentas enquanto isso.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._io, func, *args)
+
+    def _write_snapshot(self):
+        """Grava o snapshot completo (roda na thread de E/S)."""
+        self.storage.write_snapshot(self._snapshot())
 
     async def save_data(self):
-        """Salva dados no arquivo JSON."""
+        """Salva o snapshot completo (compacta o journal, se houver)."""
         try:
-            data = {
-                'tasks': self.tasks,
-                'notes': self.notes,
-                'next_task_id': self.next_task_id,
-                'next_note_id': self.next_note_id,
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            await self.flush()
+            await self._run_io(self._write_snapshot)
         except Exception as e:
             self.logger.error(f"Erro ao salvar dados: {e}")
 
-    async def create_task(self, title: str, description: str = "", priority: str = "medium", due_date: str = "") -> str:
+    async def _commit(self, *ops) -> Dict[Tuple[str, int], int]:
         """
-        Cria uma nova tarefa.
+        Persiste as mutações pelo backend configurado (ou enfileira o lote).
+
+        Returns:
+            Ids trocados na mescla com gravações de outro processo, como
+            ``{('task', id antigo): id novo}``; vazio com a gravação adiada,
+            que só acontece depois do retorno
+        """
+        remap = {}
+        try:
+            # Registros viram JSON só aqui, na borda com o backend
+            ops = [(op, p.to_storage() if isinstance(p, Record) else p) for op, p in ops]
+            if self._writer:
+                self._writer.submit(ops)
+            else:
+                remap = await self._run_io(self.storage.commit, ops, self._snapshot) or {}
+                # Se o lote foi mesclado com gravações de outro processo, trazê-las
+                await self.refresh()
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar dados: {e}")
+
+        if time.monotonic() - self._last_archive_check >= self.ARCHIVE_INTERVAL:
+            await self.archive_completed()
+        return remap
+
+    def _stored(self, kind: str, records: List[Record], remap: Dict[Tuple[str, int], int]) -> List[Record]:
+        """Registros recém-criados como ficaram no banco, com os ids trocados na mescla."""
+        if not remap:
+            return records
+        by_id = self._tasks_by_id if kind == 'task' else self._notes_by_id
+        stored = []
+        for record in records:
+            new_id = remap.get((kind, record.id))
+            stored.append(record if new_id is None else by_id.get(new_id, record))
+        return stored
+
+    async def archive_completed(self) -> int:
+        """
+        Move para o arquivo as tarefas concluídas há mais de TASKS_ARCHIVE_DAYS dias.
+
+        Os segmentos são gravados antes da remoção das tarefas do banco, na
+        mesma thread de E/S e sob o lock do backend (ver ``_archive_batch``).
+        Desativado com TASKS_ARCHIVE_DAYS=0 e no backend sqlite, que já
+        consulta por índice.
+
+        Returns:
+            Número de tarefas arquivadas
+        """
+        self._last_archive_check = time.monotonic()
+        days = settings.TASKS_ARCHIVE_DAYS
+        if days <= 0 or self.storage.queryable:
+            return 0
+
+        try:
+            cutoff = now_timestamp() - days * 86_400_000_000
+            keys = [(True, rank) for rank in sorted(PRIORITY_RANK.values())]
+            with self._write_lock:
+                old = [task for task in map(self._tasks_by_id.get, self._task_order.iter_ids(keys))
+                       if isinstance(task.completed_ts, int) and task.completed_ts < cutoff]
+            if not old:
+                return 0
+
+            # Lotes adiados vão antes: as remoções abaixo vão direto ao backend
+            await self.flush()
+            old = await self._run_io(self._archive_batch, old)
+            if not old:
+                self.logger.info("Banco alterado por outro processo; arquivamento adiado")
+                return 0
+
+            with self._write_lock:
+                for task in old:
+                    if self._tasks_by_id.get(task.id) is not task:
+                        continue  # alterada durante a gravação: o put dela a devolve ao banco
+                    self._remove_task(task.id)
+                    if self._archived is not None:
+                        self._archived[task.id] = task
+                        self._archive_order.add(task.id, self._order_key(task))
+                self._archive_version = self.version
+
+            self.logger.info(f"{len(old)} tarefas concluídas movidas para o arquivo")
+            return len(old)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao arquivar tarefas: {e}")
+            return 0
+
+    def _archive_batch(self, tasks: List[TaskRecord]) -> List[TaskRecord]:
+        """
+        Grava o segmento e remove as tarefas do banco (roda na thread de E/S).
+
+        Tudo acontece sob o lock do backend, que vale entre processos: dois
+        processos não arquivam as mesmas tarefas. Se outro processo gravou
+        no banco desde a última leitura, nada é feito; o arquivamento fica
+        para a próxima verificação, depois do refresh.
 
         Args:
-            title: Título da tarefa
-            description: Descrição detalhada
-            priority: Prioridade (low, medium, high)
-            due_date: Data limite opcional, formato ISO
+            tasks: Candidatas, escolhidas sob o lock de escrita
 
         Returns:
-            Confirmação da criação
+            Tarefas arquivadas (vazia se o banco mudou)
+        """
+        with self.storage.lock:
+            if self.storage.stale():
+                return []
+            with self._write_lock:
+                tasks = [task for task in tasks if self._tasks_by_id.get(task.id) is task]
+            ids = {task.id for task in tasks}
+            if not ids:
+                return []
+
+            def snapshot() -> Dict[str, Any]:
+                data = self._snapshot()
+                data['tasks'] = [t for t in data['tasks'] if t['id'] not in ids]
+                return data
+
+            self.archive.write([task.to_dict() for task in tasks])
+            self.storage.commit([('del_task', task.id) for task in tasks], snapshot)
+        return tasks
+
+    async def _delete_archived(self, task_ids: List[int]) -> List[TaskRecord]:
+        """
+        Deleta tarefas do arquivo (marcadas no manifesto, ver ``ArchiveStore.remove``).
+
+        Args:
+            task_ids: IDs procurados no arquivo
+
+        Returns:
+            Tarefas arquivadas deletadas (ids fora do arquivo são ignorados)
         """
+        if not task_ids or not self.archive.count():
+            return []
+        with self._write_lock:
+            archived = self._archived_tasks()
+            tasks = [archived[task_id] for task_id in task_ids if task_id in archived]
+        if not tasks:
+            return []
+
+        await self._run_io(self._remove_archived, tasks)
+        with self._write_lock:
+            if self._archived is not None:
+                for task in tasks:
+                    if self._archived.pop(task.id, None) is not None:
+                        self._archive_order.remove(task.id)
+            self._touch()
+        return tasks
+
+    def _remove_archived(self, tasks: List[TaskRecord]):
+        """Marca as tarefas como removidas no arquivo, sob o lock do backend (roda na thread de E/S)."""
+        with self.storage.lock:
+            self.archive.remove([task.to_dict() for task in tasks])
+
+    async def flush(self):
+        """Aguarda a gravação das mutações ainda pendentes (lote e thread de E/S)."""
+        if self._writer:
+            await asyncio.wrap_future(self._writer.flush())
+        await self._run_io(lambda: None)
+
+    async def cleanup(self):
+        """Consolida os dados pendentes e libera o backend."""
         try:
-            title = validate_string(title, max_length=200)
-            description = validate_string(description, max_length=1000)
+            if self._writer:
+                # Fora da thread de E/S: o último lote ainda passa por ela
+                await asyncio.get_running_loop().run_in_executor(None, self._writer.close)
+            await self._run_io(self.storage.checkpoint, self._snapshot)
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar dados: {e}")
+        await self._run_io(self.storage.close)
+        self._io.shutdown(wait=True)
+        self.reminders.close()
+        await super().cleanup()
+
+    def select_tasks(self, status: str = "all", limit: int = 20, cursor: Optional[str] = None) -> Page:
+        """
+        Seleciona uma página de tarefas na ordem de exibição (pendentes, prioridade).
+
+        Args:
+            status: Filtro de status (all, pending, completed)
+            limit: Número máximo de tarefas
+            cursor: Cursor devolvido pela página anterior (vazio = primeira)
+
+        Returns:
+            Página com as tarefas, o total filtrado, quantas restam e o
+            cursor da próxima página (None se for a última)
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        after = decode_cursor('tasks', cursor)
+        limit = max(limit, 0)
+
+        if self.storage.queryable:
+            items, total, remaining = self.storage.query_tasks(status, limit, after)
+            items = [TaskRecord.from_dict(t) for t in items]
+        else:
+            keys = self._status_keys(status)
+            position = ((bool(after[0]), after[1]), after[2]) if after else None
+            ids = islice(self._iter_task_ids(keys, position), limit)
+            items = [self._tasks_by_id.get(task_id) or self._archived[task_id] for task_id in ids]
+            total = sum(self._task_order.count(key) for key in keys) + self._archived_count(keys)
+            remaining = total - len(items)
+            if items:
+                last = (self._order_key(items[-1]), items[-1]['id'])
+                remaining = self._task_order.count_after(keys, last) + self._archived_count(keys, last)
+
+        next_cursor = None
+        if items and remaining:
+            last = items[-1]
+            completed, rank = self._order_key(last)
+            next_cursor = encode_cursor('tasks', [int(completed), rank, last['id']])
+        return Page(items, total, remaining, next_cursor)
+
+    def select_notes(self, limit: int = 10, cursor: Optional[str] = None) -> Page:
+        """
+        Seleciona uma página de notas, das mais recentes para as mais antigas.
+
+        Args:
+            limit: Número máximo de notas
+            cursor: Cursor devolvido pela página anterior (vazio = primeira)
+
+        Returns:
+            Página com as notas, o total, quantas restam e o próximo cursor
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        before = decode_cursor('notes', cursor)
+        limit = max(limit, 0)
+
+        if self.storage.queryable:
+            items, total, remaining = self.storage.query_notes(limit, before)
+            items = [NoteRecord.from_dict(n) for n in items]
+        else:
+            entries = list(islice(self._note_order.iter_desc(before), limit))
+            items = [self._notes_by_id[note_id] for _, note_id in entries]
+            total = len(self._note_order)
+            if entries:
+                remaining = self._note_order.count_before(entries[-1])
+            else:
+                remaining = self._note_order.count_before(before) if before else total
+
+        next_cursor = None
+        if items and remaining:
+            next_cursor = encode_cursor('notes', [items[-1]['created_at'], items[-1]['id']])
+        return Page(items, total, remaining, next_cursor)
+
+    @staticmethod
+    def _status_keys(status: str) -> List[Tuple[bool, int]]:
+        """Grupos (concluída, prioridade) de um filtro de status, em ordem."""
+        ranks = sorted(PRIORITY_RANK.values())
+        states = {'pending': [False], 'completed': [True]}.get(status, [False, True])
+        return [(done, rank) for done in states for rank in ranks]
 
-            if priority not in ['low', 'medium', 'high']:
-                priority = 'medium'
+    def select_notes_by_tag(self, tag: str, limit: int = 10, cursor: Optional[str] = None) -> Page:
+        """
+        Seleciona uma página de notas com a tag, das mais novas para as mais antigas.
+
+        Args:
+            tag: Tag procurada (sem diferenciar maiúsculas nem acentos)
+            limit: Número máximo de notas
+            cursor: Cursor devolvido pela página anterior (vazio = primeira)
+
+        Returns:
+            Página com as notas, o total da tag, quantas restam e o próximo cursor
+
+        Raises:
+            ValueError: Se o cursor for inválido ou de outra tag
+        """
+        key = fold(tag.strip())
+        after = decode_cursor('tag', cursor)
+        if after and after[0] != key:
+            raise ValueError("Cursor inválido para esta tag")
 
-            task_id = self.next_task_id
+        ids = self._note_tags.ids_for(tag)
+        end = ids.bisect_left(after[1]) if after else len(ids)
+        start = max(end - max(limit, 0), 0)
+        items = [self._notes_by_id[note_id] for note_id in islice(ids.iter_before(end), end - start)]
+
+        next_cursor = encode_cursor('tag', [key, ids[start]]) if items and start else None
+        return Page(items, len(ids), start, next_cursor)
+
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        """Retorna pares (tag, quantidade de notas), das mais usadas para as menos."""
+        return self._note_tags.counts()
+
+    def get_task_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contagens de tarefas por status e por prioridade.
+
+        Returns:
+            Dicionário com total, pending, completed (inclui archived),
+            archived, priority (pendentes) e notes
+        """
+        if self.storage.queryable:
+            return self.storage.task_stats()
+
+        priority = {p: self._task_order.count((False, rank)) for p, rank in PRIORITY_RANK.items()}
+        pending = sum(priority.values())
+        archived = self.archive.count()
+        return {
+            'total': len(self._tasks_by_id) + archived,
+            'pending': pending,
+            'completed': len(self._tasks_by_id) - pending + archived,
+            'archived': archived,
+            'priority': priority,
+            'notes': len(self._notes_by_id)
+        }
+
+    def select_due_tasks(self, within_hours: float = 24, limit: int = 20) -> Page:
+        """
+        Seleciona tarefas pendentes que vencem nas próximas horas.
+
+        Args:
+            within_hours: Janela a partir de agora, em horas
+            limit: Número máximo de tarefas
+
+        Returns:
+            Página com as tarefas, do prazo mais próximo para o mais distante
+        """
+        now = now_timestamp()
+        return self._select_due(now, now + int(within_hours * 3_600_000_000), limit)
+
+    def select_overdue_tasks(self, limit: int = 20) -> Page:
+        """
+        Seleciona tarefas pendentes com prazo já vencido.
+
+        Args:
+            limit: Número máximo de tarefas
+
+        Returns:
+            Página com as tarefas, das mais atrasadas para as menos
+        """
+        return self._select_due(None, now_timestamp(), limit)
+
+    def _select_due(self, low: Optional[int], high: int, limit: int) -> Page:
+        """Consulta de intervalo no índice de prazos (``low <= prazo < high``)."""
+        entries = islice(self._task_due.iter_range(low, high), max(limit, 0))
+        items = [self._tasks_by_id[task_id] for _, task_id in entries]
+        total = self._task_due.count_range(low, high)
+        return Page(items, total, total - len(items), None)
+
+    def select_ready_tasks(self, limit: int = 20) -> Page:
+        """
+        Seleciona tarefas pendentes que não esperam nenhuma tarefa aberta.
+
+        O índice de prontas é mantido a cada mutação, então a consulta só
+        percorre as tarefas devolvidas.
+
+        Args:
+            limit: Número máximo de tarefas
+
+        Returns:
+            Página com as tarefas, por prioridade e id
+        """
+        keys = sorted(PRIORITY_RANK.values())
+        items = [self._tasks_by_id[task_id]
+                 for task_id in islice(self._task_ready.iter_ids(keys), max(limit, 0))]
+        total = sum(self._task_ready.count(key) for key in keys)
+        return Page(items, total, total - len(items), None)
+
+    def select_agenda(self, days: float = 7, limit: int = 50) -> Page:
+        """
+        Seleciona as pendentes com prazo até o fim da janela, com as ocorrências das recorrentes.
+
+        As ocorrências são geradas pela regra de cada recorrente e intercaladas
+        por prazo com as tarefas comuns; só as da página viram registros. A
+        ocorrência atual de cada recorrente aparece mesmo se atrasada; as
+        seguintes, a partir de agora.
+
+        Args:
+            days: Tamanho da janela a partir de agora, em dias
+            limit: Número máximo de itens
+
+        Returns:
+            Página com as tarefas (cada ocorrência com o seu prazo), por prazo
+        """
+        now = now_timestamp()
+        high = now + int(days * 86_400_000_000)
+        single = ((due, task_id, None) for due, task_id in self._task_due.iter_range(None, high)
+                  if task_id not in self._task_recurring)
+        series = [self._series_occurrences(self._tasks_by_id[task_id], now, high)
+                  for task_id in self._task_recurring]
+
+        items, total = [], 0
+        for due, task_id, moment in heapq.merge(single, *series):
+            total += 1
+            if len(items) < limit:
+                task = self._tasks_by_id[task_id]
+                if moment is not None and due != task.due_ts:
+                    task = copy.copy(task)
+                    task.due_date = format_occurrence(moment, is_date_only(task.due_date))
+                items.append(task)
+        return Page(items, total, total - len(items), None)
+
+    @staticmethod
+    def _series_occurrences(task: TaskRecord, now: int, high: int):
+        """Ocorrências de uma recorrente antes de ``high``: a atual e as a partir de ``now``."""
+        for due, moment in occurrences(parse_rule(task.recurrence), to_datetime(task.due_ts),
+                                       task.exceptions):
+            if due >= high:
+                return
+            if due >= now or due == task.due_ts:
+                yield due, task.id, moment
+
+    def select_critical_path(self, task_id: Optional[int] = None) -> List[TaskRecord]:
+        """
+        Maior cadeia de tarefas pendentes que precisam ser feitas em sequência.
+
+        Args:
+            task_id: Se informado, a maior cadeia que termina nesta tarefa
+
+        Returns:
+            Tarefas na ordem de execução (vazia se não houver dependências abertas)
+        """
+        return [self._tasks_by_id[i] for i in self._graph.critical_path(task_id)]
+
+    def select_query(self, query: str, limit: int = 20, cursor: Optional[str] = None) -> Page:
+        """
+        Seleciona tarefas com a linguagem de consulta (ver ``query``).
+
+        Args:
+            query: Consulta, por exemplo ``priority:high due<2026-11-01 sort:-created``
+            limit: Número máximo de tarefas
+            cursor: Cursor devolvido pela página anterior da mesma consulta
+
+        Returns:
+            Página com as tarefas, o total, quantas restam e o próximo cursor
+
+        Raises:
+            ValueError: Se a consulta ou o cursor forem inválidos
+        """
+        parsed = parse_query(query)
+        offset = 0
+        position = decode_cursor('query', cursor)
+        if position is not None:
+            if position[0] != query or not isinstance(position[1], int):
+                raise ValueError("Cursor inválido para esta consulta")
+            offset = position[1]
+
+        matches = sort_tasks(list(self._query_candidates(parsed)), parsed.sort)
+        items = matches[offset:offset + max(limit, 0)]
+        remaining = max(len(matches) - offset - len(items), 0)
+
+        next_cursor = None
+        if items and remaining:
+            next_cursor = encode_cursor('query', [query, offset + len(items)])
+        return Page(items, len(matches), remaining, next_cursor)
+
+    def _query_candidates(self, query: Query) -> Iterator[TaskRecord]:
+        """
+        Tarefas que satisfazem a consulta.
+
+        Parte do índice mais seletivo entre os aplicáveis (ids, texto, prazo
+        das pendentes, grupos de status e prioridade) e confere os demais
+        filtros tarefa a tarefa; sem nenhum índice aplicável, percorre tudo.
+        """
+        statuses = {'all': (False, True), 'pending': (False,), 'completed': (True,)}[query.status]
+        ranks = sorted(query.ranks) if query.ranks is not None else sorted(PRIORITY_RANK.values())
+        keys = [(completed, rank) for completed in statuses for rank in ranks]
+
+        sources: List[Tuple[int, Callable[[], Any]]] = []
+        if query.ids is not None:
+            sources.append((len(query.ids), lambda: sorted(query.ids)))
+        if query.text:
+            with self._reading():
+                found = [task_id for task_id, _ in self._task_text.search(' '.join(query.text))]
+            sources.append((len(found), lambda: found))
+        if query.due is not None and query.status == 'pending':
+            low, high = query.due
+            sources.append((self._task_due.count_range(low, high),
+                            lambda: (task_id for _, task_id in self._task_due.iter_range(low, high))))
+        if query.status != 'all' or query.ranks is not None:
+            sources.append((sum(self._task_order.count(key) for key in keys),
+                            lambda: self._task_order.iter_ids(keys)))
+
+        if sources:
+            ids = min(sources, key=lambda source: source[0])[1]()
+            hot = (task for task in map(self._tasks_by_id.get, ids) if task is not None)
+        else:
+            hot = iter(self.tasks)
+        yield from filter(query.matches, hot)
+
+        # Concluídas arquivadas não estão nos índices: só o filtro, se puderem casar
+        if True in statuses and any(self.archive.count(rank) for rank in ranks):
+            yield from filter(query.matches, list(self._archived_tasks().values()))
+
+    def find_tasks(self, query: str) -> List[TaskRecord]:
+        """
+        Busca tarefas por palavras do título ou da descrição.
+
+        Cada palavra da consulta casa por prefixo, sem diferenciar
+        maiúsculas nem acentos ("reuniao" encontra "Reunião").
+
+        Args:
+            query: Texto para buscar
+
+        Returns:
+            Tarefas encontradas, das mais relevantes para as menos
+        """
+        if self.storage.queryable:
+            return [TaskRecord.from_dict(t) for t in self.storage.search_tasks(query)]
+
+        with self._reading():
+            found = self._task_text.search(query)
+            matches = [task for task in map(self._tasks_by_id.get, (task_id for task_id, _ in found)) if task]
+
+        # Arquivadas não estão no índice de texto: vêm depois, na ordem dos ids
+        text = Query(text=tuple(dict.fromkeys(tokenize(query))))
+        if text.text and self.archive.count():
+            archived = self._archived_tasks()
+            matches.extend(task for task in sorted(archived.values(), key=lambda t: t.id)
+                           if task.id not in self._tasks_by_id and text.matches(task))
+        return matches
+
+    def find_notes(self, query: str, limit: int = 10) -> List[Tuple[NoteRecord, float]]:
+        """
+        Busca notas por título, tags e conteúdo, com ranking BM25.
+
+        Args:
+            query: Texto para buscar (palavras casam por prefixo, sem acentos)
+            limit: Número máximo de notas
+
+        Returns:
+            Pares (nota, relevância), das mais relevantes para as menos
+        """
+        if not self._note_text_ready:
+            # Índice montado uma única vez, no objeto vivo; a view leva uma cópia
+            live = self._live
+            with live._write_lock:
+                if not live._note_text_ready:
+                    for note in live._notes_by_id.values():
+                        live._index_note_text(note)
+                    live._note_text_ready = True
+                if live is not self:
+                    self._note_text = live._note_text.copy()
+                    self._note_text_ready = True
+
+        with self._reading():
+            found = self._note_text.search(query, limit)
+            # Numa view, a cópia montada depois dela pode ter notas mais novas
+            return [(self._notes_by_id[note_id], score)
+                    for note_id, score in found if note_id in self._notes_by_id]
+
+    def _build_task(self, title: str, description: str = "", priority: str = "medium",
+                    due_date: str = "", recurrence: str = "") -> TaskRecord:
+        """Valida os campos e monta uma tarefa ainda sem id."""
+        title = validate_string(title, max_length=200)
+        description = validate_string(description or "", min_length=0, max_length=1000)
+
+        if priority not in ['low', 'medium', 'high']:
+            priority = 'medium'
+
+        if recurrence:
+            rule = parse_rule(recurrence)
+            # Sem prazo, a série começa hoje; o prazo vira a primeira ocorrência da regra
+            due_date = due_date or datetime.now().date().isoformat()
+            stamp = parse_due(due_date)
+            if stamp is None:
+                raise ValueError(f"Prazo inválido para tarefa recorrente: {due_date}")
+            first = next(occurrences(rule, to_datetime(stamp)), None)
+            if first is None:
+                raise ValueError(f"A recorrência {recurrence} não gera nenhuma ocorrência")
+            if first[0] != stamp:
+                due_date = format_occurrence(first[1], is_date_only(due_date))
+            recurrence = str(rule)
+
+        return TaskRecord(None, title, description, priority, due_date or "", recurrence=recurrence)
+
+    def _insert_task(self, task: TaskRecord) -> TaskRecord:
+        """Atribui id a uma tarefa montada e a inclui nos índices."""
+        with self._write_lock:
+            task.id = self.next_task_id
             self.next_task_id += 1
+            self._tasks_by_id[task.id] = task
+            self._index_task(task)
+        return task
+
+    def _replace_task(self, task: TaskRecord) -> TaskRecord:
+        """Inclui ou substitui uma tarefa (com id) no mapa e nos índices."""
+        with self._write_lock:
+            old = self._tasks_by_id.get(task.id)
+            if old:
+                self._unindex_task(old)
+            self._tasks_by_id[task.id] = task
+            self._index_task(task)
+        return task
+
+    def _build_note(self, title: str, content: str, tags: str = "") -> NoteRecord:
+        """Valida os campos e monta uma nota ainda sem id."""
+        title = validate_string(title, max_length=200)
+        content = validate_string(content, max_length=5000)
+
+        tag_list = [tag.strip() for tag in tags.split(',')] if tags else []
+        return NoteRecord(None, title, content, tag_list)
+
+    def _insert_note(self, note: NoteRecord) -> NoteRecord:
+        """Atribui id a uma nota montada e a inclui nos índices."""
+        with self._write_lock:
+            note.id = self.next_note_id
+            self.next_note_id += 1
+            self._notes_by_id[note.id] = note
+            self._index_note(note)
+        return note
+
+    async def create_task(self, title: str, description: str = "", priority: str = "medium",
+                          due_date: str = "", recurrence: str = "") -> str:
+        """
+        Cria uma nova tarefa.
 
-            task = {
-                'id': task_id,
-                'title': title,
-                'description': description,
-                'priority': priority,
-                'due_date': due_date,
-                'completed': False,
-                'created_at': datetime.now().isoformat(),
-                'completed_at': None
-            }
+        Args:
+            title: Título da tarefa
+            description: Descrição detalhada
+            priority: Prioridade (low, medium, high)
+            due_date: Data limite opcional (ISO "2026-11-01T14:00" ou "01/11/2026");
+                numa tarefa recorrente, a primeira ocorrência (padrão: hoje)
+            recurrence: Regra de repetição opcional: daily, weekly, monthly,
+                yearly, weekdays ou RRULE ("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10")
 
-            self.tasks.append(task)
-            await self.save_data()
+        Returns:
+            Confirmação da criação
+        """
+        try:
+            task = await self.add_task(title, description, priority, due_date, recurrence)
 
-            self.logger.info(f"Tarefa criada: {title}")
-            return f"Tarefa #{task_id} '{title}' criada com sucesso"
+            self.logger.info(f"Tarefa criada: {task['title']}")
+            return f"Tarefa #{task['id']} '{task['title']}' criada com sucesso"
 
         except Exception as e:
             self.logger.error(f"Erro ao criar tarefa: {e}")
             return f"Erro ao criar tarefa: {str(e)}"
 
-    async def list_tasks(self, status: str = "all", limit: int = 20) -> str:
+    async def list_tasks(self, status: str = "all", limit: int = 20, cursor: str = "") -> str:
         """
         Lista tarefas.
 
         Args:
             status: Filtro de status (all, pending, completed)
             limit: Número máximo de tarefas
+            cursor: Cursor da próxima página, informado no fim da listagem anterior
 
         Returns:
             Lista formatada de tarefas
         """
         try:
-            filtered_tasks = self.tasks
+            return self._cached_render(('list_tasks', status, limit, cursor),
+                                       lambda: self._render_tasks(status, limit, cursor))
 
-            if status == "pending":
-                filtered_tasks = [t for t in self.tasks if not t['completed']]
-            elif status == "completed":
-                filtered_tasks = [t for t in self.tasks if t['completed']]
+        except Exception as e:
+            self.logger.error(f"Erro ao listar tarefas: {e}")
+            return f"Erro ao listar tarefas: {str(e)}"
 
-            # Ordenar por prioridade e data
-            priority_order = {'high': 0, 'medium': 1, 'low': 2}
-            filtered_tasks = sorted(filtered_tasks, 
-                                  key=lambda x: (x['completed'], priority_order.get(x['priority'], 1)))
+    def _render_tasks(self, status: str, limit: int, cursor: str) -> str:
+        """Monta o texto de ``list_tasks``."""
+        page = self.select_tasks(status, limit, cursor)
 
-            if not filtered_tasks:
-                return f"Nenhuma tarefa encontrada com status '{status}'"
+        if not page.total:
+            return f"Nenhuma tarefa encontrada com status '{status}'"
 
-            result = f"Tarefas ({status}):\n"
-            for task in filtered_tasks[:limit]:
-                status_icon = "✅" if task['completed'] else "⏳"
-                priority_icon = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(task['priority'], '⚪')
+        parts = [f"Tarefas ({status}):\n"]
+        parts.extend(self._format_task(task) for task in page.items)
 
-                result += f"{status_icon} #{task['id']} {priority_icon} {task['title']}\n"
+        if page.next_cursor:
+            parts.append(f"... e mais {page.remaining} tarefas (próxima página: cursor=\"{page.next_cursor}\")")
 
-                if task['description']:
-                    result += f"   {task['description'][:100]}{'...' if len(task['description']) > 100 else ''}\n"
+        return ''.join(parts)
 
-                if task['due_date']:
-                    result += f"   📅 Prazo: {task['due_date']}\n"
+    @staticmethod
+    def _format_task(task: TaskRecord, extra: str = "") -> str:
+        """Formata uma tarefa para as listagens (``extra``: linhas adicionais)."""
+        status_icon = "✅" if task['completed'] else "⏳"
+        priority_icon = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(task['priority'], '⚪')
 
-                if task['completed']:
-                    result += f"   ✅ Concluída em: {task['completed_at']}\n"
+        lines = [f"{status_icon} #{task['id']} {priority_icon} {task['title']}\n"]
 
-                result += "\n"
+        if task['description']:
+            lines.append(f"   {task['description'][:100]}{'...' if len(task['description']) > 100 else ''}\n")
 
-            if len(filtered_tasks) > limit:
-                result += f"... e mais {len(filtered_tasks) - limit} tarefas"
+        if task['due_date']:
+            lines.append(f"   📅 Prazo: {task['due_date']}\n")
 
-            return result
+        if task['completed']:
+            lines.append(f"   ✅ Concluída em: {task['completed_at']}\n")
+
+        if task.blocked_by:
+            lines.append(f"   ⛔ Bloqueada por: {', '.join(f'#{i}' for i in task.blocked_by)}\n")
+
+        if task.parent_id is not None:
+            lines.append(f"   ↳ Subtarefa de #{task.parent_id}\n")
+
+        if task.recurrence:
+            skipped = f" (pulando {len(task.exceptions)})" if task.exceptions else ""
+            lines.append(f"   🔁 Repete: {task.recurrence}{skipped}\n")
+
+        lines.append(extra)
+        lines.append("\n")
+        return ''.join(lines)
+
+    def _mark_completed(self, task: TaskRecord) -> TaskRecord:
+        """
+        Marca uma tarefa como concluída.
+
+        A alteração é feita numa cópia, que substitui a original no mapa: o
+        registro antigo pode estar numa versão publicada por ``view``.
+
+        Returns:
+            O registro concluído
+        """
+        with self._write_lock:
+            task = copy.copy(task)
+            task.completed = True
+            task.completed_ts = now_timestamp()
+            self._tasks_by_id[task.id] = task
+            self._task_order.add(task.id, self._order_key(task))
+            self._task_due.remove(task.id)
+            self._task_recurring.discard(task.id)
+            self.reminders.cancel(task.id)
+            self._refresh_ready(self._graph.status_changed(task.id) | {task.id})
+            self._touch()
+        return task
+
+    def _next_occurrence(self, task: TaskRecord) -> Optional[TaskRecord]:
+        """Cópia da tarefa recorrente na ocorrência seguinte (None se a atual era a última)."""
+        moved = advance(parse_rule(task.recurrence), to_datetime(task.due_ts),
+                        task.exceptions, is_date_only(task.due_date))
+        if moved is None:
+            return None
+        task = copy.copy(task)
+        task.due_date, task.recurrence, task.exceptions = moved
+        return task
+
+    def _complete(self, task: TaskRecord) -> TaskRecord:
+        """
+        Conclui uma tarefa; numa recorrente, conclui só a ocorrência atual.
+
+        Returns:
+            O registro concluído, ou a recorrente já na ocorrência seguinte
+        """
+        with self._write_lock:
+            if task.recurrence and task.due_ts is not None:
+                following = self._next_occurrence(task)
+                if following is not None:
+                    return self._replace_task(following)
+            return self._mark_completed(task)
+
+    def _remove_task(self, task_id: int) -> Optional[TaskRecord]:
+        """Remove uma tarefa do mapa e dos índices."""
+        with self._write_lock:
+            task = self._tasks_by_id.pop(task_id, None)
+            if task:
+                self._unindex_task(task)
+        return task
+
+    @staticmethod
+    def _format_due(task: TaskRecord, now: int) -> str:
+        """Descreve o prazo relativo a agora ("vence em 3h", "atrasada há 2d")."""
+        hours = abs(task.due_ts - now) // 3_600_000_000
+        span = f"{hours // 24}d" if hours >= 48 else f"{hours}h"
+        if task.due_ts >= now:
+            return f"   ⏰ Vence em {span}\n" if hours else "   ⏰ Vence em menos de 1h\n"
+        return f"   ⚠️ Atrasada há {span}\n" if hours else "   ⚠️ Atrasada há menos de 1h\n"
+
+    def _render_due(self, header: str, empty: str, page: Page) -> str:
+        """Monta o texto das listagens por prazo."""
+        if not page.total:
+            return empty
+
+        now = now_timestamp()
+        parts = [header]
+        parts.extend(self._format_task(task, self._format_due(task, now)) for task in page.items)
+
+        if page.remaining:
+            parts.append(f"... e mais {page.remaining} tarefas")
+
+        return ''.join(parts)
+
+    async def list_due_tasks(self, within_hours: float = 24, limit: int = 20) -> str:
+        """
+        Lista tarefas pendentes que vencem em breve.
+
+        Args:
+            within_hours: Janela a partir de agora, em horas
+            limit: Número máximo de tarefas
+
+        Returns:
+            Lista formatada, do prazo mais próximo para o mais distante
+        """
+        try:
+            page = self.select_due_tasks(within_hours, limit)
+            return self._render_due(
+                f"Tarefas que vencem nas próximas {within_hours:g}h ({page.total}):\n",
+                f"Nenhuma tarefa vence nas próximas {within_hours:g}h",
+                page
+            )
 
         except Exception as e:
-            self.logger.error(f"Erro ao listar tarefas: {e}")
-            return f"Erro ao listar tarefas: {str(e)}"
+            self.logger.error(f"Erro ao listar tarefas por prazo: {e}")
+            return f"Erro ao listar tarefas por prazo: {str(e)}"
+
+    async def list_overdue_tasks(self, limit: int = 20) -> str:
+        """
+        Lista tarefas pendentes com prazo vencido.
+
+        Args:
+            limit: Número máximo de tarefas
+
+        Returns:
+            Lista formatada, das mais atrasadas para as menos
+        """
+        try:
+            page = self.select_overdue_tasks(limit)
+            return self._render_due(
+                f"Tarefas atrasadas ({page.total}):\n",
+                "Nenhuma tarefa atrasada 🎉",
+                page
+            )
+
+        except Exception as e:
+            self.logger.error(f"Erro ao listar tarefas atrasadas: {e}")
+            return f"Erro ao listar tarefas atrasadas: {str(e)}"
 
     async def complete_task(self, task_id: int) -> str:
         """
@@ -206,7 +1378,7 @@ class TasksTools(BaseModule):
             Confirmação da conclusão
         """
         try:
-            task = next((t for t in self.tasks if t['id'] == task_id), None)
+            task = self.get_task(task_id)
 
             if not task:
                 return f"Tarefa #{task_id} não encontrada"
@@ -214,10 +1386,14 @@ class TasksTools(BaseModule):
             if task['completed']:
                 return f"Tarefa #{task_id} já está concluída"
 
-            task['completed'] = True
-            task['completed_at'] = datetime.now().isoformat()
+            previous_due = task.due_date
+            task = self._complete(task)
+            await self._commit(('put_task', task))
 
-            await self.save_data()
+            if not task.completed:
+                self.logger.info(f"Ocorrência concluída: {task['title']} ({previous_due})")
+                return (f"Ocorrência de {previous_due} da tarefa #{task_id} '{task['title']}' "
+                        f"concluída! 🎉 Próxima: {task.due_date}")
 
             self.logger.info(f"Tarefa concluída: {task['title']}")
             return f"Tarefa #{task_id} '{task['title']}' marcada como concluída! 🎉"
@@ -241,14 +1417,16 @@ class TasksTools(BaseModule):
             if not confirm:
                 return f"ATENÇÃO: Deletar tarefa #{task_id} permanentemente? Use confirm=True para confirmar."
 
-            task = next((t for t in self.tasks if t['id'] == task_id), None)
+            task = self._remove_task(task_id)
+            if task:
+                await self._commit(('del_task', task_id))
+            else:
+                archived = await self._delete_archived([task_id])
+                task = archived[0] if archived else None
 
             if not task:
                 return f"Tarefa #{task_id} não encontrada"
 
-            self.tasks = [t for t in self.tasks if t['id'] != task_id]
-            await self.save_data()
-
             self.logger.warning(f"Tarefa deletada: {task['title']}")
             return f"Tarefa #{task_id} '{task['title']}' deletada permanentemente"
 
@@ -269,97 +1447,741 @@ class TasksTools(BaseModule):
             Confirmação da criação
         """
         try:
-            title = validate_string(title, max_length=200)
-            content = validate_string(content, max_length=5000)
+            note = await self.add_note(title, content, tags)
 
-            tag_list = [tag.strip() for tag in tags.split(',')] if tags else []
-            note_id = self.next_note_id
-            self.next_note_id += 1
+            self.logger.info(f"Nota criada: {note['title']}")
+            return f"Nota #{note['id']} '{note['title']}' criada com sucesso"
 
-            note = {
-                'id': note_id,
-                'title': title,
-                'content': content,
-                'tags': tag_list,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
+        except Exception as e:
+            self.logger.error(f"Erro ao criar nota: {e}")
+            return f"Erro ao criar nota: {str(e)}"
 
-            self.notes.append(note)
-            await self.save_data()
+    async def add_task(self, title: str, description: str = "", priority: str = "medium",
+                       due_date: str = "", recurrence: str = "") -> TaskRecord:
+        """
+        Cria uma tarefa e devolve o registro gravado.
 
-            self.logger.info(f"Nota criada: {title}")
-            return f"Nota #{note_id} '{title}' criada com sucesso"
+        Args:
+            title: Título da tarefa
+            description: Descrição detalhada
+            priority: Prioridade (low, medium, high)
+            due_date: Data limite opcional (ver ``create_task``)
+            recurrence: Regra de repetição opcional (ver ``create_task``)
+
+        Returns:
+            Tarefa criada, com o id que ficou no banco (trocado se outro
+            processo gravou o mesmo id antes)
+
+        Raises:
+            ValueError: Se algum campo for inválido
+        """
+        task = self._insert_task(self._build_task(title, description, priority, due_date, recurrence))
+        remap = await self._commit(('put_task', task))
+        task, = self._stored('task', [task], remap)
+        return task
+
+    async def bulk_create_tasks(self, items: List[Dict[str, Any]]) -> List[TaskRecord]:
+        """
+        Cria várias tarefas com uma única gravação.
+
+        Todas as tarefas são validadas antes de qualquer inclusão; se alguma
+        for inválida, nenhuma é criada.
+
+        Args:
+            items: Dicionários com title, description, priority, due_date e recurrence
+
+        Returns:
+            Tarefas criadas
+
+        Raises:
+            ValueError: Se algum item for inválido
+        """
+        built, errors = [], []
+        for pos, item in enumerate(items, 1):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("item deve ser um objeto")
+                built.append(self._build_task(
+                    item.get('title', ''),
+                    item.get('description', ''),
+                    item.get('priority', 'medium'),
+                    item.get('due_date', ''),
+                    item.get('recurrence', '')
+                ))
+            except ValueError as e:
+                errors.append(f"item {pos}: {e}")
+
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        with self._write_lock:
+            created = [self._insert_task(task) for task in built]
+        if created:
+            remap = await self._commit(*(('put_task', task) for task in created))
+            created = self._stored('task', created, remap)
+        return created
+
+    async def bulk_complete_tasks(self, task_ids: List[int]) -> Tuple[List[TaskRecord], List[int]]:
+        """
+        Conclui várias tarefas com uma única gravação.
+
+        Args:
+            task_ids: IDs das tarefas
+
+        Returns:
+            Tupla (tarefas concluídas agora, IDs não encontrados)
+        """
+        completed, missing = [], []
+        with self._write_lock:
+            for task_id in dict.fromkeys(task_ids):
+                task = self.get_task(task_id)
+                if not task:
+                    missing.append(task_id)
+                elif not task['completed']:
+                    completed.append(self._complete(task))
+
+        if completed:
+            await self._commit(*(('put_task', task) for task in completed))
+        return completed, missing
+
+    async def bulk_delete_tasks(self, task_ids: List[int]) -> Tuple[List[TaskRecord], List[int]]:
+        """
+        Deleta várias tarefas com uma única gravação.
+
+        Args:
+            task_ids: IDs das tarefas
+
+        Returns:
+            Tupla (tarefas deletadas, IDs não encontrados)
+        """
+        deleted, missing = [], []
+        with self._write_lock:
+            for task_id in dict.fromkeys(task_ids):
+                task = self._remove_task(task_id)
+                if task:
+                    deleted.append(task)
+                else:
+                    missing.append(task_id)
+
+        if deleted:
+            await self._commit(*(('del_task', task['id']) for task in deleted))
+        if missing:
+            # Não estão no banco: podem estar no arquivo
+            archived = await self._delete_archived(missing)
+            found = {task.id for task in archived}
+            deleted.extend(archived)
+            missing = [task_id for task_id in missing if task_id not in found]
+        return deleted, missing
+
+    async def add_note(self, title: str, content: str, tags: str = "") -> NoteRecord:
+        """
+        Cria uma nota e devolve o registro gravado.
+
+        Args:
+            title: Título da nota
+            content: Conteúdo da nota
+            tags: Tags separadas por vírgula
+
+        Returns:
+            Nota criada, com o id que ficou no banco (trocado se outro
+            processo gravou o mesmo id antes)
+
+        Raises:
+            ValueError: Se algum campo for inválido
+        """
+        note = self._insert_note(self._build_note(title, content, tags))
+        remap = await self._commit(('put_note', note))
+        note, = self._stored('note', [note], remap)
+        return note
+
+    async def bulk_create_notes(self, items: List[Dict[str, Any]]) -> List[NoteRecord]:
+        """
+        Cria várias notas com uma única gravação (tudo ou nada).
+
+        Args:
+            items: Dicionários com title, content e tags
+
+        Returns:
+            Notas criadas
+
+        Raises:
+            ValueError: Se algum item for inválido
+        """
+        built, errors = [], []
+        for pos, item in enumerate(items, 1):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("item deve ser um objeto")
+                tags = item.get('tags', '')
+                if isinstance(tags, list):
+                    tags = ','.join(tags)
+                built.append(self._build_note(item.get('title', ''), item.get('content', ''), tags))
+            except ValueError as e:
+                errors.append(f"item {pos}: {e}")
+
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        with self._write_lock:
+            created = [self._insert_note(note) for note in built]
+        if created:
+            remap = await self._commit(*(('put_note', note) for note in created))
+            created = self._stored('note', created, remap)
+        return created
+
+    async def create_tasks(self, tasks: List[Dict[str, Any]]) -> str:
+        """
+        Cria várias tarefas de uma vez.
+
+        Args:
+            tasks: Lista de objetos com title e, opcionalmente, description,
+                priority (low, medium, high), due_date e recurrence
+
+        Returns:
+            Confirmação com os IDs criados
+        """
+        try:
+            created = await self.bulk_create_tasks(tasks)
+            if not created:
+                return "Nenhuma tarefa informada"
+
+            self.logger.info(f"{len(created)} tarefas criadas em lote")
+            return f"{len(created)} tarefas criadas com sucesso (#{created[0]['id']} a #{created[-1]['id']})"
 
         except Exception as e:
-            self.logger.error(f"Erro ao criar nota: {e}")
-            return f"Erro ao criar nota: {str(e)}"
+            self.logger.error(f"Erro ao criar tarefas: {e}")
+            return f"Erro ao criar tarefas (nenhuma criada): {str(e)}"
 
-    async def list_notes(self, limit: int = 10) -> str:
+    async def complete_tasks(self, task_ids: List[int]) -> str:
         """
-        Lista notas recentes.
+        Marca várias tarefas como concluídas.
 
         Args:
-            limit: Número máximo de notas
+            task_ids: IDs das tarefas
 
         Returns:
-            Lista formatada de notas
+            Resumo das tarefas concluídas
         """
         try:
-            if not self.notes:
-                return "Nenhuma nota encontrada"
+            completed, missing = await self.bulk_complete_tasks(task_ids)
 
-            # Ordenar por data de criação (mais recentes primeiro)
-            sorted_notes = sorted(self.notes, key=lambda x: x['created_at'], reverse=True)
+            self.logger.info(f"{len(completed)} tarefas concluídas em lote")
+            result = f"{len(completed)} tarefas marcadas como concluídas! 🎉"
+            if missing:
+                result += f"\nNão encontradas: {', '.join(f'#{i}' for i in missing)}"
+            return result
 
-            result = "Notas recentes:\n"
-            for note in sorted_notes[:limit]:
-                result += f"📝 #{note['id']} {note['title']}\n"
-                result += f"   {note['content'][:150]}{'...' if len(note['content']) > 150 else ''}\n"
+        except Exception as e:
+            self.logger.error(f"Erro ao concluir tarefas: {e}")
+            return f"Erro ao concluir tarefas: {str(e)}"
 
-                if note['tags']:
-                    result += f"   🏷️ Tags: {', '.join(note['tags'])}\n"
+    async def delete_tasks(self, task_ids: List[int], confirm: bool = False) -> str:
+        """
+        Deleta várias tarefas.
+
+        Args:
+            task_ids: IDs das tarefas
+            confirm: Confirmação de deleção
 
-                result += f"   📅 {note['created_at'][:19].replace('T', ' ')}\n\n"
+        Returns:
+            Resumo das tarefas deletadas
+        """
+        try:
+            if not confirm:
+                return f"ATENÇÃO: Deletar {len(task_ids)} tarefas permanentemente? Use confirm=True para confirmar."
 
-            if len(self.notes) > limit:
-                result += f"... e mais {len(self.notes) - limit} notas"
+            deleted, missing = await self.bulk_delete_tasks(task_ids)
 
+            self.logger.warning(f"{len(deleted)} tarefas deletadas em lote")
+            result = f"{len(deleted)} tarefas deletadas permanentemente"
+            if missing:
+                result += f"\nNão encontradas: {', '.join(f'#{i}' for i in missing)}"
             return result
 
+        except Exception as e:
+            self.logger.error(f"Erro ao deletar tarefas: {e}")
+            return f"Erro ao deletar tarefas: {str(e)}"
+
+    async def create_notes(self, notes: List[Dict[str, Any]]) -> str:
+        """
+        Cria várias notas de uma vez.
+
+        Args:
+            notes: Lista de objetos com title, content e, opcionalmente, tags
+                (separadas por vírgula)
+
+        Returns:
+            Confirmação com os IDs criados
+        """
+        try:
+            created = await self.bulk_create_notes(notes)
+            if not created:
+                return "Nenhuma nota informada"
+
+            self.logger.info(f"{len(created)} notas criadas em lote")
+            return f"{len(created)} notas criadas com sucesso (#{created[0]['id']} a #{created[-1]['id']})"
+
+        except Exception as e:
+            self.logger.error(f"Erro ao criar notas: {e}")
+            return f"Erro ao criar notas (nenhuma criada): {str(e)}"
+
+    async def list_notes(self, limit: int = 10, cursor: str = "") -> str:
+        """
+        Lista notas recentes.
+
+        Args:
+            limit: Número máximo de notas
+            cursor: Cursor da próxima página, informado no fim da listagem anterior
+
+        Returns:
+            Lista formatada de notas
+        """
+        try:
+            return self._cached_render(('list_notes', limit, cursor),
+                                       lambda: self._render_notes(limit, cursor))
+
         except Exception as e:
             self.logger.error(f"Erro ao listar notas: {e}")
             return f"Erro ao listar notas: {str(e)}"
 
+    def _render_notes(self, limit: int, cursor: str) -> str:
+        """Monta o texto de ``list_notes``."""
+        page = self.select_notes(limit, cursor)
+
+        if not page.total:
+            return "Nenhuma nota encontrada"
+
+        parts = ["Notas recentes:\n"]
+        parts.extend(self._format_note(note) for note in page.items)
+
+        if page.next_cursor:
+            parts.append(f"... e mais {page.remaining} notas (próxima página: cursor=\"{page.next_cursor}\")")
+
+        return ''.join(parts)
+
+    @staticmethod
+    def _format_note(note: NoteRecord) -> str:
+        """Formata uma nota para as listagens."""
+        preview, truncated = note.preview(150)
+        lines = [
+            f"📝 #{note['id']} {note['title']}\n",
+            f"   {preview}{'...' if truncated else ''}\n"
+        ]
+
+        if note['tags']:
+            lines.append(f"   🏷️ Tags: {', '.join(note['tags'])}\n")
+
+        lines.append(f"   📅 {note['created_at'][:19].replace('T', ' ')}\n\n")
+        return ''.join(lines)
+
+    async def list_notes_by_tag(self, tag: str, limit: int = 10, cursor: str = "") -> str:
+        """
+        Lista notas com uma tag.
+
+        Args:
+            tag: Tag procurada (sem diferenciar maiúsculas nem acentos)
+            limit: Número máximo de notas
+            cursor: Cursor da próxima página, informado no fim da listagem anterior
+
+        Returns:
+            Lista formatada de notas com a tag
+        """
+        try:
+            page = self.select_notes_by_tag(tag, limit, cursor)
+
+            if not page.total:
+                return f"Nenhuma nota com a tag '{tag}'"
+
+            parts = [f"Notas com a tag '{tag}' ({page.total}):\n"]
+            parts.extend(self._format_note(note) for note in page.items)
+
+            if page.next_cursor:
+                parts.append(f"... e mais {page.remaining} notas (próxima página: cursor=\"{page.next_cursor}\")")
+
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao listar notas por tag: {e}")
+            return f"Erro ao listar notas por tag: {str(e)}"
+
+    async def list_tags(self, limit: int = 50) -> str:
+        """
+        Lista as tags usadas nas notas, com a quantidade de notas de cada uma.
+
+        Args:
+            limit: Número máximo de tags
+
+        Returns:
+            Lista formatada de tags
+        """
+        try:
+            counts = self.get_tag_counts()
+
+            if not counts:
+                return "Nenhuma tag encontrada"
+
+            parts = ["Tags:\n"]
+            parts.extend(f"🏷️ {tag} ({count})\n" for tag, count in counts[:limit])
+
+            if len(counts) > limit:
+                parts.append(f"... e mais {len(counts) - limit} tags")
+
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao listar tags: {e}")
+            return f"Erro ao listar tags: {str(e)}"
+
     async def search_tasks(self, query: str) -> str:
         """
-        Busca tarefas por texto.
+        Busca tarefas por texto, sem diferenciar acentos.
 
         Args:
-            query: Texto para buscar
+            query: Texto para buscar (palavras casam por prefixo)
 
         Returns:
-            Tarefas encontradas
+            Tarefas encontradas, ordenadas por relevância
         """
         try:
             query = query.lower()
-            matches = []
-
-            for task in self.tasks:
-                if query in task['title'].lower() or query in task['description'].lower():
-                    matches.append(task)
+            matches = self.find_tasks(query)
 
             if not matches:
                 return f"Nenhuma tarefa encontrada com '{query}'"
 
-            result = f"Tarefas encontradas com '{query}':\n"
+            parts = [f"Tarefas encontradas com '{query}':\n"]
             for task in matches:
                 status_icon = "✅" if task['completed'] else "⏳"
-                result += f"{status_icon} #{task['id']} {task['title']}\n"
-                result += f"   {task['description'][:100]}{'...' if len(task['description']) > 100 else ''}\n\n"
+                parts.append(f"{status_icon} #{task['id']} {task['title']}\n")
+                parts.append(f"   {task['description'][:100]}{'...' if len(task['description']) > 100 else ''}\n\n")
 
-            return result
+            return ''.join(parts)
 
         except Exception as e:
             self.logger.error(f"Erro ao buscar tarefas: {e}")
             return f"Erro na busca: {str(e)}"
+
+    async def query_tasks(self, query: str, limit: int = 20, cursor: str = "") -> str:
+        """
+        Busca tarefas com filtros e ordenação combinados numa única consulta.
+
+        Args:
+            query: Termos separados por espaço, por exemplo
+                'priority:high due<2026-11-01 text:"deploy" sort:-created'.
+                Campos: status (pending, completed, all), priority (lista com
+                vírgula), id, due e created (com <, <=, >, >=, :), due:none,
+                due:any, text (ou palavras soltas) e sort (created, due,
+                priority, title, id; "-" para decrescente)
+            limit: Número máximo de tarefas
+            cursor: Cursor da próxima página, informado no fim da listagem anterior
+
+        Returns:
+            Lista formatada das tarefas encontradas
+        """
+        try:
+            return self._cached_render(('query_tasks', query, limit, cursor),
+                                       lambda: self._render_query(query, limit, cursor))
+
+        except ValueError as e:
+            return f"Consulta inválida: {str(e)}"
+        except Exception as e:
+            self.logger.error(f"Erro ao consultar tarefas: {e}")
+            return f"Erro ao consultar tarefas: {str(e)}"
+
+    def _render_query(self, query: str, limit: int, cursor: str) -> str:
+        """Monta o texto de ``query_tasks``."""
+        page = self.select_query(query, limit, cursor)
+
+        if not page.total:
+            return f"Nenhuma tarefa encontrada para '{query}'"
+
+        parts = [f"Tarefas para '{query}' ({page.total}):\n"]
+        parts.extend(self._format_task(task) for task in page.items)
+
+        if page.next_cursor:
+            parts.append(f"... e mais {page.remaining} tarefas (próxima página: cursor=\"{page.next_cursor}\")")
+
+        return ''.join(parts)
+
+    async def add_dependency(self, task_id: int, depends_on: int, kind: str = "blocked_by") -> str:
+        """
+        Faz uma tarefa depender de outra.
+
+        Args:
+            task_id: ID da tarefa que vai esperar (ou da subtarefa, com kind="subtask")
+            depends_on: ID da tarefa bloqueadora (ou da tarefa-mãe, com kind="subtask")
+            kind: "blocked_by" (task_id só pode começar quando depends_on for
+                concluída) ou "subtask" (task_id é subtarefa de depends_on, que
+                só fica pronta quando todas as subtarefas forem concluídas)
+
+        Returns:
+            Confirmação, ou o motivo da recusa (inclusive dependência circular)
+        """
+        try:
+            if kind not in ("blocked_by", "subtask"):
+                return f"Tipo de dependência inválido: {kind} (use blocked_by ou subtask)"
+            if task_id == depends_on:
+                return f"Tarefa #{task_id} não pode depender de si mesma"
+
+            with self._write_lock:
+                task = self._tasks_by_id.get(task_id)
+                other = self._tasks_by_id.get(depends_on)
+                if not task:
+                    return f"Tarefa #{task_id} não encontrada"
+                if not other:
+                    return f"Tarefa #{depends_on} não encontrada"
+
+                # Quem passa a esperar: a própria tarefa, ou a mãe (que espera a subtarefa)
+                waiter, waited = (task_id, depends_on) if kind == "blocked_by" else (depends_on, task_id)
+                cycle = self._graph.find_path(waited, waiter)
+                if cycle:
+                    chain = ' → '.join(f'#{i}' for i in cycle + [waited])
+                    return f"Dependência circular: {chain} (cada tarefa espera a seguinte)"
+
+                task = copy.copy(task)
+                if kind == "blocked_by":
+                    if depends_on in task.blocked_by:
+                        return f"Tarefa #{task_id} já está bloqueada por #{depends_on}"
+                    task.blocked_by = task.blocked_by + (depends_on,)
+                    message = f"Tarefa #{task_id} agora está bloqueada por #{depends_on}"
+                else:
+                    if task.parent_id == depends_on:
+                        return f"Tarefa #{task_id} já é subtarefa de #{depends_on}"
+                    task.parent_id = depends_on
+                    message = f"Tarefa #{task_id} agora é subtarefa de #{depends_on}"
+                self._replace_task(task)
+
+            await self._commit(('put_task', task))
+            return message
+
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar dependência: {e}")
+            return f"Erro ao adicionar dependência: {str(e)}"
+
+    async def remove_dependency(self, task_id: int, depends_on: int) -> str:
+        """
+        Desfaz uma dependência (bloqueio ou vínculo de subtarefa).
+
+        Args:
+            task_id: ID da tarefa que espera (ou da subtarefa)
+            depends_on: ID da tarefa bloqueadora (ou da tarefa-mãe)
+
+        Returns:
+            Confirmação da remoção
+        """
+        try:
+            with self._write_lock:
+                task = self._tasks_by_id.get(task_id)
+                if not task:
+                    return f"Tarefa #{task_id} não encontrada"
+                if depends_on not in task.blocked_by and task.parent_id != depends_on:
+                    return f"Tarefa #{task_id} não depende de #{depends_on}"
+
+                task = copy.copy(task)
+                task.blocked_by = tuple(i for i in task.blocked_by if i != depends_on)
+                if task.parent_id == depends_on:
+                    task.parent_id = None
+                self._replace_task(task)
+
+            await self._commit(('put_task', task))
+            return f"Dependência entre #{task_id} e #{depends_on} removida"
+
+        except Exception as e:
+            self.logger.error(f"Erro ao remover dependência: {e}")
+            return f"Erro ao remover dependência: {str(e)}"
+
+    async def list_ready_tasks(self, limit: int = 20) -> str:
+        """
+        Lista tarefas pendentes que já podem ser feitas (sem bloqueios nem subtarefas abertas).
+
+        Args:
+            limit: Número máximo de tarefas
+
+        Returns:
+            Lista formatada, por prioridade
+        """
+        try:
+            page = self.select_ready_tasks(limit)
+            if not page.total:
+                return "Nenhuma tarefa pronta para começar"
+
+            parts = [f"Tarefas prontas para começar ({page.total}):\n"]
+            parts.extend(self._format_task(task) for task in page.items)
+            if page.remaining:
+                parts.append(f"... e mais {page.remaining} tarefas")
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao listar tarefas prontas: {e}")
+            return f"Erro ao listar tarefas prontas: {str(e)}"
+
+    async def critical_path(self, task_id: int = 0) -> str:
+        """
+        Mostra a maior cadeia de tarefas pendentes que dependem umas das outras.
+
+        Args:
+            task_id: Se informado, a maior cadeia até esta tarefa (0 para todas)
+
+        Returns:
+            Tarefas na ordem em que precisam ser feitas
+        """
+        try:
+            if task_id and task_id not in self._tasks_by_id:
+                return f"Tarefa #{task_id} não encontrada"
+
+            path = self.select_critical_path(task_id or None)
+            if len(path) < 2:
+                return "Nenhuma cadeia de dependências entre tarefas pendentes"
+
+            parts = [f"Caminho crítico ({len(path)} tarefas):\n"]
+            parts.extend(f"{n}. {self._format_task(task)}" for n, task in enumerate(path, 1))
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao calcular caminho crítico: {e}")
+            return f"Erro ao calcular caminho crítico: {str(e)}"
+
+    async def list_agenda(self, days: float = 7, limit: int = 30) -> str:
+        """
+        Lista o que vence nos próximos dias, incluindo as ocorrências das tarefas recorrentes.
+
+        Args:
+            days: Janela a partir de agora, em dias
+            limit: Número máximo de itens
+
+        Returns:
+            Agenda formatada, do prazo mais próximo para o mais distante
+        """
+        try:
+            page = self.select_agenda(days, limit)
+            return self._render_due(
+                f"Agenda dos próximos {days:g} dias ({page.total}):\n",
+                f"Nada vence nos próximos {days:g} dias",
+                page
+            )
+
+        except Exception as e:
+            self.logger.error(f"Erro ao montar agenda: {e}")
+            return f"Erro ao montar agenda: {str(e)}"
+
+    async def skip_occurrence(self, task_id: int, date: str) -> str:
+        """
+        Pula uma ocorrência de uma tarefa recorrente, sem concluí-la.
+
+        Args:
+            task_id: ID da tarefa recorrente
+            date: Data da ocorrência (ISO "2026-11-02" ou "02/11/2026"; com hora
+                se a série tiver horário)
+
+        Returns:
+            Confirmação, com a próxima ocorrência quando a pulada era a atual
+        """
+        try:
+            with self._write_lock:
+                task = self._tasks_by_id.get(task_id)
+                if not task:
+                    return f"Tarefa #{task_id} não encontrada"
+                if not task.recurrence or task.completed:
+                    return f"Tarefa #{task_id} não é uma tarefa recorrente pendente"
+
+                stamp = parse_due(date)
+                if stamp is None:
+                    return f"Data inválida: {date}"
+                # Só a data: vale a ocorrência daquele dia, qualquer que seja a hora
+                day = to_datetime(stamp).date() if is_date_only(date) else None
+                match = None
+                for due, moment in occurrences(parse_rule(task.recurrence), to_datetime(task.due_ts),
+                                               task.exceptions):
+                    current, wanted = (moment.date(), day) if day else (due, stamp)
+                    if current >= wanted:
+                        match = (due, moment) if current == wanted else None
+                        break
+                if match is None:
+                    return f"Tarefa #{task_id} não tem ocorrência pendente em {date}"
+
+                if match[0] == task.due_ts:
+                    following = self._next_occurrence(task)
+                    if following is None:
+                        task = self._mark_completed(task)
+                        message = f"Última ocorrência pulada; tarefa #{task_id} encerrada"
+                    else:
+                        task = self._replace_task(following)
+                        message = f"Ocorrência pulada; próxima da tarefa #{task_id}: {task.due_date}"
+                else:
+                    skipped = format_occurrence(match[1], is_date_only(task.due_date))
+                    task = copy.copy(task)
+                    task.exceptions = tuple(sorted(task.exceptions + (skipped,), key=parse_due))
+                    self._replace_task(task)
+                    message = f"Ocorrência de {skipped} da tarefa #{task_id} pulada"
+
+            await self._commit(('put_task', task))
+            return message
+
+        except Exception as e:
+            self.logger.error(f"Erro ao pular ocorrência: {e}")
+            return f"Erro ao pular ocorrência: {str(e)}"
+
+    async def list_reminders(self, limit: int = 10) -> str:
+        """
+        Lista os lembretes de prazo disparados recentemente e o próximo agendado.
+
+        Args:
+            limit: Número máximo de lembretes
+
+        Returns:
+            Lembretes formatados, do mais recente para o mais antigo
+        """
+        try:
+            events = self.reminders.events_after()[-max(limit, 0):] if limit > 0 else []
+            next_due = self.reminders.next_due()
+
+            parts = []
+            if events:
+                parts.append(f"Lembretes disparados ({len(events)}):\n")
+                for event in reversed(events):
+                    parts.append(f"⏰ #{event['task_id']} {event['title']} - venceu em "
+                                 f"{event['due_date']} (avisado em {event['fired_at'][:16]})\n")
+            else:
+                parts.append("Nenhum lembrete disparado ainda\n")
+
+            if next_due is not None:
+                parts.append(f"\nPróximo lembrete: {from_timestamp(next_due)[:16].replace('T', ' ')} "
+                             f"({len(self.reminders)} agendados)")
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao listar lembretes: {e}")
+            return f"Erro ao listar lembretes: {str(e)}"
+
+    async def search_notes(self, query: str, limit: int = 10) -> str:
+        """
+        Busca notas por texto, das mais relevantes para as menos.
+
+        Args:
+            query: Texto para buscar (palavras casam por prefixo, sem acentos)
+            limit: Número máximo de notas
+
+        Returns:
+            Notas encontradas com o trecho mais relevante do conteúdo
+        """
+        try:
+            matches = self.find_notes(query, limit)
+
+            if not matches:
+                return f"Nenhuma nota encontrada com '{query}'"
+
+            parts = [f"Notas encontradas com '{query}':\n"]
+            for note, _ in matches:
+                parts.append(f"📝 #{note['id']} {note['title']}\n")
+                parts.append(f"   {snippet(note['content'], query)}\n")
+
+                if note['tags']:
+                    parts.append(f"   🏷️ Tags: {', '.join(note['tags'])}\n")
+
+                parts.append("\n")
+
+            return ''.join(parts)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar notas: {e}")
+            return f"Erro na busca: {str(e)}"
@@ -149,3 +149,1063 @@ def test_get_tools(tasks_tool):
     assert "create_note" in tools
     assert "list_notes" in tools
     assert "search_tasks" in tools
+    assert "create_tasks" in tools
+    assert "complete_tasks" in tools
+    assert "delete_tasks" in tools
+    assert "list_notes_by_tag" in tools
+    assert "list_tags" in tools
+    assert "search_notes" in tools
+    assert "list_due_tasks" in tools
+    assert "list_overdue_tasks" in tools
+    assert "query_tasks" in tools
+    assert "add_dependency" in tools
+    assert "list_ready_tasks" in tools
+    assert "critical_path" in tools
+    assert "list_reminders" in tools
+    assert "list_agenda" in tools
+    assert "skip_occurrence" in tools
+
+@pytest.fixture
+def make_tool(tmp_path):
+    """Fixture que cria TasksTools com backend e opções configuráveis."""
+    from config.settings import settings
+
+    names = ("TASKS_DB_PATH", "TASKS_STORAGE", "TASKS_JOURNAL_COMPACT_OPS",
+             "TASKS_WRITE_BEHIND_MS", "TASKS_WRITE_BEHIND_MAX_OPS", "TASKS_DB_FORMAT",
+             "TASKS_ARCHIVE_DAYS")
+    original = {name: getattr(settings, name) for name in names}
+    settings.TASKS_DB_PATH = str(tmp_path / "test_tasks.json")
+
+    def factory(storage="json", **options):
+        settings.TASKS_STORAGE = storage
+        for name, value in options.items():
+            setattr(settings, name, value)
+        return TasksTools()
+
+    yield factory
+
+    for name, value in original.items():
+        setattr(settings, name, value)
+
+@pytest.mark.asyncio
+async def test_journal_appends_and_replays(make_tool):
+    """Testa que mutações vão para o journal e são reaplicadas no load."""
+    tool = make_tool("journal")
+    await tool.initialize()
+
+    await tool.create_task("Task 1")
+    await tool.create_task("Task 2")
+    await tool.complete_task(1)
+    await tool.delete_task(2, confirm=True)
+    await tool.create_note("Nota", "Conteúdo")
+
+    lines = tool.storage.journal_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 5
+
+    reloaded = make_tool("journal")
+    await reloaded.initialize()
+    assert [t["id"] for t in reloaded.tasks] == [1]
+    assert reloaded.tasks[0]["completed"] is True
+    assert len(reloaded.notes) == 1
+    assert reloaded.next_task_id == 3
+
+@pytest.mark.asyncio
+async def test_journal_compaction(make_tool):
+    """Testa que o journal é compactado no snapshot após o limite."""
+    from config.settings import settings
+
+    tool = make_tool("journal", TASKS_JOURNAL_COMPACT_OPS=3)
+    await tool.initialize()
+    for i in range(3):
+        await tool.create_task(f"Task {i}")
+
+    assert tool.storage.journal_path.read_text(encoding="utf-8") == ""
+    data = json.loads(Path(settings.TASKS_DB_PATH).read_text(encoding="utf-8"))
+    assert len(data["tasks"]) == 3
+
+@pytest.mark.asyncio
+async def test_journal_ignores_truncated_line(make_tool):
+    """Testa que uma linha parcial no fim do journal não impede o load."""
+    tool = make_tool("journal")
+    await tool.initialize()
+    await tool.create_task("Task 1")
+
+    with open(tool.storage.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put_task", "data": {"id": 2')
+
+    reloaded = make_tool("journal")
+    await reloaded.initialize()
+    assert len(reloaded.tasks) == 1
+
+@pytest.mark.asyncio
+async def test_sqlite_persists_and_queries(make_tool):
+    """Testa o backend SQLite: persistência, listagem ordenada e contagens."""
+    tool = make_tool("sqlite")
+    await tool.initialize()
+
+    await tool.create_task("Low", priority="low")
+    await tool.create_task("High", priority="high")
+    await tool.create_task("Done", priority="high")
+    await tool.complete_task(3)
+
+    page = tool.select_tasks("all", limit=2)
+    assert [t["title"] for t in page.items] == ["High", "Low"]
+    assert page.total == 3
+
+    rest = tool.select_tasks("all", limit=2, cursor=page.next_cursor)
+    assert [t["title"] for t in rest.items] == ["Done"]
+    assert rest.next_cursor is None
+
+    stats = tool.get_task_stats()
+    assert stats["pending"] == 2
+    assert stats["completed"] == 1
+    assert stats["priority"]["high"] == 1
+    await tool.cleanup()
+
+    reloaded = make_tool("sqlite")
+    await reloaded.initialize()
+    assert len(reloaded.tasks) == 3
+    assert reloaded.next_task_id == 4
+    await reloaded.cleanup()
+
+@pytest.mark.asyncio
+async def test_sqlite_imports_legacy_json(make_tool):
+    """Testa que o SQLite importa o tasks.json existente na primeira execução."""
+    legacy = make_tool("json")
+    await legacy.initialize()
+    await legacy.create_task("Legada")
+
+    tool = make_tool("sqlite")
+    await tool.initialize()
+    assert [t["title"] for t in tool.tasks] == ["Legada"]
+    await tool.cleanup()
+
+@pytest.mark.asyncio
+async def test_sqlite_search(make_tool):
+    """Testa busca FTS do SQLite com prefixo e sem acentos."""
+    tool = make_tool("sqlite")
+    await tool.initialize()
+
+    await tool.create_task("Reunião de equipe")
+    await tool.create_task("Deploy")
+
+    result = await tool.search_tasks("reuniao")
+    assert "Reunião" in result
+    assert "Deploy" not in result
+    assert [t["title"] for t in tool.find_tasks("depl")] == ["Deploy"]
+    await tool.cleanup()
+
+@pytest.mark.asyncio
+async def test_id_index(tasks_tool):
+    """Testa que o índice por id acompanha criação, deleção e reload."""
+    await tasks_tool.initialize()
+
+    for i in range(5):
+        await tasks_tool.create_task(f"Task {i}")
+    await tasks_tool.create_note("Nota", "Conteúdo")
+    await tasks_tool.delete_task(3, confirm=True)
+
+    assert tasks_tool.get_task(3) is None
+    assert tasks_tool.get_task(4)["title"] == "Task 3"
+    assert [t["id"] for t in tasks_tool.tasks] == [1, 2, 4, 5]
+    assert tasks_tool.get_note(1)["title"] == "Nota"
+
+    await tasks_tool.load_data()
+    assert tasks_tool.get_task(3) is None
+    assert tasks_tool.get_task(5)["title"] == "Task 4"
+
+@pytest.mark.asyncio
+async def test_search_tasks_accents_prefix_and_rank(tasks_tool):
+    """Testa busca sem acentos, por prefixo e ordenada por relevância."""
+    await tasks_tool.initialize()
+
+    await tasks_tool.create_task("Preparar pauta", "Antes da reunião")
+    await tasks_tool.create_task("Reunião de equipe", "Sala 3")
+    await tasks_tool.create_task("Deploy", "Publicar versão")
+
+    found = tasks_tool.find_tasks("reuniao")
+    assert [t["id"] for t in found] == [2, 1]  # título pesa mais que descrição
+
+    assert [t["id"] for t in tasks_tool.find_tasks("REUN equipe")] == [2]
+    assert [t["id"] for t in tasks_tool.find_tasks("versao")] == [3]
+
+    await tasks_tool.delete_task(2, confirm=True)
+    assert [t["id"] for t in tasks_tool.find_tasks("reuniao")] == [1]
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_burst(make_tool):
+    """Testa que uma rajada de mutações vira uma única gravação."""
+    import threading
+    from config.settings import settings
+
+    tool = make_tool("json", TASKS_WRITE_BEHIND_MS=200, TASKS_WRITE_BEHIND_MAX_OPS=100)
+    settings.TASKS_WRITE_BEHIND_MS = 0
+    await tool.initialize()
+
+    commits = []
+    original_commit = tool.storage.commit
+
+    def commit(ops, snapshot):
+        # O lote passa pela thread de E/S, como poll e snapshot
+        commits.append((len(ops), threading.current_thread().name.startswith("tasks-io")))
+        return original_commit(ops, snapshot)
+    tool.storage.commit = commit
+
+    for i in range(10):
+        await tool.create_task(f"Task {i}")
+    await tool.flush()
+
+    assert commits == [(10, True)]
+    data = json.loads(Path(settings.TASKS_DB_PATH).read_text(encoding="utf-8"))
+    assert len(data["tasks"]) == 10
+    await tool.cleanup()
+
+@pytest.mark.asyncio
+async def test_write_behind_max_ops_and_cleanup(make_tool):
+    """Testa gravação ao atingir o limite de operações e no cleanup."""
+    from config.settings import settings
+
+    tool = make_tool("journal", TASKS_WRITE_BEHIND_MS=60000, TASKS_WRITE_BEHIND_MAX_OPS=3)
+    settings.TASKS_WRITE_BEHIND_MS = 0
+    await tool.initialize()
+
+    for i in range(4):
+        await tool.create_task(f"Task {i}")
+    await asyncio.sleep(0.1)
+    # O limite dispara a gravação muito antes da janela de 60 s
+    assert len(tool.storage.journal_path.read_text(encoding="utf-8").splitlines()) >= 3
+
+    await tool.cleanup()
+    reloaded = make_tool("journal")
+    await reloaded.initialize()
+    assert len(reloaded.tasks) == 4
+
+@pytest.mark.asyncio
+async def test_atomic_write_keeps_backup(tasks_tool):
+    """Testa que a gravação é atômica e mantém a geração anterior."""
+    await tasks_tool.initialize()
+    await tasks_tool.create_task("Task 1")
+    await tasks_tool.create_task("Task 2")
+
+    storage = tasks_tool.storage
+    assert not storage.tmp_path.exists()
+    backup = json.loads(storage.backup_path.read_text(encoding="utf-8"))
+    assert [t["title"] for t in backup["tasks"]] == ["Task 1"]
+
+@pytest.mark.asyncio
+async def test_load_recovers_from_backup(make_tool):
+    """Testa recuperação a partir do backup quando o arquivo está truncado."""
+    tool = make_tool("json")
+    await tool.initialize()
+    await tool.create_task("Task 1")
+    await tool.create_task("Task 2")
+
+    tool.db_path.write_text('{"tasks": [{"id": 1', encoding="utf-8")
+
+    reloaded = make_tool("json")
+    await reloaded.initialize()
+    assert [t["title"] for t in reloaded.tasks] == ["Task 1"]
+    assert list(tool.db_path.parent.glob("*.corrupt-*"))
+    assert json.loads(tool.db_path.read_text(encoding="utf-8"))["tasks"][0]["title"] == "Task 1"
+
+@pytest.mark.asyncio
+async def test_load_prefers_complete_temp_file(make_tool):
+    """Testa recuperação de uma gravação interrompida entre os renames."""
+    tool = make_tool("json")
+    await tool.initialize()
+    await tool.create_task("Task 1")
+
+    storage = tool.storage
+    storage.tmp_path.write_text(tool.db_path.read_text(encoding="utf-8"), encoding="utf-8")
+    tool.db_path.unlink()
+
+    reloaded = make_tool("json")
+    await reloaded.initialize()
+    assert [t["title"] for t in reloaded.tasks] == ["Task 1"]
+
+@pytest.mark.asyncio
+async def test_bulk_task_tools(tasks_tool):
+    """Testa criação, conclusão e deleção em lote com uma gravação cada."""
+    await tasks_tool.initialize()
+
+    commits = []
+    original_commit = tasks_tool.storage.commit
+    tasks_tool.storage.commit = lambda ops, snapshot: (commits.append(len(ops)), original_commit(ops, snapshot))[1]
+
+    result = await tasks_tool.create_tasks([{"title": f"Task {i}", "priority": "high"} for i in range(5)])
+    assert "5 tarefas" in result
+    assert len(tasks_tool.tasks) == 5
+
+    result = await tasks_tool.complete_tasks([1, 2, 99])
+    assert "2 tarefas" in result and "#99" in result
+
+    result = await tasks_tool.delete_tasks([4, 5])
+    assert "confirm=True" in result
+    await tasks_tool.delete_tasks([4, 5], confirm=True)
+    assert [t["id"] for t in tasks_tool.tasks] == [1, 2, 3]
+
+    await tasks_tool.create_notes([{"title": "A", "content": "a", "tags": ["x", "y"]}])
+    assert tasks_tool.get_note(1)["tags"] == ["x", "y"]
+
+    assert commits == [5, 2, 2, 1]
+
+@pytest.mark.asyncio
+async def test_bulk_create_is_all_or_nothing(tasks_tool):
+    """Testa que um item inválido impede a criação do lote inteiro."""
+    await tasks_tool.initialize()
+
+    result = await tasks_tool.create_tasks([{"title": "Ok"}, {"title": ""}])
+
+    assert "item 2" in result
+    assert tasks_tool.tasks == []
+    assert tasks_tool.next_task_id == 1
+
+@pytest.mark.asyncio
+async def test_priority_buckets_match_full_sort(tasks_tool):
+    """Testa que a ordem incremental coincide com a ordenação completa."""
+    import random
+    await tasks_tool.initialize()
+
+    rng = random.Random(42)
+    for i in range(60):
+        await tasks_tool.create_task(f"Task {i}", priority=rng.choice(["low", "medium", "high"]))
+    for task_id in rng.sample(range(1, 61), 20):
+        await tasks_tool.complete_task(task_id)
+    for task_id in rng.sample(range(1, 61), 10):
+        await tasks_tool.delete_task(task_id, confirm=True)
+
+    rank = {"high": 0, "medium": 1, "low": 2}
+    for status in ("all", "pending", "completed"):
+        expected = sorted(
+            (t for t in tasks_tool.tasks
+             if status == "all" or t["completed"] == (status == "completed")),
+            key=lambda t: (t["completed"], rank[t["priority"]])
+        )
+        page = tasks_tool.select_tasks(status, limit=15)
+        assert [t["id"] for t in page.items] == [t["id"] for t in expected[:15]]
+        assert page.total == len(expected)
+
+    stats = tasks_tool.get_task_stats()
+    pending = [t for t in tasks_tool.tasks if not t["completed"]]
+    assert stats["pending"] == len(pending)
+    assert stats["priority"]["high"] == len([t for t in pending if t["priority"] == "high"])
+
+@pytest.mark.asyncio
+async def test_cursor_pagination(tasks_tool):
+    """Testa que os cursores percorrem tarefas e notas sem repetir itens."""
+    await tasks_tool.initialize()
+
+    for i in range(7):
+        await tasks_tool.create_task(f"Task {i}", priority=["low", "high"][i % 2])
+        await tasks_tool.create_note(f"Nota {i}", "Conteúdo")
+    await tasks_tool.complete_task(2)
+
+    seen, cursor = [], None
+    while True:
+        page = tasks_tool.select_tasks("all", limit=3, cursor=cursor)
+        seen.extend(t["id"] for t in page.items)
+        assert page.remaining == 7 - len(seen)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert seen == [t["id"] for t in tasks_tool.select_tasks("all", limit=100).items]
+
+    first = tasks_tool.select_notes(limit=4)
+    second = tasks_tool.select_notes(limit=4, cursor=first.next_cursor)
+    assert [n["id"] for n in first.items + second.items] == [7, 6, 5, 4, 3, 2, 1]
+    assert second.next_cursor is None
+
+    result = await tasks_tool.list_tasks(limit=3)
+    assert "e mais 4 tarefas" in result and "cursor=" in result
+
+    with pytest.raises(ValueError):
+        tasks_tool.select_tasks("all", cursor=first.next_cursor)
+
+@pytest.mark.asyncio
+async def test_compact_records_roundtrip(tasks_tool):
+    """Testa que os registros compactos preservam o formato JSON."""
+    from modules.tasks.records import TaskRecord, NoteRecord
+
+    await tasks_tool.initialize()
+    await tasks_tool.create_task("Task", "Desc", priority="high", due_date="2026-11-01")
+    await tasks_tool.complete_task(1)
+    await tasks_tool.create_note("Nota", "Texto", tags="a,b")
+
+    task = tasks_tool.get_task(1)
+    assert isinstance(task, TaskRecord)
+    assert not hasattr(task, "__dict__")
+    assert isinstance(task.created_ts, int)
+    assert task["priority"] == "high"
+
+    data = json.loads(tasks_tool.db_path.read_text(encoding="utf-8"))
+    assert data["tasks"][0] == task.to_dict()
+    assert set(data["tasks"][0]) == set(TaskRecord.FIELDS)
+    assert data["notes"][0]["tags"] == ["a", "b"]
+    assert TaskRecord.from_dict(data["tasks"][0]).to_dict() == data["tasks"][0]
+
+    legacy = {"id": 9, "title": "T", "content": "c", "tags": [],
+              "created_at": "2026-01-01T10:00:00+00:00", "updated_at": "2026-01-01"}
+    assert NoteRecord.from_dict(legacy).to_dict() == legacy
+
+@pytest.mark.asyncio
+async def test_notes_by_tag(tasks_tool):
+    """Testa o índice de tags: listagem paginada por tag e contagens."""
+    await tasks_tool.initialize()
+
+    for i in range(5):
+        await tasks_tool.create_note(f"Nota {i}", "Texto", tags="Reunião" if i % 2 == 0 else "outro")
+    await tasks_tool.create_note("Mista", "Texto", tags="reuniao, outro")
+
+    first = tasks_tool.select_notes_by_tag("REUNIAO", limit=2)
+    assert [n["id"] for n in first.items] == [6, 5]
+    assert first.total == 4 and first.remaining == 2
+    second = tasks_tool.select_notes_by_tag("reunião", limit=2, cursor=first.next_cursor)
+    assert [n["id"] for n in second.items] == [3, 1]
+    assert second.next_cursor is None
+
+    with pytest.raises(ValueError):
+        tasks_tool.select_notes_by_tag("outro", cursor=first.next_cursor)
+
+    assert tasks_tool.get_tag_counts() == [("Reunião", 4), ("outro", 3)]
+    assert "Reunião (4)" in await tasks_tool.list_tags()
+    assert "Nenhuma nota" in await tasks_tool.list_notes_by_tag("inexistente")
+
+@pytest.mark.asyncio
+async def test_search_notes_bm25(tasks_tool):
+    """Testa a busca de notas com ranking BM25 e extração de trecho."""
+    from modules.tasks.index import snippet
+
+    await tasks_tool.initialize()
+    filler = "texto sem relação " * 40
+    await tasks_tool.create_note("Ata", filler + "decidimos migrar o banco na reunião de sexta")
+    await tasks_tool.create_note("Reunião semanal", "pauta curta")
+    await tasks_tool.create_note("Compras", "pão e leite")
+
+    matches = tasks_tool.find_notes("reuniao")
+    assert [n["id"] for n, _ in matches] == [2, 1]
+    assert matches[0][1] > matches[1][1]
+    assert [n["id"] for n, _ in tasks_tool.find_notes("banco compras", limit=5)] in ([1, 3], [3, 1])
+    assert tasks_tool.find_notes("inexistente") == []
+
+    excerpt = snippet(tasks_tool.get_note(1)["content"], "migrar banco")
+    assert "migrar o banco" in excerpt and excerpt.startswith("...")
+
+    tasks_tool.notes = tasks_tool.notes[1:]
+    assert [n["id"] for n, _ in tasks_tool.find_notes("reuniao")] == [2]
+    assert "Reunião semanal" in await tasks_tool.search_notes("reuniao")
+
+@pytest.mark.asyncio
+async def test_render_cache_invalidation(tasks_tool):
+    """Testa que as listagens ficam em cache até a próxima mutação."""
+    await tasks_tool.initialize()
+    await tasks_tool.create_task("Task 1")
+    await tasks_tool.create_note("Nota", "Texto")
+
+    first = await tasks_tool.list_tasks()
+    assert await tasks_tool.list_tasks() is first
+    assert await tasks_tool.list_notes() is await tasks_tool.list_notes()
+
+    version = tasks_tool.version
+    await tasks_tool.complete_task(1)
+    assert tasks_tool.version > version
+    updated = await tasks_tool.list_tasks()
+    assert updated is not first and "Concluída em" in updated
+
+    await tasks_tool.create_note("Outra", "Texto")
+    assert "Outra" in await tasks_tool.list_notes()
+
+@pytest.mark.asyncio
+async def test_render_cache_sees_other_sqlite_writers(make_tool):
+    """Testa que gravações de outra conexão SQLite invalidam o cache."""
+    reader = make_tool("sqlite")
+    await reader.initialize()
+    writer = make_tool("sqlite")
+    await writer.initialize()
+
+    await reader.create_task("Do leitor")
+    assert "Do outro processo" not in await reader.list_tasks()
+    await writer.create_task("Do outro processo")
+    assert "Do outro processo" in await reader.list_tasks()
+    await writer.cleanup()
+    await reader.cleanup()
+
+@pytest.mark.asyncio
+async def test_persistence_off_event_loop(tasks_tool):
+    """Testa que a gravação roda fora do event loop e em ordem."""
+    import threading
+    import time
+
+    await tasks_tool.initialize()
+    original = tasks_tool.storage.commit
+    threads, batches = set(), []
+
+    def slow_commit(ops, snapshot):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        batches.append([payload["title"] for _, payload in ops])
+        original(ops, snapshot)
+
+    tasks_tool.storage.commit = slow_commit
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while len(batches) < 2:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(ticker(), tasks_tool.create_task("A"), tasks_tool.create_task("B"))
+
+    assert batches == [["A"], ["B"]]
+    assert threading.current_thread().name not in threads
+    assert ticks >= 5
+
+    data = json.loads(tasks_tool.db_path.read_text(encoding="utf-8"))
+    assert [t["title"] for t in data["tasks"]] == ["A", "B"]
+
+@pytest.mark.asyncio
+async def test_binary_format_and_migration(make_tool, monkeypatch):
+    """Testa o formato binário, a detecção na leitura e a migração."""
+    from modules.tasks import codec
+    from modules.tasks.migrate import migrate
+    from modules.tasks.storage import JsonStorage
+
+    tool = make_tool(TASKS_DB_FORMAT="json")
+    await tool.initialize()
+    await tool.create_task("Tarefa ção", "Desc", priority="high")
+    await tool.create_note("Nota", "Conteúdo", tags="a,b")
+    expected = [r.to_dict() for r in tool.tasks + tool.notes]
+
+    # O snapshot é gravado sob o mesmo lock da leitura
+    locked = []
+    original_write = JsonStorage.write_snapshot
+    monkeypatch.setattr(JsonStorage, "write_snapshot",
+                        lambda self, data: locked.append(self.lock._depth) or original_write(self, data))
+    summary = migrate(tool.db_path, "binary")
+    monkeypatch.undo()
+    assert locked and locked[0] >= 1
+    assert summary["from"] == "json" and summary["tasks"] == 1
+    raw = tool.db_path.read_bytes()
+    assert codec.detect(raw) == "binary"
+    assert tool.db_path.with_name("test_tasks.json.bak").exists()
+
+    # Leitura detecta o formato, mesmo com o backend configurado para json
+    reloaded = make_tool(TASKS_DB_FORMAT="json")
+    await reloaded.initialize()
+    assert [r.to_dict() for r in reloaded.tasks + reloaded.notes] == expected
+
+    binary = make_tool(TASKS_DB_FORMAT="binary")
+    await binary.initialize()
+    await binary.complete_task(1)
+    data = codec.load_file(binary.db_path)
+    assert data["tasks"][0]["completed"] is True
+    assert data["next_note_id"] == 2
+
+    with pytest.raises(ValueError):
+        codec.loads(raw[:-3])
+
+    # Journal vazio sem o banco: erro claro, não TypeError
+    orphan = tool.db_path.with_name("orphan.json")
+    orphan.with_name("orphan.json.journal").write_bytes(b"")
+    with pytest.raises(FileNotFoundError, match="Banco não encontrado"):
+        migrate(orphan, "binary")
+
+@pytest.mark.asyncio
+async def test_archive_completed_tasks(make_tool):
+    """Testa o arquivamento de concluídas antigas e a leitura sob demanda."""
+    tool = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await tool.initialize()
+    for i, priority in enumerate(["high", "low", "high", "medium", "low"], 1):
+        await tool.create_task(f"Task {i}", priority=priority)
+    await tool.bulk_complete_tasks([1, 2, 3, 4])
+    for task_id in (1, 2, 4):
+        tool.get_task(task_id).completed_at = "2025-01-15T10:00:00"
+
+    assert await tool.archive_completed() == 3
+    assert [t["id"] for t in tool.tasks] == [3, 5]
+    assert len(list(tool.archive.directory.glob("2025-01.*.seg"))) == 1
+
+    # Nova instância: o arquivo só é lido quando a listagem chega às concluídas
+    fresh = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await fresh.initialize()
+    stats = fresh.get_task_stats()
+    assert (stats["total"], stats["completed"], stats["archived"]) == (5, 4, 3)
+    assert [t["id"] for t in fresh.select_tasks("pending").items] == [5]
+    assert fresh._archived is None
+
+    first = fresh.select_tasks("completed", limit=2)
+    assert [t["id"] for t in first.items] == [1, 3]
+    assert first.remaining == 2
+    second = fresh.select_tasks("completed", limit=2, cursor=first.next_cursor)
+    assert [t["id"] for t in second.items] == [4, 2]
+    assert second.next_cursor is None
+    assert "Task 4" in await fresh.list_tasks("completed")
+
+    # Views leem o arquivo pelo objeto vivo, uma única vez; uma versão
+    # anterior a um arquivamento não vê a mesma tarefa duas vezes
+    shared = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await shared.initialize()
+    loads = []
+    original_load = shared.archive.load
+    shared.archive.load = lambda: loads.append(1) or original_load()
+    await shared.complete_task(5)
+    shared.get_task(5).completed_at = "2025-01-20T10:00:00"
+    before = shared.view()
+    assert await shared.archive_completed() == 1
+    for i in range(3):
+        await shared.create_task(f"Nova {i}")
+        assert [t["id"] for t in shared.view().select_tasks("completed").items] == [1, 3, 4, 2, 5]
+    assert [t["id"] for t in before.select_tasks("completed").items] == [1, 3, 4, 2, 5]
+    assert len(loads) == 1 and shared._archived is not None
+
+@pytest.mark.asyncio
+async def test_archived_tasks_lookup_and_delete(make_tool):
+    """Testa que tarefas arquivadas continuam acessíveis, buscáveis e deletáveis."""
+    tool = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await tool.initialize()
+    await tool.create_task("Old done", description="relatório antigo")
+    await tool.create_task("Old other")
+    await tool.create_task("Ativa")
+    await tool.bulk_complete_tasks([1, 2])
+    for task_id in (1, 2):
+        tool.get_task(task_id).completed_at = "2025-01-15T10:00:00"
+    assert await tool.archive_completed() == 2
+
+    fresh = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await fresh.initialize()
+    assert fresh.get_task(1)["title"] == "Old done"
+    assert "#1 Old done" in await fresh.search_tasks("old")
+    assert "#1 Old done" in await fresh.search_tasks("relatorio")
+    assert "já está concluída" in await fresh.complete_task(1)
+
+    assert "deletada permanentemente" in await fresh.delete_task(1, confirm=True)
+    assert fresh.get_task(1) is None
+    assert "Nenhuma tarefa" in await fresh.search_tasks("relatorio")
+    assert [t["id"] for t in fresh.select_tasks("all").items] == [3, 2]
+    assert fresh.get_task_stats()["archived"] == 1
+
+    deleted, missing = await fresh.bulk_delete_tasks([2, 3, 9])
+    assert sorted(t["id"] for t in deleted) == [2, 3] and missing == [9]
+
+    # A remoção fica no manifesto: outro processo também não as vê
+    await tool.refresh()
+    assert tool.get_task(1) is None and tool.get_task(2) is None
+    assert tool.select_tasks("all").items == []
+    reloaded = make_tool(TASKS_ARCHIVE_DAYS=30)
+    await reloaded.initialize()
+    assert reloaded.get_task_stats()["archived"] == 0
+    assert "Tarefa #1 não encontrada" in await reloaded.delete_task(1, confirm=True)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["json", "journal"])
+async def test_archive_completed_concurrent_processes(make_tool, storage):
+    """Testa que dois processos não arquivam as mesmas tarefas duas vezes."""
+    first = make_tool(storage, TASKS_ARCHIVE_DAYS=30)
+    await first.initialize()
+    await first.create_task("Antiga")
+    await first.complete_task(1)
+    second = make_tool(storage, TASKS_ARCHIVE_DAYS=30)
+    await second.initialize()
+    for tool in (first, second):
+        tool.get_task(1).completed_at = "2025-01-15T10:00:00"
+
+    assert await first.archive_completed() == 1
+    # O segundo ainda não viu a remoção: não grava outro segmento
+    assert await second.archive_completed() == 0
+    assert len(list(first.archive.directory.glob("2025-01.*.seg"))) == 1
+
+    await second.refresh()
+    assert second.tasks == []
+    assert await second.archive_completed() == 0
+    assert len(list(first.archive.directory.glob("*.seg"))) == 1
+    assert [t["id"] for t in second.select_tasks("completed").items] == [1]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+async def test_refresh_detects_external_changes(make_tool, storage):
+    """Testa que refresh só relê o banco quando outro processo o alterou."""
+    writer = make_tool(storage)
+    await writer.initialize()
+    reader = make_tool(storage)
+    await reader.initialize()
+
+    assert await reader.refresh() is False
+    await reader.create_task("Do leitor")
+    assert await reader.refresh() is False
+
+    loads = 0
+    original = reader.load_data
+
+    async def counting_load():
+        nonlocal loads
+        loads += 1
+        await original()
+
+    reader.load_data = counting_load
+    await writer.create_task("Do outro processo")
+    await writer.create_note("Nota", "Texto", tags="x")
+
+    assert await reader.refresh() is True
+    assert [n["title"] for n in reader.notes] == ["Nota"]
+    assert "Do outro processo" in [t["title"] for t in reader.tasks]
+    assert reader.select_notes_by_tag("x").total == 1
+    assert loads == (0 if storage == "journal" else 1)
+    assert await reader.refresh() is False
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+async def test_concurrent_writers_merge(make_tool, storage):
+    """Testa que dois processos gravando o mesmo banco não perdem dados."""
+    from modules.tasks.storage import JsonStorage
+
+    first = make_tool(storage)
+    await first.initialize()
+    second = make_tool(storage)
+    await second.initialize()
+
+    await first.create_task("Do primeiro")
+    await first.create_note("Nota do primeiro", "Texto")
+    # O segundo ainda não viu as gravações do primeiro e usa os mesmos ids;
+    # a resposta traz o id com que a tarefa ficou no banco
+    result = await second.create_task("Do segundo")
+    assert result.startswith("Tarefa #2 'Do segundo'")
+    await second.complete_task(1)
+
+    titles = {t["id"]: t["title"] for t in second.tasks}
+    assert titles == {1: "Do primeiro", 2: "Do segundo"}
+    assert second.get_task(1)["completed"] is True
+    assert [n["title"] for n in second.notes] == ["Nota do primeiro"]
+
+    await first.refresh()
+    assert [t.to_dict() for t in first.tasks] == [t.to_dict() for t in second.tasks]
+    assert first.next_task_id == 3
+
+    if storage != "sqlite":
+        await first.save_data()
+        data = JsonStorage(first.db_path).load()
+        assert data["seq"] >= 2 and len(data["tasks"]) == 2
+
+    # Criação em lote: os registros devolvidos também trazem os ids novos
+    await first.create_note("Outra do primeiro", "Texto")
+    created = await second.bulk_create_notes([{"title": "Do segundo", "content": "Texto"}])
+    assert [(n["id"], n["title"]) for n in created] == [(3, "Do segundo")]
+    assert second.get_note(3)["title"] == "Do segundo"
+
+    # add_task devolve o registro gravado, sem deduzir o id do contador
+    await first.create_task("Mais uma do primeiro")
+    task = await second.add_task("Outra do segundo")
+    assert (task["id"], task["title"]) == (4, "Outra do segundo")
+    with pytest.raises(ValueError):
+        await second.add_task("")
+
+    await first.create_note("Mais uma do primeiro", "Texto")
+    note = await second.add_note("Outra do segundo", "Texto")
+    assert (note["id"], note["title"]) == (5, "Outra do segundo")
+    with pytest.raises(ValueError):
+        await second.add_note("", "Texto")
+
+@pytest.mark.asyncio
+async def test_due_and_overdue_tasks(tasks_tool):
+    """Testa o índice de prazos e as consultas de vencimento."""
+    from datetime import datetime, timedelta
+
+    await tasks_tool.initialize()
+    now = datetime.now()
+    fmt = lambda delta: (now + delta).strftime("%Y-%m-%dT%H:%M")
+
+    await tasks_tool.create_task("Atrasada antiga", due_date=fmt(timedelta(days=-3)))
+    await tasks_tool.create_task("Atrasada recente", due_date=fmt(timedelta(hours=-2)))
+    await tasks_tool.create_task("Vence logo", due_date=fmt(timedelta(hours=3)))
+    await tasks_tool.create_task("Vence depois", due_date=(now + timedelta(days=5)).strftime("%d/%m/%Y"))
+    await tasks_tool.create_task("Sem prazo")
+    await tasks_tool.create_task("Prazo livre", due_date="quando der")
+    await tasks_tool.create_task("Concluída", due_date=fmt(timedelta(hours=1)))
+    await tasks_tool.complete_task(7)
+
+    assert [t["id"] for t in tasks_tool.select_overdue_tasks().items] == [1, 2]
+    assert [t["id"] for t in tasks_tool.select_due_tasks(24).items] == [3]
+    assert [t["id"] for t in tasks_tool.select_due_tasks(24 * 7).items] == [3, 4]
+    assert tasks_tool.get_task(6)["due_date"] == "quando der"
+
+    result = await tasks_tool.list_overdue_tasks()
+    assert "Atrasada há 3d" in result or "Atrasada há 2d" in result
+    assert "Vence em 2h" in await tasks_tool.list_due_tasks(within_hours=12)
+
+    await tasks_tool.delete_task(1, confirm=True)
+    assert tasks_tool.select_overdue_tasks().total == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["json", "journal"])
+async def test_note_content_file(make_tool, monkeypatch, storage):
+    """Testa os corpos das notas no arquivo de conteúdo, lidos sob demanda."""
+    from modules.tasks.content import ContentStore
+
+    tool = make_tool(TASKS_STORAGE=storage)
+    await tool.initialize()
+    await tool.create_note("Curta", "Texto curto sobre migração", tags="a")
+    await tool.create_note("Longa", "ç" * 400)
+    await tool.cleanup()
+
+    data = json.loads(tool.db_path.read_text(encoding="utf-8"))
+    assert all("content" not in n and "content_ref" in n for n in data["notes"])
+    assert tool.db_path.with_name("test_tasks.json.notes").exists()
+
+    reloaded = make_tool(TASKS_STORAGE=storage)
+    await reloaded.initialize()
+    assert reloaded.get_note(1).text is None
+    assert reloaded.get_note(2).preview(150) == ("ç" * 150, True)
+    assert "ç" * 150 + "..." in await reloaded.list_notes()
+    assert "Curta" in await reloaded.search_notes("migracao")
+
+    await reloaded.create_note("Nova", "Criada depois")
+    assert reloaded._snapshot()["notes"][0]["content_ref"] == data["notes"][0]["content_ref"]
+    reloaded._unindex_note(reloaded._notes_by_id.pop(2))
+    await reloaded._commit(("del_note", 2))
+    await reloaded.cleanup()
+
+    # Compactação: corpos de notas apagadas saem numa nova geração
+    monkeypatch.setattr(ContentStore, "COMPACT_MIN_BYTES", 0)
+    compacted = make_tool(TASKS_STORAGE=storage)
+    await compacted.initialize()
+    assert compacted.storage.content.name == "test_tasks.json.notes.1"
+    assert [n["content"] for n in compacted.notes] == ["Texto curto sobre migração", "Criada depois"]
+    await compacted.cleanup()
+    seq = json.loads(tool.db_path.read_text(encoding="utf-8"))["seq"]
+
+    # A correção do diagnóstico regrava o snapshot sem perder a geração nem o seq
+    from diagnostic_tasks import corrigir
+    await corrigir()
+    data = json.loads(tool.db_path.read_text(encoding="utf-8"))
+    assert data["content_file"] == "test_tasks.json.notes.1"
+    assert data["seq"] == seq + 1
+    fixed = make_tool(TASKS_STORAGE=storage)
+    await fixed.initialize()
+    assert [n["content"] for n in fixed.notes] == ["Texto curto sobre migração", "Criada depois"]
+
+@pytest.mark.asyncio
+async def test_query_tasks(tasks_tool):
+    """Testa a linguagem de consulta de tarefas."""
+    from modules.tasks.query import parse_query
+
+    await tasks_tool.initialize()
+    await tasks_tool.create_task("Deploy da API", priority="high", due_date="2026-10-30")
+    await tasks_tool.create_task("Deploy do site", priority="high", due_date="05/11/2026 10:00")
+    await tasks_tool.create_task("Revisar deploy", priority="low", due_date="2026-10-20")
+    await tasks_tool.create_task("Reunião", priority="medium")
+    await tasks_tool.complete_task(3)
+
+    def ids(query, **kwargs):
+        return [t.id for t in tasks_tool.select_query(query, **kwargs).items]
+
+    assert ids('priority:high due<2026-11-01 text:"deploy"') == [1]
+    assert ids("deploy sort:-due") == [2, 1, 3]
+    assert ids("status:pending sort:due") == [1, 2, 4]
+    assert ids("due<=2026-10-30 sort:-id") == [3, 1]
+    assert ids("due:none") == [4]
+    assert ids("reuniao status:all") == [4]
+    assert ids("status:completed priority:low") == [3]
+    assert ids("id:2,4") == [2, 4]
+    assert ids("") == [1, 2, 4, 3]
+    assert parse_query("priority:high sort:-created") is parse_query("priority:high sort:-created")
+
+    page = tasks_tool.select_query("deploy sort:title", limit=2)
+    assert [t.id for t in page.items] == [1, 2] and page.remaining == 1
+    assert ids("deploy sort:title", cursor=page.next_cursor) == [3]
+    with pytest.raises(ValueError):
+        tasks_tool.select_query("deploy", cursor=page.next_cursor)
+
+    assert "Consulta inválida" in await tasks_tool.query_tasks("priority:urgent")
+    assert "Consulta inválida" in await tasks_tool.query_tasks("due<amanhã")
+    result = await tasks_tool.query_tasks("status:pending priority:high")
+    assert "Deploy da API" in result and "Revisar" not in result
+
+def test_copy_on_write_structures():
+    """Testa que as cópias não veem escritas posteriores e compartilham os blocos intactos."""
+    from modules.tasks.cow import CowMap, CowSortedList
+
+    live = CowMap((i, str(i)) for i in range(1000))
+    snapshot = live.copy()
+    live[5] = "cinco"
+    del live[700]
+    live[2000] = "novo"
+    assert (snapshot[5], 700 in snapshot, 2000 in snapshot, len(snapshot)) == ("5", True, False, 1000)
+    assert (live[5], 700 in live, len(live)) == ("cinco", False, 1000)
+    assert list(snapshot) == list(range(1000))
+    assert live._chunks[1][1] is snapshot._chunks[1][1]      # bloco intacto: compartilhado
+    assert live._chunks[0][1] is not snapshot._chunks[0][1]  # bloco alterado: copiado
+
+    values = CowSortedList(range(0, 2000, 2))
+    frozen = values.copy()
+    values.add(1001)
+    values.discard(0)
+    assert list(frozen) == list(range(0, 2000, 2))
+    assert values[0] == 2 and values.bisect_left(1001) == 500
+    assert list(values.iter_before(3)) == [6, 4, 2]
+    assert list(values.iter_from(499))[:3] == [1000, 1001, 1002]
+
+@pytest.mark.asyncio
+async def test_view_snapshot_isolation(tasks_tool):
+    """Testa as versões publicadas para leitura, isoladas das escritas."""
+    import threading
+
+    await tasks_tool.initialize()
+    await tasks_tool.create_tasks([{"title": f"T{i}"} for i in range(20)])
+
+    view = tasks_tool.view()
+    assert tasks_tool.view() is view
+    await tasks_tool.complete_task(1)
+    await tasks_tool.delete_task(2, confirm=True)
+
+    # A versão antiga continua inteira; a nova reflete as mudanças
+    assert view.get_task(1)["completed"] is False and view.get_task(2) is not None
+    assert view.get_task_stats()["pending"] == 20
+    current = tasks_tool.view()
+    assert current is not view
+    assert current.get_task(1)["completed"] is True and current.get_task(2) is None
+    assert [t.id for t in current.select_tasks("completed").items] == [1]
+
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                snapshot = tasks_tool.view()
+                stats = snapshot.get_task_stats()
+                page = snapshot.select_tasks("all", 1000)
+                assert page.total == stats["pending"] + stats["completed"] == len(page.items)
+                assert sum(not t.completed for t in page.items) == stats["pending"]
+                snapshot.find_tasks("t1")
+            except Exception as e:  # noqa: BLE001 - relatar no thread principal
+                errors.append(e)
+                return
+
+    def writer():
+        async def run():
+            for i in range(10):
+                created = await tasks_tool.bulk_create_tasks([{"title": f"W{i}-{j}"} for j in range(5)])
+                await tasks_tool.bulk_complete_tasks([t.id for t in created[:2]])
+                await tasks_tool.bulk_delete_tasks([created[-1].id])
+        asyncio.run(run())
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    writer_thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert not errors
+    assert tasks_tool.view().get_task_stats()["total"] == 19 + 10 * 4
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+@pytest.mark.asyncio
+async def test_task_dependencies(make_tool, storage):
+    """Testa bloqueios, subtarefas, tarefas prontas e caminho crítico."""
+    tool = make_tool(storage)
+    await tool.initialize()
+    for title in ("Projeto", "Especificar", "Implementar", "Testar", "Avulsa"):
+        await tool.create_task(title, priority="low" if title == "Avulsa" else "medium")
+
+    def ready():
+        return [t.id for t in tool.select_ready_tasks().items]
+
+    assert "bloqueada por #2" in await tool.add_dependency(3, 2)
+    assert "bloqueada por #3" in await tool.add_dependency(4, 3)
+    for child in (2, 3, 4):
+        await tool.add_dependency(child, 1, kind="subtask")
+    assert ready() == [2, 5]
+
+    assert "circular" in await tool.add_dependency(2, 4)
+    assert "circular" in await tool.add_dependency(1, 4, kind="subtask")
+    assert tool.get_task(2).blocked_by == ()
+
+    assert [t.id for t in tool.select_critical_path()] == [2, 3, 4, 1]
+    assert "Caminho crítico (4 tarefas)" in await tool.critical_path()
+
+    await tool.complete_task(2)
+    assert ready() == [3, 5]
+    await tool.delete_task(3, confirm=True)
+    assert ready() == [4, 5]
+    await tool.complete_task(4)
+    assert ready() == [1, 5]
+    assert "Projeto" in await tool.list_ready_tasks()
+
+    await tool.create_task("Revisar")
+    await tool.add_dependency(5, 6)
+    await tool.flush()
+    reloaded = make_tool(storage)
+    await reloaded.initialize()
+    assert reloaded.get_task(5).blocked_by == (6,)
+    assert [t.id for t in reloaded.select_ready_tasks().items] == [1, 6]
+    assert "removida" in await reloaded.remove_dependency(5, 6)
+    assert [t.id for t in reloaded.select_ready_tasks().items] == [1, 6, 5]
+
+@pytest.mark.asyncio
+async def test_due_reminders(tasks_tool):
+    """Testa o disparo de lembretes no prazo, sem varrer as tarefas."""
+    from datetime import datetime, timedelta
+
+    await tasks_tool.initialize()
+    received = []
+    tasks_tool.reminders.subscribe(received.append)
+
+    soon = (datetime.now() + timedelta(seconds=0.3)).isoformat()
+    await tasks_tool.create_task("Ligar para o cliente", due_date=soon)
+    await tasks_tool.create_task("Cancelada", due_date=soon)
+    await tasks_tool.create_task("Amanhã", due_date=(datetime.now() + timedelta(days=1)).isoformat())
+    await tasks_tool.create_task("Atrasada", due_date="2020-01-01")
+    await tasks_tool.complete_task(2)
+    assert len(tasks_tool.reminders) == 2
+
+    events = await asyncio.to_thread(tasks_tool.reminders.wait, 0, 5)
+    assert [e["task_id"] for e in events] == [1]
+    assert received == events
+    assert tasks_tool.reminders.next_due() == tasks_tool.get_task(3).due_ts
+    assert "Ligar para o cliente" in await tasks_tool.list_reminders()
+
+    await tasks_tool.delete_task(3, confirm=True)
+    assert tasks_tool.reminders.next_due() is None
+    assert not tasks_tool.reminders.closed
+    tasks_tool.reminders.close()
+    # Encerrado, wait() volta na hora; o stream SSE usa closed para parar
+    assert tasks_tool.reminders.closed
+    assert tasks_tool.reminders.wait(events[-1]["seq"], timeout=5) == []
+
+@pytest.mark.asyncio
+async def test_recurring_tasks(tasks_tool):
+    """Testa tarefas recorrentes: só a regra é gravada, ocorrências sob demanda."""
+    from datetime import date, timedelta
+    from modules.tasks.recurrence import parse_rule
+
+    await tasks_tool.initialize()
+    today = date.today()
+    await tasks_tool.create_task("Standup", due_date=today.isoformat(), recurrence="daily")
+    await tasks_tool.create_task("Relatório", due_date=(today + timedelta(days=2)).isoformat(),
+                                 recurrence="FREQ=WEEKLY;COUNT=2")
+    await tasks_tool.create_task("Avulsa", due_date=(today + timedelta(days=1)).isoformat())
+    assert "Erro" in await tasks_tool.create_task("X", recurrence="FREQ=HOURLY")
+    assert str(parse_rule("weekdays")) == "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"
+
+    data = json.loads(tasks_tool.db_path.read_text(encoding="utf-8"))
+    assert len(data["tasks"]) == 3
+    assert data["tasks"][0]["recurrence"] == "FREQ=DAILY"
+
+    page = tasks_tool.select_agenda(days=10, limit=5)
+    assert [t.id for t in page.items] == [1, 1, 3, 1, 2]
+    assert page.items[1].due_date == (today + timedelta(days=1)).isoformat()
+    assert page.total == 10 + 1 + 2
+
+    assert "pulada" in await tasks_tool.skip_occurrence(1, (today + timedelta(days=1)).isoformat())
+    assert "Próxima" in await tasks_tool.complete_task(1)
+    assert tasks_tool.get_task(1).due_date == (today + timedelta(days=2)).isoformat()
+    assert tasks_tool.get_task(1).exceptions == ()
+
+    await tasks_tool.complete_task(2)
+    assert tasks_tool.get_task(2).recurrence == "FREQ=WEEKLY;COUNT=1"
+    await tasks_tool.complete_task(2)
+    assert tasks_tool.get_task(2).completed
+    assert "🔁 Repete: FREQ=DAILY" in await tasks_tool.list_agenda(days=3)